@@ -2,10 +2,37 @@ import aiohttp
 import requests
 import json
 import logging
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Iterable, Iterator, AsyncIterator, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import threading
+import time
+import weakref
+
+from .templates import MessageTemplate, rows_from_csv, rows_from_jsonl
+from .results import LeanResult, detect_error_type
+from .bulk import run_bounded, run_threaded, _aiter
+from .limiter import AdaptiveLimiter
+from .ratelimit import TokenBucket, SharedTokenBucket
+from .dispatch import PriorityDispatcher, OrderedDispatcher, PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BULK
+from .campaign import Campaign, CampaignResult
+from .documents import (
+    PreparedDocument, FileReferenceCache, read_file_bytes, content_hash, extract_file_reference,
+)
+from .transports import (
+    Transport, TransportRequest, TransportResponse, TransportError, TransportTimeout, HTTPTransport,
+    AiohttpTransport, RequestsTransport, MemoryTransport, RecordingTransport, ReplayTransport,
+)
+from .endpoints import EndpointPool
+from .outgoing import OutgoingRequest, OutgoingMessage, OutgoingDocument
+from .profiling import ClientProfiler
+from .shutdown import ShutdownReport, RequestGate
+from .admission import AdmissionQueue, QueuedSend
+from .sinks import SendRecord, ResultSink, MemorySink, JSONLSink, CSVSink, SQLiteSink, open_sink
+from .broadcast import ProcessBroadcaster, BroadcastResult
+from .scheduler import MessageScheduler
+from .chatcache import ChatIdCache
 
 __version__ = "1.0"
 
@@ -116,27 +143,7 @@ class Response:
     
     def _detect_error_type(self) -> Optional[str]:
         """تشخیص نوع خطا بر اساس پاسخ API"""
-        if not self.ok:
-            error_desc = str(self.error or '').lower()
-            
-            if "method not found" in error_desc:
-                return "METHOD_NOT_FOUND"
-            elif "invalid token" in error_desc or "unauthorized" in error_desc:
-                return "INVALID_TOKEN"
-            elif "chat not found" in error_desc or "chat_id" in error_desc:
-                return "CHAT_NOT_FOUND"
-            elif "timeout" in error_desc:
-                return "TIMEOUT"
-            elif "network" in error_desc or "connection" in error_desc:
-                return "NETWORK_ERROR"
-            elif "not implemented" in error_desc:
-                return "METHOD_NOT_IMPLEMENTED"
-            elif "file" in error_desc or "document" in error_desc:
-                return "FILE_ERROR"
-            elif "text" in error_desc or "message" in error_desc:
-                return "MESSAGE_ERROR"
-                
-        return None
+        return detect_error_type(self.ok, self.error)
     
     def _parse_result(self, result_data: Dict[str, Any]) -> Any:
         """Parse result data into appropriate objects."""
@@ -289,29 +296,72 @@ class Client:
     def __init__(
         self,
         token: str,
-        base_url: str = "https://eitaayar.ir/api",
+        base_url: Union[str, List[str], EndpointPool] = "https://eitaayar.ir/api",
         timeout: int = 30,
         enable_logging: bool = False,
         log_level: int = logging.INFO,
         log_file: Optional[str] = None,
-        user_agent: Optional[str] = None
+        user_agent: Optional[str] = None,
+        dispatcher: Optional[PriorityDispatcher] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        ordered: Optional[OrderedDispatcher] = None,
+        transport: Optional[Transport] = None,
+        shutdown_timeout: float = 30.0,
+        chat_id_cache: Optional[ChatIdCache] = None,
     ) -> None:
         """
         Initialize the client with your API token.
 
         :param token: Your API token from eitaayar.ir
-        :param base_url: Base URL for the API (default: https://eitaayar.ir/api)
+        :param base_url: Base URL for the API, or a list of mirror URLs / an EndpointPool for
+                         latency-based selection with failover (default: https://eitaayar.ir/api)
         :param timeout: Timeout for requests in seconds (default: 30)
         :param enable_logging: Enable logging system (default: False)
         :param log_level: Logging level (default: logging.INFO)
         :param log_file: Custom log file path (optional)
         :param user_agent: Custom User-Agent string (optional)
+        :param dispatcher: PriorityDispatcher gating async requests by priority lane (optional)
+        :param limiter: AdaptiveLimiter tuning async concurrency from latency and errors (optional)
+        :param rate_limiter: TokenBucket capping requests per second, sync and async; with a
+                             dispatcher, async tokens are granted in priority order (optional)
+        :param ordered: OrderedDispatcher keeping async sends to the same chat in order (optional)
+        :param transport: Transport doing the HTTP I/O for sync and async methods (default: HTTPTransport)
+        :param shutdown_timeout: Seconds ``shutdown`` (and ``async with``) waits for pending sends (default: 30)
+        :param chat_id_cache: ChatIdCache rewriting sends to known @usernames to numeric ids (optional)
         """
         self.token = token
-        self.base_url = base_url.rstrip('/')
+        if not base_url:
+            raise ValueError("At least one base URL is required")
+        if isinstance(base_url, str):
+            base_url = [base_url]
+        if not isinstance(base_url, EndpointPool) and len(base_url) > 1:
+            base_url = EndpointPool(base_url)
+        # با چند آدرس، هر درخواست به سریع‌ترین نقطه سالم فرستاده می‌شود
+        self.endpoints: Optional[EndpointPool] = base_url if isinstance(base_url, EndpointPool) else None
+        self.base_url = self.endpoints.urls[0] if self.endpoints is not None else base_url[0].rstrip('/')
+        self._probe_task: Optional[asyncio.Task] = None
         self.timeout = timeout
-        self._session: Optional[aiohttp.ClientSession] = None
         self._enable_logging = enable_logging
+        self.dispatcher = dispatcher
+        self.limiter = limiter
+        self.rate_limiter = rate_limiter
+        self.ordered = ordered
+        self.profiler: Optional[ClientProfiler] = None
+        self.shutdown_timeout = shutdown_timeout
+        self.chat_ids = chat_id_cache
+        self._gate = RequestGate()
+        # صف‌ها و زمان‌بندهایی که هنگام خاموش شدن باید تخلیه شوند
+        self._attached: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        # sinkهای ارسال‌های گروهی که هنگام خاموش شدن flush می‌شوند
+        self._sinks: "weakref.WeakSet[ResultSink]" = weakref.WeakSet()
+        if dispatcher is not None and limiter is not None:
+            # ظرفیت صف‌های اولویت از محدودکننده تطبیقی پیروی می‌کند
+            dispatcher.resize(limiter.limit)
+            limiter.subscribe(dispatcher.resize)
+        if dispatcher is not None and rate_limiter is not None:
+            # توکن‌ها به ترتیب اولویت همراه با اسلات داده می‌شوند
+            dispatcher.rate_limiter = rate_limiter
         self.user_agent = user_agent or f"{LIBRARY_SIGNATURE['name']}/{LIBRARY_SIGNATURE['version']}"
         
         # اضافه کردن هدرهای سفارشی با امضا
@@ -322,11 +372,12 @@ class Client:
             'X-Developer': LIBRARY_SIGNATURE['developer'],
             'X-Developed-With': 'Love for Python and Iranian Developers'
         }
+        self.transport = transport if transport is not None else HTTPTransport(self.default_headers)
         
         # تنظیمات لاگر در صورت فعال بودن
         if enable_logging:
             self._setup_logging(log_level, log_file)
-            self._log(logging.INFO, f"Client initialized with base_url: {base_url}")
+            self._log(logging.INFO, f"Client initialized with base_url: {self.endpoints.urls if self.endpoints is not None else self.base_url}")
             self._log(logging.DEBUG, f"Token: {token[:10]}...")
             self._log(logging.INFO, f"Library: {LIBRARY_SIGNATURE['name']} v{LIBRARY_SIGNATURE['version']}")
 
@@ -363,83 +414,282 @@ class Client:
         if self._enable_logging:
             logger.log(level, message, *args, **kwargs)
 
+    @property
+    def _session(self) -> Optional[aiohttp.ClientSession]:
+        """aiohttp session of the default transport, if one is open."""
+        if isinstance(self.transport, HTTPTransport):
+            return self.transport.async_transport.session
+        return None
+
+    @property
+    def _sync_session(self) -> Optional[requests.Session]:
+        """Pooled requests session of the default transport, if one is open."""
+        if isinstance(self.transport, HTTPTransport):
+            return self.transport.sync_transport.session
+        return None
+
+    @_sync_session.setter
+    def _sync_session(self, session: Optional[requests.Session]) -> None:
+        if isinstance(self.transport, HTTPTransport):
+            self.transport.sync_transport.session = session
+
+    def _get_sync_session(self, pool_size: int = 10) -> Optional[requests.Session]:
+        """Create (once) the pooled keep-alive session shared by sync requests."""
+        if isinstance(self.transport, HTTPTransport):
+            return self.transport.sync_transport.open_session(pool_size)
+        return None
+
+    def close_sync(self) -> None:
+        """Close the pooled requests session used by the sync bulk methods."""
+        self._save_chat_ids()
+        try:
+            self.transport.close()
+        except Exception as e:
+            self._log(logging.ERROR, f"Failed to close requests session: {e}")
+
+    def _save_chat_ids(self) -> None:
+        """Persist the chat id cache, if it has a file."""
+        if self.chat_ids is None:
+            return
+        try:
+            self.chat_ids.save()
+        except OSError as e:
+            self._log(logging.ERROR, f"Failed to save chat id cache: {e}")
+
+    def _build_request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        base_url: Optional[str] = None,
+    ) -> TransportRequest:
+        """Build the transport request for an API call."""
+        headers = {**self.default_headers}
+        if body is not None:
+            headers['Content-Type'] = content_type or 'application/octet-stream'
+        elif not files:
+            headers['Content-Type'] = 'application/json'
+        request = TransportRequest(method, f"{base_url or self.base_url}/{self.token}/{method}", headers,
+                                   params, data, files, body, self.timeout)
+        if self._enable_logging:
+            self._log(logging.DEBUG, f"URL: {request.url}")
+            self._log(logging.DEBUG, f"Params: {params}")
+            self._log(logging.DEBUG, f"Data: {data}")
+            if body is not None:
+                self._log(logging.DEBUG, f"Request contains prebuilt body ({len(body)} bytes)")
+            elif files:
+                self._log(logging.DEBUG, "Request contains files")
+        return request
+
+    def _read_reply(self, method: str, reply: Any, lean: bool = False) -> Union[Response, LeanResult]:
+        """Decode a transport reply into a Response (or LeanResult)."""
+        profiler = self.profiler
+        started = time.perf_counter()
+        try:
+            raw_response = json.loads(reply.content) if lean else reply.json()
+        except json.JSONDecodeError as e:
+            self._log(logging.ERROR, f"Invalid JSON response from {method}: {e}")
+            return self._error_response(f"Invalid JSON response: {e}", 500, lean)
+        if not isinstance(raw_response, dict):
+            self._log(logging.ERROR, f"Unexpected response from {method}: {type(raw_response).__name__} instead of an object")
+            return self._error_response(
+                f"Invalid JSON response: expected an object, got {type(raw_response).__name__}", 500, lean
+            )
+        if profiler is not None:
+            decoded = time.perf_counter()
+            profiler.record(method, "decode", decoded - started)
+        if self.chat_ids is not None and raw_response.get("ok"):
+            self.chat_ids.learn(raw_response.get("result"))
+        if lean:
+            result = LeanResult.from_payload(raw_response)
+        else:
+            if self._enable_logging:
+                self._log(logging.INFO, f"Request completed: {method} - Status: {reply.status_code}")
+                self._log(logging.DEBUG, f"Response: {raw_response}")
+            result = Response(raw_response, self._enable_logging)
+        if profiler is not None:
+            profiler.record(method, "parse", time.perf_counter() - decoded)
+        return result
+
     async def _aiohttp_request(
         self,
         method: str,
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
-    ) -> Response:
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        priority: Optional[str] = None,
+        lean: bool = False,
+        outgoing: Optional[OutgoingRequest] = None,
+    ) -> Union[Response, LeanResult]:
         """
         Make an asynchronous HTTP request to the API.
+
+        ``body``/``content_type`` send an already encoded payload as-is; a prebuilt
+        ``outgoing`` request is sent with its cached body and headers instead.
+        With a dispatcher, the request first waits for a slot in its ``priority`` lane.
+        With ``lean=True`` a LeanResult is returned instead of a Response.
+        With a limiter, the concurrency limit adapts to each request's latency and errors.
         """
-        if self._session is None:
-            try:
-                self._session = aiohttp.ClientSession(headers=self.default_headers)
-                self._log(logging.DEBUG, "aiohttp session created with custom headers")
-            except Exception as e:
-                self._log(logging.ERROR, f"Failed to create aiohttp session: {e}")
-                return Response({"ok": False, "error": f"Failed to create session: {e}"}, self._enable_logging)
+        if not self._gate.enter():
+            return self._refuse(method, lean)
+        completed = False
+        try:
+            if self.dispatcher is not None:
+                async with self.dispatcher.slot(priority):
+                    result = await self._aiohttp_measured(method, params, data, files, body, content_type, lean, outgoing)
+            elif self.limiter is not None:
+                async with self.limiter.slot():
+                    result = await self._aiohttp_measured(method, params, data, files, body, content_type, lean, outgoing)
+            else:
+                result = await self._aiohttp_measured(method, params, data, files, body, content_type, lean, outgoing)
+            completed = True
+            return result
+        finally:
+            self._gate.leave(completed)
 
-        url = f"{self.base_url}/{self.token}/{method}"
-        self._log(logging.INFO, f"Making async request to: {method}")
-        self._log(logging.DEBUG, f"URL: {url}")
-        self._log(logging.DEBUG, f"Params: {params}")
-        self._log(logging.DEBUG, f"Data: {data}")
+    def _refuse(self, method: str, lean: bool) -> Union[Response, LeanResult]:
+        """Answer a request made after shutdown began."""
+        self._log(logging.WARNING, f"Refusing {method}: client is shutting down")
+        return self._error_response("Client is shutting down", 503, lean, error_type="CLIENT_CLOSED")
 
+    def _resolve_chat_id(self, chat_id: Union[int, str]) -> Union[int, str]:
+        """Rewrite a cached ``@username`` to its numeric chat id."""
+        if self.chat_ids is None:
+            return chat_id
+        return self.chat_ids.resolve(chat_id)
+
+    def _check_resolved(self, chat_id: Union[int, str], resolved: Union[int, str],
+                        result: Union[Response, LeanResult]) -> Union[Response, LeanResult]:
+        """Forget a cached id the API no longer accepts for ``chat_id``."""
+        if resolved is not chat_id and not result.ok and result.error_type == "CHAT_NOT_FOUND":
+            self._log(logging.INFO, f"Cached chat id {resolved} for {chat_id} rejected; forgetting it")
+            self.chat_ids.invalidate(chat_id)
+        return result
+
+    async def _in_chat_order(self, chat_id: Union[int, str], lean: bool, send: Any) -> Union[Response, LeanResult]:
+        """Await the ``send`` coroutine after earlier sends to the same chat, if ordering is enabled."""
+        if self.ordered is None:
+            return await send
         try:
-            headers = {**self.default_headers}
-            
-            if files:
-                self._log(logging.DEBUG, "Request contains files")
-                form_data = aiohttp.FormData()
-                for key, value in (data or {}).items():
-                    form_data.add_field(key, str(value))
-                
-                for key, file_info in files.items():
-                    if isinstance(file_info, tuple):
-                        form_data.add_field(
-                            key, 
-                            file_info[1], 
-                            filename=file_info[0],
-                            content_type=file_info[2] if len(file_info) > 2 else None
-                        )
-                    else:
-                        form_data.add_field(key, file_info)
-                
-                async with self._session.post(
-                    url, data=form_data, timeout=self.timeout, headers=headers
-                ) as response:
-                    try:
-                        raw_response = await response.json()
-                        self._log(logging.INFO, f"Async request completed: {method} - Status: {response.status}")
-                        self._log(logging.DEBUG, f"Response: {raw_response}")
-                        return Response(raw_response, self._enable_logging)
-                    except json.JSONDecodeError as e:
-                        self._log(logging.ERROR, f"Invalid JSON response from {method}: {e}")
-                        return Response({"ok": False, "error": f"Invalid JSON response: {e}", "error_code": 500}, self._enable_logging)
+            await self.ordered.acquire(chat_id)
+        except asyncio.QueueFull as e:
+            send.close()
+            self._log(logging.WARNING, str(e))
+            return self._error_response(str(e), None, lean)
+        except BaseException:
+            # لغو شدن هنگام انتظار؛ coroutine هرگز اجرا نمی‌شود
+            send.close()
+            raise
+        try:
+            return await send
+        finally:
+            self.ordered.release(chat_id)
+
+    async def _aiohttp_measured(self, *args: Any) -> Union[Response, LeanResult]:
+        """Apply the rate limit, run ``_aiohttp_send`` and report its latency to the adaptive limiter."""
+        if self.rate_limiter is not None and self.dispatcher is None:
+            # با dispatcher، توکن همراه اسلات گرفته شده است
+            await self.rate_limiter.acquire()
+        if self.limiter is None:
+            return await self._aiohttp_send(*args)
+        started = time.perf_counter()
+        response = await self._aiohttp_send(*args)
+        in_flight = self.dispatcher.in_flight if self.dispatcher is not None else None
+        self.limiter.observe(time.perf_counter() - started, response.error_type, response.error_code, in_flight)
+        return response
+
+    async def _aiohttp_send(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        lean: bool = False,
+        outgoing: Optional[OutgoingRequest] = None,
+    ) -> Union[Response, LeanResult]:
+        """Perform the request on the async transport and wrap the result in a Response."""
+        self._log(logging.INFO, f"Making async request to: {method}")
+        profiler = self.profiler
+        begun = time.perf_counter()
+        tried: List[str] = []
+        while True:
+            base_url = self.endpoints.select(tried) if self.endpoints is not None else self.base_url
+            built = time.perf_counter()
+            if outgoing is not None:
+                request = outgoing.bind(base_url, self.token, self.default_headers, self.timeout)
             else:
-                headers['Content-Type'] = 'application/json'
-                async with self._session.post(
-                    url, json=data, params=params, timeout=self.timeout, headers=headers
-                ) as response:
-                    try:
-                        raw_response = await response.json()
-                        self._log(logging.INFO, f"Async request completed: {method} - Status: {response.status}")
-                        self._log(logging.DEBUG, f"Response: {raw_response}")
-                        return Response(raw_response, self._enable_logging)
-                    except json.JSONDecodeError as e:
-                        self._log(logging.ERROR, f"Invalid JSON response from {method}: {e}")
-                        return Response({"ok": False, "error": f"Invalid JSON response: {e}", "error_code": 500}, self._enable_logging)
-        except aiohttp.ClientError as e:
-            self._log(logging.ERROR, f"Network error in async request {method}: {e}")
-            return Response({"ok": False, "error": f"Network error: {e}", "error_code": 503}, self._enable_logging)
-        except asyncio.TimeoutError:
-            self._log(logging.ERROR, f"Timeout in async request {method}")
-            return Response({"ok": False, "error": "Request timeout", "error_code": 408}, self._enable_logging)
-        except Exception as e:
-            self._log(logging.ERROR, f"Unexpected error in async request {method}: {e}")
-            return Response({"ok": False, "error": f"Unexpected error: {e}", "error_code": 500}, self._enable_logging)
+                request = self._build_request(method, params, data, files, body, content_type, base_url)
+            started = time.perf_counter()
+            try:
+                reply = await self.transport.request_async(request)
+            except Exception as e:
+                if profiler is not None:
+                    profiler.record(method, "build", started - built)
+                    profiler.record(method, "network", time.perf_counter() - started)
+                if self._failover(base_url, e, tried):
+                    continue
+                result = self._transport_failure(method, e, "async", lean)
+                break
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.record(method, "build", started - built)
+                profiler.record(method, "network", elapsed)
+            if self.endpoints is not None:
+                self.endpoints.report_success(base_url, elapsed)
+            result = self._read_reply(method, reply, lean)
+            break
+        if profiler is not None:
+            profiler.request_done(method, time.perf_counter() - begun)
+        return result
+
+    def _failover(self, base_url: str, error: Exception, tried: List[str]) -> bool:
+        """Record a failed endpoint and tell whether to retry on another one."""
+        if self.endpoints is None or not isinstance(error, TransportError):
+            return False
+        self.endpoints.report_failure(base_url, error)
+        tried.append(base_url)
+        if len(tried) >= len(self.endpoints) or not self.endpoints.should_failover(error):
+            return False
+        self.endpoints.failovers += 1
+        self._log(logging.WARNING, f"{base_url} failed ({error}), failing over to another endpoint")
+        return True
+
+    def _transport_failure(self, method: str, error: Exception, mode: str, lean: bool) -> Union[Response, LeanResult]:
+        """Turn a transport exception into a failed Response (or LeanResult)."""
+        if isinstance(error, TransportTimeout):
+            self._log(logging.ERROR, f"Timeout in {mode} request {method}")
+            return self._error_response("Request timeout", 408, lean, error_type="TIMEOUT")
+        if isinstance(error, TransportError):
+            # پاسخی از API دریافت نشده؛ نوع خطا مستقل از متن پیام است
+            self._log(logging.ERROR, f"{error} in {mode} request {method}")
+            return self._error_response(str(error), error.code, lean, error_type="NETWORK_ERROR")
+        self._log(logging.ERROR, f"Unexpected error in {mode} request {method}: {error}")
+        return self._error_response(f"Unexpected error: {error}", 500, lean)
+
+    def _error_response(
+        self,
+        error: str,
+        error_code: Optional[int] = None,
+        lean: bool = False,
+        error_type: Optional[str] = None,
+    ) -> Union[Response, LeanResult]:
+        """Build a failed Response (or LeanResult) for a client-side error; ``error_type`` skips detection."""
+        if lean:
+            return LeanResult.failure(error, error_code, error_type)
+        data = {"ok": False, "error": error}
+        if error_code is not None:
+            data["error_code"] = error_code
+        response = Response(data, self._enable_logging)
+        if error_type is not None:
+            response.error_type = error_type
+        return response
 
     def _requests_request(
         self,
@@ -447,58 +697,114 @@ class Client:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
-    ) -> Response:
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        lean: bool = False,
+        outgoing: Optional[OutgoingRequest] = None,
+    ) -> Union[Response, LeanResult]:
         """
         Make a synchronous HTTP request to the API.
+
+        ``body``/``content_type`` send an already encoded payload as-is; a prebuilt
+        ``outgoing`` request is sent with its cached body and headers instead.
+        With ``lean=True`` a LeanResult is returned instead of a Response.
         """
-        url = f"{self.base_url}/{self.token}/{method}"
         self._log(logging.INFO, f"Making sync request to: {method}")
-        self._log(logging.DEBUG, f"URL: {url}")
-        self._log(logging.DEBUG, f"Params: {params}")
-        self._log(logging.DEBUG, f"Data: {data}")
-
+        if not self._gate.enter():
+            return self._refuse(method, lean)
+        completed = False
         try:
-            headers = {**self.default_headers}
-            
-            if files:
-                self._log(logging.DEBUG, "Request contains files")
-                response = requests.post(
-                    url,
-                    data=data,
-                    files=files,
-                    timeout=self.timeout,
-                    headers=headers
-                )
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync()
+            result = self._requests_send(method, params, data, files, body, content_type, lean, outgoing)
+            completed = True
+            return result
+        finally:
+            self._gate.leave(completed)
+
+    def _requests_send(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+        content_type: Optional[str] = None,
+        lean: bool = False,
+        outgoing: Optional[OutgoingRequest] = None,
+    ) -> Union[Response, LeanResult]:
+        """Perform the request on the sync transport and wrap the result in a Response."""
+        profiler = self.profiler
+        begun = time.perf_counter()
+        tried: List[str] = []
+        while True:
+            base_url = self.endpoints.select(tried) if self.endpoints is not None else self.base_url
+            built = time.perf_counter()
+            if outgoing is not None:
+                request = outgoing.bind(base_url, self.token, self.default_headers, self.timeout)
             else:
-                headers['Content-Type'] = 'application/json'
-                response = requests.post(
-                    url,
-                    json=data,
-                    params=params,
-                    headers=headers,
-                    timeout=self.timeout
-                )
-            
-            self._log(logging.INFO, f"Sync request completed: {method} - Status: {response.status_code}")
-            self._log(logging.DEBUG, f"Response text: {response.text[:200]}...")
-            
+                request = self._build_request(method, params, data, files, body, content_type, base_url)
+            started = time.perf_counter()
             try:
-                response_data = response.json()
-                self._log(logging.DEBUG, f"Response JSON: {response_data}")
-                return Response(response_data, self._enable_logging)
-            except json.JSONDecodeError as e:
-                self._log(logging.ERROR, f"Invalid JSON response from {method}: {e}")
-                return Response({"ok": False, "error": f"Invalid JSON response: {e}", "error_code": 500}, self._enable_logging)
-                
-        except requests.exceptions.RequestException as e:
-            self._log(logging.ERROR, f"Network error in sync request {method}: {e}")
-            return Response({"ok": False, "error": f"Network error: {e}", "error_code": 503}, self._enable_logging)
-        except requests.exceptions.Timeout:
-            self._log(logging.ERROR, f"Timeout in sync request {method}")
-            return Response({"ok": False, "error": "Request timeout", "error_code": 408}, self._enable_logging)
-        except Exception as e:
-            self._log(logging.ERROR, f"Unexpected error in sync request {method}: {e}")
-            return Response({"ok": False, "error": f"Unexpected error: {e}", "error_code": 500}, self._enable_logging)
+                reply = self.transport.request(request)
+            except Exception as e:
+                if profiler is not None:
+                    profiler.record(method, "build", started - built)
+                    profiler.record(method, "network", time.perf_counter() - started)
+                if self._failover(base_url, e, tried):
+                    continue
+                result = self._transport_failure(method, e, "sync", lean)
+                break
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                profiler.record(method, "build", started - built)
+                profiler.record(method, "network", elapsed)
+            if self.endpoints is not None:
+                self.endpoints.report_success(base_url, elapsed)
+            result = self._read_reply(method, reply, lean)
+            break
+        if profiler is not None:
+            profiler.request_done(method, time.perf_counter() - begun)
+        return result
+
+    async def probe_endpoints_async(self) -> Dict[str, Any]:
+        """
+        Measure every endpoint with a getMe request and update its health and latency.
+
+        :return: Per-endpoint metrics (empty with a single base URL)
+        """
+        if self.endpoints is None:
+            return {}
+
+        async def _probe(url: str) -> None:
+            started = time.perf_counter()
+            try:
+                await self.transport.request_async(self._build_request("getMe", base_url=url))
+            except Exception as e:
+                self.endpoints.report_failure(url, e)
+                self._log(logging.WARNING, f"Endpoint probe failed for {url}: {e}")
+            else:
+                self.endpoints.report_success(url, time.perf_counter() - started)
+
+        await asyncio.gather(*(_probe(url) for url in self.endpoints.urls))
+        return self.endpoints.metrics()
+
+    def start_endpoint_probing(self, interval: float = 30.0) -> Optional[asyncio.Task]:
+        """
+        Probe the endpoints in the background every ``interval`` seconds (call from a running loop).
+
+        The task is cancelled by ``close()``.
+        """
+        if self.endpoints is None:
+            return None
+        if self._probe_task is None or self._probe_task.done():
+            async def _loop() -> None:
+                while True:
+                    await self.probe_endpoints_async()
+                    await asyncio.sleep(interval)
+
+            self._probe_task = asyncio.ensure_future(_loop())
+        return self._probe_task
 
     async def get_me_async(self) -> Response:
         """
@@ -518,6 +824,69 @@ class Client:
         self._log(logging.INFO, "Getting bot info (sync)")
         return self._requests_request("getMe")
 
+    async def send_async(
+        self,
+        request: OutgoingRequest,
+        priority: Optional[str] = None,
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
+        """
+        Send a prebuilt OutgoingMessage or OutgoingDocument (asynchronous).
+
+        The request's encoded body, URL and headers are reused as-is, so sending
+        the same object again (e.g. on retry) costs no re-encoding.
+
+        :param request: OutgoingMessage or OutgoingDocument
+        :param priority: Dispatcher lane: urgent, normal or bulk (optional)
+        :param lean: Return a LeanResult instead of a full Response (default: False)
+        :return: Response object with message result
+        """
+        self._log(logging.INFO, f"Sending prebuilt {request.method} to chat {request.chat_id} (async)")
+        chat_id = request.chat_id
+        resolved = self._resolve_chat_id(chat_id)
+        if resolved is not chat_id:
+            request = request.with_chat_id(resolved)
+        result = await self._in_chat_order(
+            resolved, lean,
+            self._aiohttp_request(request.method, data=request.data, priority=priority, lean=lean, outgoing=request)
+        )
+        return self._check_resolved(chat_id, resolved, result)
+
+    def send(self, request: OutgoingRequest, lean: bool = False) -> Union[Response, LeanResult]:
+        """
+        Send a prebuilt OutgoingMessage or OutgoingDocument (synchronous).
+
+        :param request: OutgoingMessage or OutgoingDocument
+        :param lean: Return a LeanResult instead of a full Response (default: False)
+        :return: Response object with message result
+        """
+        self._log(logging.INFO, f"Sending prebuilt {request.method} to chat {request.chat_id} (sync)")
+        chat_id = request.chat_id
+        resolved = self._resolve_chat_id(chat_id)
+        if resolved is not chat_id:
+            request = request.with_chat_id(resolved)
+        result = self._requests_request(request.method, data=request.data, lean=lean, outgoing=request)
+        return self._check_resolved(chat_id, resolved, result)
+
+    def _clone_for(self, request: OutgoingRequest, chat_id: Any, lean: bool) -> Any:
+        """Clone ``request`` for ``chat_id``, or return a failed result for an invalid chat id."""
+        try:
+            return request.with_chat_id(chat_id)
+        except (TypeError, ValueError) as e:
+            self._log(logging.WARNING, f"Skipping recipient {chat_id!r}: {e}")
+            return self._error_response(f"Invalid chat_id: {e}", 400, lean)
+
+    @staticmethod
+    def _bulk_message(text: Optional[str], message: Optional[OutgoingMessage], template: Optional[MessageTemplate],
+                      options: Dict[str, Any]) -> Optional[OutgoingMessage]:
+        """Check the bulk message arguments and encode a plain ``text`` message once."""
+        if sum(arg is not None for arg in (text, message, template)) != 1:
+            raise ValueError("Exactly one of text, message or template must be given")
+        if text is None:
+            return message
+        fields = {k: v for k, v in options.items() if k not in ("priority", "lean")}
+        return OutgoingMessage(0, text, **fields)
+
     async def send_message_async(
         self,
         chat_id: Union[int, str],
@@ -528,7 +897,9 @@ class Client:
         date: Optional[int] = None,
         pin: Optional[int] = None,
         auto_delete_after_views: Optional[int] = None,
-    ) -> Response:
+        priority: Optional[str] = None,
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
         """
         Send a text message (asynchronous).
 
@@ -540,13 +911,16 @@ class Client:
         :param date: Date and time to send message (Unix timestamp, optional)
         :param pin: Pin the message after sending (optional)
         :param auto_delete_after_views: Auto-delete after views count (optional)
+        :param priority: Dispatcher lane: urgent, normal or bulk (optional)
+        :param lean: Return a LeanResult instead of a full Response (default: False)
         :return: Response object with message result
         """
         self._log(logging.INFO, f"Sending message to chat {chat_id} (async)")
         self._log(logging.DEBUG, f"Message text: {text[:50]}...")
         
+        resolved = self._resolve_chat_id(chat_id)
         data = {
-            "chat_id": chat_id,
+            "chat_id": resolved,
             "text": text,
             "title": title,
             "disable_notification": disable_notification,
@@ -557,7 +931,10 @@ class Client:
         }
         data = {k: v for k, v in data.items() if v is not None}
         
-        return await self._aiohttp_request("sendMessage", data=data)
+        result = await self._in_chat_order(
+            resolved, lean, self._aiohttp_request("sendMessage", data=data, priority=priority, lean=lean)
+        )
+        return self._check_resolved(chat_id, resolved, result)
 
     def send_message(
         self,
@@ -569,7 +946,8 @@ class Client:
         date: Optional[int] = None,
         pin: Optional[int] = None,
         auto_delete_after_views: Optional[int] = None,
-    ) -> Response:
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
         """
         Send a text message (synchronous).
 
@@ -581,13 +959,15 @@ class Client:
         :param date: Date and time to send message (Unix timestamp, optional)
         :param pin: Pin the message after sending (optional)
         :param auto_delete_after_views: Auto-delete after views count (optional)
+        :param lean: Return a LeanResult instead of a full Response (default: False)
         :return: Response object with message result
         """
         self._log(logging.INFO, f"Sending message to chat {chat_id} (sync)")
         self._log(logging.DEBUG, f"Message text: {text[:50]}...")
         
+        resolved = self._resolve_chat_id(chat_id)
         data = {
-            "chat_id": chat_id,
+            "chat_id": resolved,
             "text": text,
             "title": title,
             "disable_notification": disable_notification,
@@ -598,7 +978,135 @@ class Client:
         }
         data = {k: v for k, v in data.items() if v is not None}
         
-        return self._requests_request("sendMessage", data=data)
+        result = self._requests_request("sendMessage", data=data, lean=lean)
+        return self._check_resolved(chat_id, resolved, result)
+
+    async def send_message_many_async(
+        self,
+        recipients: Union[Iterable[Any], AsyncIterator[Any]],
+        text: Optional[str] = None,
+        template: Optional[MessageTemplate] = None,
+        concurrency: int = 10,
+        sink: Optional[ResultSink] = None,
+        message: Optional[OutgoingMessage] = None,
+        **options: Any,
+    ) -> AsyncIterator[Any]:
+        """
+        Send a message to many recipients (asynchronous).
+
+        Recipients are consumed lazily, so a generator, CSV reader or DB cursor
+        can feed millions of sends without building the messages up front.
+        Once ``shutdown`` begins no further recipients are read.
+
+        :param recipients: Chat ids (with ``text``) or variable rows (with ``template``)
+        :param text: Same text for every recipient (optional)
+        :param template: MessageTemplate rendered once per row (optional)
+        :param concurrency: Maximum number of in-flight requests (default: 10)
+        :param sink: ResultSink receiving a compact SendRecord per send (optional)
+        :param message: Prebuilt OutgoingMessage cloned per chat id, instead of ``text`` (optional)
+        :param options: Extra ``send_message_async`` parameters (e.g. disable_notification);
+                        ``priority`` defaults to the bulk lane
+        :return: Async iterator of (chat_id, Response) in completion order, or of
+                 SendRecord when a sink is given (the Response is dropped right away)
+        """
+        # متن ثابت یک بار کدگذاری می‌شود و فقط chat_id برای هر گیرنده عوض می‌شود
+        prebuilt = self._bulk_message(text, message, template, options)
+        options.setdefault("priority", PRIORITY_BULK)
+        lean = options.get("lean", False)
+        self._log(logging.INFO, f"Starting bulk message send (concurrency={concurrency})")
+
+        async def _send(item: Any) -> Any:
+            started = time.perf_counter()
+            if prebuilt is None:
+                rendered = template.render(item)
+                chat_id = rendered["chat_id"]
+                response = await self.send_message_async(**{**options, **rendered})
+            else:
+                chat_id = item
+                outgoing = self._clone_for(prebuilt, item, lean)
+                if isinstance(outgoing, OutgoingRequest):
+                    response = await self.send_async(outgoing, priority=options["priority"], lean=lean)
+                else:
+                    response = outgoing
+            if sink is None:
+                return chat_id, response
+            return SendRecord.from_response(chat_id, response, time.perf_counter() - started)
+
+        self._track_sink(sink)
+        try:
+            async for result in run_bounded(self._until_closed_async(recipients), _send, concurrency):
+                if sink is not None:
+                    sink.write(result)
+                yield result
+        finally:
+            if sink is not None:
+                sink.flush()
+
+    def send_message_many(
+        self,
+        recipients: Iterable[Any],
+        text: Optional[str] = None,
+        template: Optional[MessageTemplate] = None,
+        max_workers: int = 10,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = False,
+        stop_on: Iterable[str] = ("INVALID_TOKEN",),
+        sink: Optional[ResultSink] = None,
+        message: Optional[OutgoingMessage] = None,
+        **options: Any,
+    ) -> Iterator[Any]:
+        """
+        Send a message to many recipients over a thread pool (synchronous).
+
+        All workers share one pooled keep-alive requests session. Recipients are
+        consumed lazily and at most ``max_in_flight`` sends are queued at once.
+        Once ``shutdown`` begins no further recipients are read.
+
+        :param recipients: Chat ids (with ``text``) or variable rows (with ``template``)
+        :param text: Same text for every recipient (optional)
+        :param template: MessageTemplate rendered once per row (optional)
+        :param max_workers: Number of worker threads (default: 10)
+        :param max_in_flight: Maximum queued sends (default: 2 * max_workers)
+        :param ordered: Yield results in input order instead of as completed (default: False)
+        :param stop_on: Error types that cancel the remaining sends (default: INVALID_TOKEN)
+        :param sink: ResultSink receiving a compact SendRecord per send (optional)
+        :param message: Prebuilt OutgoingMessage cloned per chat id, instead of ``text`` (optional)
+        :param options: Extra ``send_message`` parameters (e.g. disable_notification, lean)
+        :return: Iterator of (chat_id, Response), or of SendRecord when a sink is given
+        """
+        prebuilt = self._bulk_message(text, message, template, options)
+        lean = options.get("lean", False)
+        self._get_sync_session(max_workers)
+        fatal = frozenset(stop_on)
+        self._log(logging.INFO, f"Starting threaded bulk message send (workers={max_workers})")
+
+        def _send(item: Any) -> Any:
+            started = time.perf_counter()
+            if prebuilt is None:
+                rendered = template.render(item)
+                chat_id = rendered["chat_id"]
+                response = self.send_message(**{**options, **rendered})
+            else:
+                chat_id = item
+                outgoing = self._clone_for(prebuilt, item, lean)
+                response = self.send(outgoing, lean=lean) if isinstance(outgoing, OutgoingRequest) else outgoing
+            if sink is None:
+                return chat_id, response
+            return SendRecord.from_response(chat_id, response, time.perf_counter() - started)
+
+        def _is_fatal(result: Any) -> bool:
+            return (result if sink is not None else result[1]).error_type in fatal
+
+        self._track_sink(sink)
+        try:
+            for result in run_threaded(self._until_closed(recipients), _send, max_workers, max_in_flight,
+                                       ordered, _is_fatal):
+                if sink is not None:
+                    sink.write(result)
+                yield result
+        finally:
+            if sink is not None:
+                sink.flush()
 
     async def send_document_async(
         self,
@@ -613,7 +1121,9 @@ class Client:
         auto_delete_after_views: Optional[int] = None,
         filename: Optional[str] = None,
         content_type: Optional[str] = None,
-    ) -> Response:
+        priority: Optional[str] = None,
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
         """
         Send a document/file (asynchronous).
 
@@ -628,32 +1138,38 @@ class Client:
         :param auto_delete_after_views: Auto-delete after views count (optional)
         :param filename: Name of the file (optional)
         :param content_type: Content type of the file (optional)
+        :param priority: Dispatcher lane: urgent, normal or bulk (optional)
+        :param lean: Return a LeanResult instead of a full Response (default: False)
         :return: Response object with message result
         """
         self._log(logging.INFO, f"Sending document to chat {chat_id} (async)")
+        requested, chat_id = chat_id, self._resolve_chat_id(chat_id)
+
+        async def _send() -> Union[Response, LeanResult]:
+            # ابتدا بررسی می‌کنیم که متد وجود دارد یا نه
+            test_response = await self._aiohttp_request("sendDocument", data={"chat_id": chat_id}, priority=priority, lean=lean)
         
-        # ابتدا بررسی می‌کنیم که متد وجود دارد یا نه
-        test_response = await self._aiohttp_request("sendDocument", data={"chat_id": chat_id})
+            if not test_response.ok and test_response.error_type == "METHOD_NOT_FOUND":
+                self._log(logging.WARNING, "sendDocument method not found, using fallback")
+                return await self._send_document_fallback(chat_id, file, caption, filename, priority, lean)
         
-        if not test_response.ok and test_response.error_type == "METHOD_NOT_FOUND":
-            self._log(logging.WARNING, "sendDocument method not found, using fallback")
-            return await self._send_document_fallback(chat_id, file, caption, filename)
+            data = {
+                "chat_id": chat_id,
+                "caption": caption,
+                "title": title,
+                "disable_notification": disable_notification,
+                "reply_to_message_id": reply_to_message_id,
+                "date": date,
+                "pin": pin,
+                "auto_delete_after_views": auto_delete_after_views,
+            }
+            data = {k: v for k, v in data.items() if v is not None}
         
-        data = {
-            "chat_id": chat_id,
-            "caption": caption,
-            "title": title,
-            "disable_notification": disable_notification,
-            "reply_to_message_id": reply_to_message_id,
-            "date": date,
-            "pin": pin,
-            "auto_delete_after_views": auto_delete_after_views,
-        }
-        data = {k: v for k, v in data.items() if v is not None}
-        
-        files = {"file": (filename, file, content_type)} if file else None
+            files = {"file": (filename, file, content_type)} if file else None
         
-        return await self._aiohttp_request("sendDocument", data=data, files=files)
+            return await self._aiohttp_request("sendDocument", data=data, files=files, priority=priority, lean=lean)
+
+        return self._check_resolved(requested, chat_id, await self._in_chat_order(chat_id, lean, _send()))
 
     def send_document(
         self,
@@ -668,7 +1184,8 @@ class Client:
         auto_delete_after_views: Optional[int] = None,
         filename: Optional[str] = None,
         content_type: Optional[str] = None,
-    ) -> Response:
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
         """
         Send a document/file (synchronous).
 
@@ -683,16 +1200,19 @@ class Client:
         :param auto_delete_after_views: Auto-delete after views count (optional)
         :param filename: Name of the file (optional)
         :param content_type: Content type of the file (optional)
+        :param lean: Return a LeanResult instead of a full Response (default: False)
         :return: Response object with message result
         """
         self._log(logging.INFO, f"Sending document to chat {chat_id} (sync)")
+        requested, chat_id = chat_id, self._resolve_chat_id(chat_id)
         
         # ابتدا بررسی می‌کنیم که متد وجود دارد یا نه
-        test_response = self._requests_request("sendDocument", data={"chat_id": chat_id})
+        test_response = self._requests_request("sendDocument", data={"chat_id": chat_id}, lean=lean)
         
         if not test_response.ok and test_response.error_type == "METHOD_NOT_FOUND":
             self._log(logging.WARNING, "sendDocument method not found, using fallback")
-            return self._send_document_fallback_sync(chat_id, file, caption, filename)
+            result = self._send_document_fallback_sync(chat_id, file, caption, filename, lean)
+            return self._check_resolved(requested, chat_id, result)
         
         data = {
             "chat_id": chat_id,
@@ -708,15 +1228,256 @@ class Client:
         
         files = {"file": (filename, file, content_type)} if file else None
         
-        return self._requests_request("sendDocument", data=data, files=files)
+        result = self._requests_request("sendDocument", data=data, files=files, lean=lean)
+        return self._check_resolved(requested, chat_id, result)
+
+    async def send_document_many_async(
+        self,
+        chat_ids: Union[Iterable[Union[int, str]], AsyncIterator[Union[int, str]]],
+        file: Any,
+        caption: Optional[str] = None,
+        title: Optional[str] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        concurrency: int = 10,
+        cache: Optional[FileReferenceCache] = None,
+        reference_field: str = "file_id",
+        sink: Optional[ResultSink] = None,
+        priority: str = PRIORITY_BULK,
+        lean: bool = False,
+        **options: Any,
+    ) -> AsyncIterator[Any]:
+        """
+        Send the same document to many chats, uploading it only once (asynchronous).
+
+        The document is content-hashed. If ``cache`` holds a file reference for
+        it, or the API returns one for the first upload, later recipients get the
+        reference instead of the file. Otherwise the multipart body is encoded
+        once and only its ``chat_id`` part changes per recipient. Once
+        ``shutdown`` begins no further chat ids are read.
+
+        :param chat_ids: Target chat ids or usernames
+        :param file: File to send (file object, bytes, or file path)
+        :param caption: Document caption (optional)
+        :param title: Message title (optional)
+        :param filename: Name of the file (optional)
+        :param content_type: Content type of the file (optional)
+        :param concurrency: Maximum number of in-flight requests (default: 10)
+        :param cache: FileReferenceCache shared across runs (optional)
+        :param reference_field: Request field carrying a cached reference (default: file_id)
+        :param sink: ResultSink receiving a compact SendRecord per send (optional)
+        :param priority: Dispatcher lane (default: bulk)
+        :param lean: Return a LeanResult instead of a full Response (default: False)
+        :param options: Extra form fields (e.g. disable_notification, pin)
+        :return: Async iterator of (chat_id, Response), or of SendRecord when a sink is given
+        """
+        content = read_file_bytes(file)
+        fields = {"caption": caption, "title": title, **options}
+        prepared = PreparedDocument(content, filename, content_type, fields)
+        digest = prepared.sha256
+        state = {"ref": cache.get(digest) if cache else None, "fallback": False, "probed": False}
+        self._log(logging.INFO, f"Starting bulk document send: {prepared}, cached reference: {state['ref'] is not None}")
+
+        async def _upload(chat_id: Union[int, str]) -> Union[Response, LeanResult]:
+            # اولین آپلود کامل خوانده می‌شود تا شناسه فایل استخراج شود
+            probe = not state["probed"]
+            state["probed"] = True
+            response = await self._aiohttp_request(
+                "sendDocument", body=prepared.body(chat_id), content_type=prepared.content_type,
+                priority=priority, lean=lean and not probe,
+            )
+            if not response.ok and response.error_type == "METHOD_NOT_FOUND":
+                self._log(logging.WARNING, "sendDocument method not found, using fallback")
+                state["fallback"] = True
+                return await self._send_document_fallback(chat_id, content, caption, filename, priority, lean)
+            if probe and response.ok and state["ref"] is None:
+                reference = extract_file_reference(response.get("result"))
+                if reference:
+                    self._log(logging.INFO, "Document uploaded once, reusing file reference")
+                    state["ref"] = reference
+                    if cache is not None:
+                        cache.put(digest, reference, filename)
+            if lean and isinstance(response, Response):
+                return LeanResult.from_payload(response.to_dict())
+            return response
+
+        async def _send(chat_id: Union[int, str]) -> Any:
+            started = time.perf_counter()
+            resolved = self._resolve_chat_id(chat_id)
+            reference = state["ref"]
+            if state["fallback"]:
+                response = await self._send_document_fallback(resolved, content, caption, filename, priority, lean)
+            elif reference is not None:
+                data = {k: v for k, v in fields.items() if v is not None}
+                data.update({"chat_id": resolved, reference_field: reference})
+                response = await self._aiohttp_request("sendDocument", data=data, priority=priority, lean=lean)
+                if not response.ok and response.error_type == "FILE_ERROR":
+                    # شناسه فایل منقضی شده؛ دوباره آپلود می‌کنیم
+                    self._log(logging.WARNING, "Cached file reference rejected, uploading again")
+                    if state["ref"] == reference:
+                        state["ref"] = None
+                        state["probed"] = False
+                        if cache is not None:
+                            cache.invalidate(digest)
+                    response = await _upload(resolved)
+            else:
+                response = await _upload(resolved)
+            response = self._check_resolved(chat_id, resolved, response)
+            if sink is None:
+                return chat_id, response
+            return SendRecord.from_response(chat_id, response, time.perf_counter() - started)
+
+        source = self._until_closed_async(chat_ids).__aiter__()
+        self._track_sink(sink)
+        try:
+            # گیرنده اول به تنهایی ارسال می‌شود تا شناسه فایل به دست بیاید
+            try:
+                first = await source.__anext__()
+            except StopAsyncIteration:
+                return
+            result = await _send(first)
+            if sink is not None:
+                sink.write(result)
+            yield result
+            async for result in run_bounded(source, _send, concurrency):
+                if sink is not None:
+                    sink.write(result)
+                yield result
+        finally:
+            if sink is not None:
+                sink.flush()
+
+    def send_document_many(
+        self,
+        chat_ids: Iterable[Union[int, str]],
+        file: Any,
+        caption: Optional[str] = None,
+        title: Optional[str] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        max_workers: int = 10,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = False,
+        stop_on: Iterable[str] = ("INVALID_TOKEN",),
+        cache: Optional[FileReferenceCache] = None,
+        reference_field: str = "file_id",
+        sink: Optional[ResultSink] = None,
+        lean: bool = False,
+        **options: Any,
+    ) -> Iterator[Any]:
+        """
+        Send the same document to many chats over a thread pool (synchronous).
+
+        Works like ``send_document_many_async``: the document is uploaded once
+        and reused by file reference, or its multipart body is prebuilt once.
+
+        :param chat_ids: Target chat ids or usernames
+        :param file: File to send (file object, bytes, or file path)
+        :param caption: Document caption (optional)
+        :param title: Message title (optional)
+        :param filename: Name of the file (optional)
+        :param content_type: Content type of the file (optional)
+        :param max_workers: Number of worker threads (default: 10)
+        :param max_in_flight: Maximum queued sends (default: 2 * max_workers)
+        :param ordered: Yield results in input order instead of as completed (default: False)
+        :param stop_on: Error types that cancel the remaining sends (default: INVALID_TOKEN)
+        :param cache: FileReferenceCache shared across runs (optional)
+        :param reference_field: Request field carrying a cached reference (default: file_id)
+        :param sink: ResultSink receiving a compact SendRecord per send (optional)
+        :param lean: Return LeanResult objects instead of full Responses (default: False)
+        :param options: Extra form fields (e.g. disable_notification, pin)
+        :return: Iterator of (chat_id, Response), or of SendRecord when a sink is given
+        """
+        content = read_file_bytes(file)
+        fields = {"caption": caption, "title": title, **options}
+        prepared = PreparedDocument(content, filename, content_type, fields)
+        digest = prepared.sha256
+        state = {"ref": cache.get(digest) if cache else None, "fallback": False, "probed": False}
+        lock = threading.Lock()
+        fatal = frozenset(stop_on)
+        self._get_sync_session(max_workers)
+        self._log(logging.INFO, f"Starting threaded bulk document send: {prepared}")
+
+        def _upload(chat_id: Union[int, str]) -> Union[Response, LeanResult]:
+            with lock:
+                probe = not state["probed"]
+                state["probed"] = True
+            response = self._requests_request(
+                "sendDocument", body=prepared.body(chat_id), content_type=prepared.content_type,
+                lean=lean and not probe,
+            )
+            if not response.ok and response.error_type == "METHOD_NOT_FOUND":
+                self._log(logging.WARNING, "sendDocument method not found, using fallback")
+                state["fallback"] = True
+                return self._send_document_fallback_sync(chat_id, content, caption, filename, lean)
+            if probe and response.ok and state["ref"] is None:
+                reference = extract_file_reference(response.get("result"))
+                if reference:
+                    state["ref"] = reference
+                    if cache is not None:
+                        with lock:
+                            cache.put(digest, reference, filename)
+            if lean and isinstance(response, Response):
+                return LeanResult.from_payload(response.to_dict())
+            return response
+
+        def _send(chat_id: Union[int, str]) -> Any:
+            started = time.perf_counter()
+            resolved = self._resolve_chat_id(chat_id)
+            reference = state["ref"]
+            if state["fallback"]:
+                response = self._send_document_fallback_sync(resolved, content, caption, filename, lean)
+            elif reference is not None:
+                data = {k: v for k, v in fields.items() if v is not None}
+                data.update({"chat_id": resolved, reference_field: reference})
+                response = self._requests_request("sendDocument", data=data, lean=lean)
+                if not response.ok and response.error_type == "FILE_ERROR":
+                    with lock:
+                        if state["ref"] == reference:
+                            state["ref"] = None
+                            state["probed"] = False
+                            if cache is not None:
+                                cache.invalidate(digest)
+                    response = _upload(resolved)
+            else:
+                response = _upload(resolved)
+            response = self._check_resolved(chat_id, resolved, response)
+            if sink is None:
+                return chat_id, response
+            return SendRecord.from_response(chat_id, response, time.perf_counter() - started)
+
+        def _is_fatal(result: Any) -> bool:
+            return (result if sink is not None else result[1]).error_type in fatal
+
+        source = self._until_closed(chat_ids)
+        self._track_sink(sink)
+        try:
+            # گیرنده اول به تنهایی ارسال می‌شود تا شناسه فایل به دست بیاید
+            for first in source:
+                result = _send(first)
+                if sink is not None:
+                    sink.write(result)
+                yield result
+                if _is_fatal(result):
+                    return
+                break
+            for result in run_threaded(source, _send, max_workers, max_in_flight, ordered, _is_fatal):
+                if sink is not None:
+                    sink.write(result)
+                yield result
+        finally:
+            if sink is not None:
+                sink.flush()
 
     async def _send_document_fallback(
         self,
         chat_id: Union[int, str],
         file: Any,
         caption: Optional[str] = None,
-        filename: Optional[str] = None
-    ) -> Response:
+        filename: Optional[str] = None,
+        priority: Optional[str] = None,
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
         """Fallback method when sendDocument is not available (async)."""
         self._log(logging.INFO, "Using fallback method for file upload (async)")
         
@@ -727,15 +1488,16 @@ class Client:
         
         file_info += "\n\n❌ امکان ارسال فایل مستقیم وجود ندارد. لطفاً از روش‌های دیگر استفاده کنید."
         
-        return await self.send_message_async(chat_id, file_info)
+        return await self.send_message_async(chat_id, file_info, priority=priority, lean=lean)
 
     def _send_document_fallback_sync(
         self,
         chat_id: Union[int, str],
         file: Any,
         caption: Optional[str] = None,
-        filename: Optional[str] = None
-    ) -> Response:
+        filename: Optional[str] = None,
+        lean: bool = False,
+    ) -> Union[Response, LeanResult]:
         """Fallback method when sendDocument is not available (sync)."""
         self._log(logging.INFO, "Using fallback method for file upload (sync)")
         
@@ -746,18 +1508,173 @@ class Client:
         
         file_info += "\n\n❌ امکان ارسال فایل مستقیم وجود ندارد. لطفاً از روش‌های دیگر استفاده کنید."
         
-        return self.send_message(chat_id, file_info)
+        return self.send_message(chat_id, file_info, lean=lean)
 
     async def close(self) -> None:
-        """Close the aiohttp session."""
-        if self._session:
+        """Close the transport's sessions (aiohttp and the pooled requests session, if any)."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+        self._save_chat_ids()
+        try:
+            await self.transport.close_async()
+            self._log(logging.DEBUG, "Transport closed")
+        except Exception as e:
+            self._log(logging.ERROR, f"Failed to close transport: {e}")
+
+    def attach(self, component: Any) -> None:
+        """
+        Drain ``component`` as part of ``shutdown``.
+
+        The component needs an ``async drain(timeout)`` method returning a dict
+        with an ``abandoned`` count. AdmissionQueue and MessageScheduler attach
+        themselves.
+        """
+        self._attached.add(component)
+
+    def _track_sink(self, sink: Optional[ResultSink]) -> None:
+        """Flush ``sink`` as part of ``shutdown``."""
+        if sink is not None:
+            self._sinks.add(sink)
+
+    def _flush_sinks(self) -> None:
+        """Flush the bulk sinks and those of attached components, logging failures."""
+        sinks = set(self._sinks)
+        for component in list(self._attached):
+            if getattr(component, "sink", None) is not None:
+                sinks.add(component.sink)
+        for sink in sinks:
+            try:
+                sink.flush()
+            except Exception as e:
+                self._log(logging.ERROR, f"Failed to flush {type(sink).__name__}: {e}")
+
+    @property
+    def in_flight(self) -> int:
+        """Requests currently in flight or waiting for a dispatcher slot."""
+        return self._gate.in_flight
+
+    @property
+    def closing(self) -> bool:
+        """True once ``shutdown`` began; new requests are refused and bulk sends stop reading recipients."""
+        return self._gate.closed
+
+    def _until_closed(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Read a bulk source until shutdown begins (checked before every item)."""
+        source = iter(items)
+        while not self._gate.closed:
+            try:
+                item = next(source)
+            except StopIteration:
+                return
+            yield item
+        self._log(logging.WARNING, "Client is shutting down, remaining recipients are not read")
+
+    async def _until_closed_async(self, items: Union[Iterable[Any], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Async counterpart of ``_until_closed``."""
+        source = _aiter(items).__aiter__()
+        while not self._gate.closed:
+            try:
+                item = await source.__anext__()
+            except StopAsyncIteration:
+                return
+            yield item
+        self._log(logging.WARNING, "Client is shutting down, remaining recipients are not read")
+
+    async def shutdown(self, timeout: Optional[float] = None) -> ShutdownReport:
+        """
+        Stop taking work, let pending sends finish, then release all connections.
+
+        Attached queues and schedulers stop admitting and drain first; then new
+        requests are refused and the requests still in flight get the rest of
+        the deadline. Result sinks are flushed, profiling is stopped and the
+        transport is closed.
+        Entering ``with`` / ``async with`` again reopens the client.
+
+        :param timeout: Seconds to wait for pending sends (default: ``shutdown_timeout``)
+        :return: ShutdownReport with completed, abandoned and rejected counts
+        """
+        timeout = self.shutdown_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        completed_before = self._gate.completed
+        self._log(logging.INFO, f"Shutting down (timeout={timeout}s, in flight={self._gate.in_flight})")
+
+        async def _drain(component: Any) -> Dict[str, Any]:
             try:
-                await self._session.close()
-                self._log(logging.DEBUG, "aiohttp session closed")
+                return await component.drain(max(0.0, deadline - time.monotonic()))
             except Exception as e:
-                self._log(logging.ERROR, f"Failed to close aiohttp session: {e}")
-            finally:
-                self._session = None
+                self._log(logging.ERROR, f"Failed to drain {type(component).__name__}: {e}")
+                return {"component": type(component).__name__, "error": str(e), "abandoned": 0}
+
+        components = list(await asyncio.gather(*(_drain(c) for c in list(self._attached))))
+
+        self._gate.close()
+        while self._gate.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        in_flight = self._gate.in_flight
+
+        self._flush_sinks()
+        self._stop_profiler()
+        metrics = self.get_dispatch_metrics()
+        await self.close()
+
+        report = ShutdownReport(
+            completed=self._gate.completed - completed_before,
+            abandoned=in_flight + sum(c.get("abandoned", 0) for c in components),
+            rejected=self._gate.rejected,
+            timed_out=in_flight > 0 or time.monotonic() >= deadline,
+            duration=time.monotonic() - started,
+            components=components,
+            metrics=metrics,
+        )
+        level = logging.WARNING if report.abandoned else logging.INFO
+        self._log(level, f"Shutdown finished: {report.completed} completed, {report.abandoned} abandoned, "
+                         f"{report.rejected} rejected in {report.duration:.2f}s")
+        return report
+
+    def shutdown_sync(self, timeout: Optional[float] = None) -> Optional[ShutdownReport]:
+        """
+        Graceful shutdown for sync use (and ``with Client(...)``).
+
+        Runs ``shutdown`` in a private event loop, so the transport (including
+        the aiohttp session of a wrapped one) is closed with ``close_async``.
+        Inside a running event loop this cannot block, so ``shutdown`` is
+        scheduled as a task and None is returned.
+
+        :param timeout: Seconds to wait for pending sends (default: ``shutdown_timeout``)
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            loop.create_task(self.shutdown(timeout))
+            return None
+        try:
+            return asyncio.run(self.shutdown(timeout))
+        except Exception as e:
+            self._log(logging.ERROR, f"Failed to shut down: {e}")
+
+        timeout = self.shutdown_timeout if timeout is None else timeout
+        started = time.monotonic()
+        completed_before = self._gate.completed
+        self._gate.close()
+        while self._gate.in_flight and time.monotonic() - started < timeout:
+            time.sleep(0.01)
+        in_flight = self._gate.in_flight
+        self._flush_sinks()
+        self._stop_profiler()
+        metrics = self.get_dispatch_metrics()
+        self.close_sync()
+        return ShutdownReport(
+            completed=self._gate.completed - completed_before,
+            abandoned=in_flight,
+            rejected=self._gate.rejected,
+            timed_out=in_flight > 0,
+            duration=time.monotonic() - started,
+            metrics=metrics,
+        )
 
     def enable_logging(self, level: int = logging.INFO, log_file: Optional[str] = None) -> None:
         """Enable logging system dynamically."""
@@ -778,30 +1695,84 @@ class Client:
         """Get library signature information."""
         return LIBRARY_SIGNATURE.copy()
 
+    def get_dispatch_metrics(self) -> Dict[str, Any]:
+        """Get per-lane queue depth and wait-time metrics of the dispatcher."""
+        metrics = self.dispatcher.metrics() if self.dispatcher is not None else {}
+        if self.limiter is not None:
+            metrics["adaptive"] = self.limiter.metrics()
+        if self.ordered is not None:
+            metrics["ordered"] = self.ordered.metrics()
+        if self.endpoints is not None:
+            metrics["endpoints"] = self.endpoints.metrics()
+        if self.chat_ids is not None:
+            metrics["chat_ids"] = self.chat_ids.metrics()
+        return metrics
+
+    def start_profiling(
+        self,
+        cpu: bool = True,
+        memory: bool = False,
+        requests: Optional[int] = None,
+        duration: Optional[float] = None,
+        path: Optional[str] = None,
+        top: int = 30,
+    ) -> ClientProfiler:
+        """
+        Start profiling this client without restarting it.
+
+        Request time is attributed per API method and phase (build, network,
+        decode, parse); cProfile and tracemalloc cover the same window.
+
+        :param cpu: Run cProfile during the window (default: True)
+        :param memory: Record allocations with tracemalloc (default: False)
+        :param requests: Stop after this many requests (optional)
+        :param duration: Stop at the first request completing after this many seconds (optional)
+        :param path: File the JSON report (and .prof / .tracemalloc dumps) is written to (optional)
+        :param top: Entries in the CPU and memory top lists (default: 30)
+        :return: The running ClientProfiler; its ``report`` is set once the window ends
+        """
+        if self.profiler is not None:
+            raise RuntimeError("Profiling is already running")
+        return ClientProfiler(self, cpu, memory, requests, duration, path, top).start()
+
+    def _stop_profiler(self) -> None:
+        """End profiling during shutdown without failing it."""
+        if self.profiler is None:
+            return
+        try:
+            self.profiler.stop()
+        except RuntimeError as e:
+            self._log(logging.WARNING, f"Profiler not stopped: {e}")
+
+    def stop_profiling(self) -> Optional[Dict[str, Any]]:
+        """Stop the running profiler and return its report (None if none is running)."""
+        if self.profiler is None:
+            return None
+        return self.profiler.stop()
+
+    def _reopen(self) -> None:
+        """Admit requests again when a shut down client is reused as a context manager."""
+        if self._gate.closed:
+            self._gate.open()
+            self._log(logging.INFO, "Client reopened after shutdown")
+
     def __enter__(self):
+        self._reopen()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self._session:
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    loop.create_task(self.close())
-                else:
-                    loop.run_until_complete(self.close())
-            except Exception as e:
-                if self._enable_logging:
-                    logger.error(f"Failed to close session in __exit__: {e}")
+        self.shutdown_sync()
 
     async def __aenter__(self):
+        self._reopen()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         try:
-            await self.close()
+            await self.shutdown()
         except Exception as e:
             if self._enable_logging:
-                logger.error(f"Failed to close session in __aexit__: {e}")
+                logger.error(f"Failed to shut down in __aexit__: {e}")
 
 
 def about() -> None:
@@ -822,4 +1793,19 @@ def about() -> None:
 about()
 
 # Export اصلی‌های کتابخانه
-__all__ = ['Client', 'Response', 'User', 'Chat', 'Message', 'about', 'LIBRARY_SIGNATURE']
\ No newline at end of file
+__all__ = [
+    'Client', 'Response', 'User', 'Chat', 'Message', 'about', 'LIBRARY_SIGNATURE',
+    'LeanResult',
+    'MessageTemplate', 'rows_from_csv', 'rows_from_jsonl', 'run_bounded', 'run_threaded',
+    'Campaign', 'CampaignResult',
+    'PreparedDocument', 'FileReferenceCache',
+    'AdaptiveLimiter', 'TokenBucket',
+    'PriorityDispatcher', 'PRIORITY_URGENT', 'PRIORITY_NORMAL', 'PRIORITY_BULK',
+    'SendRecord', 'ResultSink', 'MemorySink', 'JSONLSink', 'CSVSink', 'SQLiteSink', 'open_sink',
+    'ProcessBroadcaster', 'BroadcastResult', 'MessageScheduler', 'OrderedDispatcher',
+    'Transport', 'TransportRequest', 'TransportResponse', 'TransportError', 'TransportTimeout',
+    'HTTPTransport', 'AiohttpTransport', 'RequestsTransport', 'MemoryTransport',
+    'RecordingTransport', 'ReplayTransport', 'EndpointPool', 'AdmissionQueue', 'QueuedSend',
+    'OutgoingRequest', 'OutgoingMessage', 'OutgoingDocument', 'ClientProfiler',
+    'ShutdownReport', 'SharedTokenBucket', 'ChatIdCache',
+]
\ No newline at end of file
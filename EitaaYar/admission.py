@@ -0,0 +1,364 @@
+"""
+Admission control in front of the async send path: a bounded queue with
+backpressure and load shedding.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque, List, NamedTuple, Callable, Union, TYPE_CHECKING
+
+from .dispatch import PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BULK
+from .sinks import SendRecord, ResultSink
+
+if TYPE_CHECKING:
+    from . import Client
+
+logger = logging.getLogger('eitaayar.admission')
+
+POLICY_BLOCK = "block"
+POLICY_REJECT_NEWEST = "reject_newest"
+POLICY_DROP_OLDEST = "drop_oldest"
+
+# از مهم‌ترین به کم‌اهمیت‌ترین
+_LANES = (PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_BULK)
+
+
+class QueuedSend(NamedTuple):
+    """A send waiting in the admission queue."""
+    priority: str
+    enqueued_at: float
+    deadline: Optional[float]
+    message: Dict[str, Any]
+
+
+class AdmissionQueue:
+    """
+    Bounded queue of pending sends drained by a fixed pool of workers.
+
+    At most ``maxsize`` sends wait in memory. When the queue is full,
+    ``policy`` decides what happens to a new send:
+
+    * ``block`` - ``put`` waits for space (backpressure on the producer)
+    * ``reject_newest`` - the new send is rejected
+    * ``drop_oldest`` - the oldest send of the least important lane not above
+      the new send's priority is dropped to make room
+
+    Sends still queued after ``max_wait`` seconds (or their own deadline) are
+    expired instead of sent. Workers take urgent sends first, then normal,
+    then bulk. Results go to ``sink`` / ``on_result`` instead of being kept,
+    and every shed send is counted and passed to ``on_shed``.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        maxsize: int = 1000,
+        workers: int = 10,
+        policy: str = POLICY_BLOCK,
+        max_wait: Optional[float] = None,
+        sink: Optional[ResultSink] = None,
+        on_result: Optional[Callable[[QueuedSend, Any], None]] = None,
+        on_shed: Optional[Callable[[QueuedSend, str], None]] = None,
+        **options: Any,
+    ) -> None:
+        """
+        :param client: Client used for sending
+        :param maxsize: Maximum number of queued sends (default: 1000)
+        :param workers: Number of concurrent senders (default: 10)
+        :param policy: block, reject_newest or drop_oldest (default: block)
+        :param max_wait: Seconds a send may wait in the queue before it expires (optional)
+        :param sink: ResultSink receiving a SendRecord per send (optional)
+        :param on_result: Callback ``on_result(queued_send, result)`` (optional)
+        :param on_shed: Callback ``on_shed(queued_send, reason)`` for rejected, dropped or expired sends (optional)
+        :param options: Extra ``send_message_async`` parameters (e.g. lean=True)
+        """
+        if maxsize < 1 or workers < 1:
+            raise ValueError("maxsize and workers must be at least 1")
+        if policy not in (POLICY_BLOCK, POLICY_REJECT_NEWEST, POLICY_DROP_OLDEST):
+            raise ValueError(f"Unknown admission policy: {policy}")
+        self.client = client
+        self.maxsize = maxsize
+        self.workers = workers
+        self.policy = policy
+        self.max_wait = max_wait
+        self.sink = sink
+        self.on_result = on_result
+        self.on_shed = on_shed
+        self.options = options
+
+        self._lanes: Dict[str, Deque[QueuedSend]] = {lane: deque() for lane in _LANES}
+        self._size = 0
+        self._in_flight = 0
+        self._putters: Deque[asyncio.Future] = deque()
+        self._getters: Deque[asyncio.Future] = deque()
+        self._tasks: List[asyncio.Task] = []
+        self._idle: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.admitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.expired = 0
+        self.max_depth = 0
+        if hasattr(client, "attach"):
+            client.attach(self)  # Client.shutdown صف را تخلیه می‌کند
+
+    def __len__(self) -> int:
+        return self._size
+
+    # -- queue internals ------------------------------------------------------
+
+    def _start(self) -> None:
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def _shed(self, item: QueuedSend, reason: str) -> None:
+        if reason == "rejected":
+            self.rejected += 1
+        elif reason == "dropped":
+            self.dropped += 1
+        else:
+            self.expired += 1
+        if self.on_shed is not None:
+            self.on_shed(item, reason)
+
+    @staticmethod
+    def _wake(waiters: Deque[asyncio.Future], value: Any = None) -> None:
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(value)
+                return
+
+    def _pop(self) -> QueuedSend:
+        for lane in _LANES:
+            if self._lanes[lane]:
+                self._size -= 1
+                self._wake(self._putters)
+                return self._lanes[lane].popleft()
+        raise IndexError("pop from an empty admission queue")
+
+    def _drop_victim(self, priority: str) -> Optional[QueuedSend]:
+        """Drop the oldest send of the least important lane not above ``priority``."""
+        rank = _LANES.index(priority)
+        for lane in reversed(_LANES[rank:]):
+            if self._lanes[lane]:
+                self._size -= 1
+                return self._lanes[lane].popleft()
+        return None
+
+    # -- producer API ---------------------------------------------------------
+
+    async def put(
+        self,
+        chat_id: Union[int, str],
+        text: str,
+        priority: str = PRIORITY_NORMAL,
+        deadline: Optional[float] = None,
+        **params: Any,
+    ) -> bool:
+        """
+        Queue a message for sending.
+
+        :param chat_id: Unique identifier for the target chat or username
+        :param text: Text of the message to be sent
+        :param priority: urgent, normal or bulk (default: normal)
+        :param deadline: Seconds from now after which the send expires (default: ``max_wait``)
+        :param params: Other ``send_message_async`` parameters
+        :return: True if the send was admitted, False if it was shed
+        """
+        if priority not in self._lanes:
+            raise ValueError(f"Unknown priority lane: {priority}")
+        self._start()
+        now = time.monotonic()
+        wait = deadline if deadline is not None else self.max_wait
+        message = {"chat_id": chat_id, "text": text}
+        message.update(params)
+        item = QueuedSend(priority, now, now + wait if wait is not None else None, message)
+
+        if self._closing:
+            self._shed(item, "rejected")
+            return False
+
+        while self._size >= self.maxsize:
+            self._expire(time.monotonic())
+            if self._size < self.maxsize:
+                break
+            if self.policy == POLICY_REJECT_NEWEST:
+                self._shed(item, "rejected")
+                return False
+            if self.policy == POLICY_DROP_OLDEST:
+                victim = self._drop_victim(priority)
+                if victim is None:
+                    self._shed(item, "rejected")
+                    return False
+                self._shed(victim, "dropped")
+                break
+            future = asyncio.get_running_loop().create_future()
+            self._putters.append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._wake(self._putters)  # جای خالی را به تولیدکننده بعدی بده
+                raise
+            if self._closing:
+                self._shed(item, "rejected")
+                return False
+
+        self._lanes[priority].append(item)
+        self._size += 1
+        self.admitted += 1
+        if self._size > self.max_depth:
+            self.max_depth = self._size
+        self._idle.clear()
+        self._wake(self._getters)
+        return True
+
+    def _expire(self, now: float) -> None:
+        """Shed expired sends at the front of every lane."""
+        for lane in _LANES:
+            queue = self._lanes[lane]
+            while queue and queue[0].deadline is not None and queue[0].deadline <= now:
+                self._size -= 1
+                self._shed(queue.popleft(), "expired")
+        self._wake(self._putters)
+
+    # -- workers --------------------------------------------------------------
+
+    async def _get(self) -> Optional[QueuedSend]:
+        while not self._size:
+            if self._closing:
+                return None
+            future = asyncio.get_running_loop().create_future()
+            self._getters.append(future)
+            await future
+        return self._pop()
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._get()
+            if item is None:
+                return
+            if item.deadline is not None and time.monotonic() > item.deadline:
+                self._shed(item, "expired")
+                self._check_idle()
+                continue
+
+            self._in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await self.client.send_message_async(
+                    priority=item.priority, **{**self.options, **item.message}
+                )
+            except Exception as e:
+                logger.error(f"Queued send to {item.message['chat_id']} raised: {e}")
+                result = self.client._error_response(f"Unexpected error: {e}", 500, self.options.get("lean", False))
+            finally:
+                self._in_flight -= 1
+
+            if result.ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            if self.sink is not None:
+                self.sink.write(SendRecord.from_response(item.message["chat_id"], result,
+                                                         time.perf_counter() - started))
+            if self.on_result is not None:
+                self.on_result(item, result)
+            self._check_idle()
+
+    def _check_idle(self) -> None:
+        if not self._size and not self._in_flight and self._idle is not None:
+            self._idle.set()
+
+    # -- lifecycle ------------------------------------------------------------
+
+    async def join(self) -> None:
+        """Wait until every admitted send has been sent or shed."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self, drain: bool = True) -> None:
+        """
+        Stop admitting sends and shut the workers down.
+
+        :param drain: Send everything still queued first; otherwise queued sends are shed as expired
+        """
+        self._closing = True
+        while self._putters:
+            self._wake(self._putters)
+        if not drain:
+            for lane in _LANES:
+                while self._lanes[lane]:
+                    self._size -= 1
+                    self._shed(self._lanes[lane].popleft(), "expired")
+        while self._getters:
+            self._wake(self._getters)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.sink is not None:
+            self.sink.flush()
+
+    async def drain(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Stop admitting, keep sending until the queue is empty or ``timeout``
+        passes, then shed what is left and close. Sends still in flight at the
+        deadline are cancelled. Called by ``Client.shutdown``.
+
+        :param timeout: Seconds to keep sending (default: no limit)
+        :return: Sends completed and abandoned during the drain
+        """
+        finished = self.sent + self.failed
+        lost = self.dropped + self.expired
+        self._closing = True
+        while self._putters:
+            self._wake(self._putters)
+        if self._idle is not None:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        cancelled = self._in_flight
+        if cancelled:
+            for task in self._tasks:
+                task.cancel()
+        await self.close(drain=False)
+        return {
+            "component": type(self).__name__,
+            "completed": self.sent + self.failed - finished,
+            "abandoned": self.dropped + self.expired - lost + cancelled,
+        }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth per lane and admission/shedding counters."""
+        return {
+            "depth": self._size,
+            "lanes": {lane: len(queue) for lane, queue in self._lanes.items()},
+            "in_flight": self._in_flight,
+            "max_depth": self.max_depth,
+            "admitted": self.admitted,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "expired": self.expired,
+            "shed": self.rejected + self.dropped + self.expired,
+        }
+
+
+__all__ = [
+    'AdmissionQueue', 'QueuedSend', 'POLICY_BLOCK', 'POLICY_REJECT_NEWEST', 'POLICY_DROP_OLDEST',
+]
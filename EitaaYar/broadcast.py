@@ -0,0 +1,362 @@
+"""
+Multi-process broadcasting: one event loop and Client session per core.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Optional, Dict, Any, Iterable, Iterator, List
+
+from .ratelimit import TokenBucket, SharedTokenBucket
+from .sinks import SendRecord, ResultSink
+from .templates import MessageTemplate
+
+logger = logging.getLogger('eitaayar.broadcast')
+
+# انواع پیام‌های فرایند کارگر به فرایند والد
+_RECORDS = "records"
+_DONE = "done"
+_FAILED = "failed"
+
+FATAL_ERRORS = ("INVALID_TOKEN",)
+
+
+def split_rate(rate: Optional[float], workers: int) -> List[Optional[float]]:
+    """Split a global requests-per-second budget evenly among workers."""
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if rate is None:
+        return [None] * workers
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    return [rate / workers] * workers
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to ``size`` items from an iterable."""
+    if size < 1:
+        raise ValueError("size must be at least 1")
+    source = iter(items)
+    while True:
+        batch = list(islice(source, size))
+        if not batch:
+            return
+        yield batch
+
+
+def merge_metrics(worker_metrics: List[Dict[str, Any]], elapsed: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Combine the final metrics reported by each worker.
+
+    :param worker_metrics: Metrics dicts sent by the workers
+    :param elapsed: Wall-clock duration of the whole broadcast (optional)
+    """
+    sent = sum(m.get("sent", 0) for m in worker_metrics)
+    failed = sum(m.get("failed", 0) for m in worker_metrics)
+    errors: Dict[str, int] = {}
+    for metrics in worker_metrics:
+        for error_type, count in metrics.get("errors", {}).items():
+            errors[error_type] = errors.get(error_type, 0) + count
+    if elapsed is None:
+        elapsed = max((m.get("elapsed", 0.0) for m in worker_metrics), default=0.0)
+    return {
+        "workers": len(worker_metrics),
+        "sent": sent,
+        "failed": failed,
+        "errors": errors,
+        "elapsed": elapsed,
+        "throughput": (sent + failed) / elapsed if elapsed else 0.0,
+        "rate_wait": sum(m.get("rate_wait", 0.0) for m in worker_metrics),
+        "per_worker": sorted(worker_metrics, key=lambda m: m.get("worker", 0)),
+    }
+
+
+class _QueueSink(ResultSink):
+    """Sink shipping record batches from a worker to the parent process."""
+
+    def __init__(self, worker_id: int, result_queue: Any, batch_size: int) -> None:
+        super().__init__(batch_size)
+        self.worker_id = worker_id
+        self.result_queue = result_queue
+        self.failed = 0
+        self.errors: Dict[str, int] = {}
+
+    def write(self, record: SendRecord) -> None:
+        if not record.ok:
+            self.failed += 1
+            error_type = record.error_type or "UNKNOWN"
+            self.errors[error_type] = self.errors.get(error_type, 0) + 1
+        super().write(record)
+
+    def _write_batch(self, records: List[SendRecord]) -> None:
+        self.result_queue.put((_RECORDS, self.worker_id, [tuple(r) for r in records]))
+
+
+async def _worker_loop(worker_id: int, settings: Dict[str, Any], work_queue: Any, result_queue: Any) -> None:
+    from . import Client
+
+    loop = asyncio.get_running_loop()
+    rate = settings["rates"][worker_id]
+    if settings["rate_file"] and rate:
+        # بودجه مشترک؛ کارگر پرکارتر سهم بیشتری می‌گیرد
+        total = settings["rate"]
+        rate_limiter = SharedTokenBucket(settings["rate_file"], total, burst=max(1, int(total)))
+    else:
+        rate_limiter = TokenBucket(rate, burst=max(1, int(rate))) if rate else None
+    sink = _QueueSink(worker_id, result_queue, settings["result_batch"])
+    started = time.monotonic()
+
+    async def rows():
+        while True:
+            batch = await loop.run_in_executor(None, work_queue.get)
+            if batch is None:
+                return
+            for row in batch:
+                yield row
+
+    async with Client(settings["token"], rate_limiter=rate_limiter, **settings["client_options"]) as client:
+        async for record in client.send_message_many_async(
+            rows(), text=settings["text"], template=settings["template"],
+            concurrency=settings["concurrency"], sink=sink, **settings["options"]
+        ):
+            if record.error_type in FATAL_ERRORS:
+                break
+        dispatch = client.get_dispatch_metrics()
+    sink.close()
+
+    result_queue.put((_DONE, worker_id, {
+        "worker": worker_id,
+        "pid": os.getpid(),
+        "sent": sink.written - sink.failed,
+        "failed": sink.failed,
+        "errors": sink.errors,
+        "elapsed": time.monotonic() - started,
+        "rate": rate,
+        "rate_wait": rate_limiter.total_wait if rate_limiter is not None else 0.0,
+        "dispatch": dispatch,
+    }))
+
+
+def _worker_main(worker_id: int, settings: Dict[str, Any], work_queue: Any, result_queue: Any) -> None:
+    """Entry point of a broadcast worker process."""
+    try:
+        asyncio.run(_worker_loop(worker_id, settings, work_queue, result_queue))
+    except BaseException as e:  # noqa: B902 - گزارش هر خطا به والد
+        result_queue.put((_FAILED, worker_id, f"{type(e).__name__}: {e}"))
+
+
+@dataclass
+class BroadcastResult:
+    """Summary of a multi-process broadcast."""
+    sent: int = 0
+    failed: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+    aborted: bool = False
+    worker_errors: Dict[int, str] = field(default_factory=dict)
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Sends per second over the whole run."""
+        return (self.sent + self.failed) / self.elapsed if self.elapsed else 0.0
+
+
+class ProcessBroadcaster:
+    """
+    Broadcast a message to a recipient stream from several worker processes.
+
+    The parent reads the recipients lazily and hands them out in batches over a
+    bounded queue, so faster workers simply take more batches. Each worker runs
+    its own event loop and ``Client`` session, renders templates and parses
+    responses locally (lean mode by default) and honours its share of the
+    global ``rate``. Compact ``SendRecord`` batches and final per-worker metrics
+    flow back to the parent.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        recipients: Iterable[Any],
+        text: Optional[str] = None,
+        template: Optional[MessageTemplate] = None,
+        workers: Optional[int] = None,
+        concurrency: int = 20,
+        rate: Optional[float] = None,
+        batch_size: int = 200,
+        sink: Optional[ResultSink] = None,
+        client_options: Optional[Dict[str, Any]] = None,
+        mp_context: Any = None,
+        rate_file: Optional[str] = None,
+        **options: Any,
+    ) -> None:
+        """
+        :param token: API token used by every worker
+        :param recipients: Chat ids (with ``text``) or variable rows (with ``template``)
+        :param text: Same text for every recipient (optional)
+        :param template: MessageTemplate rendered in the workers (optional)
+        :param workers: Number of worker processes (default: CPU count)
+        :param concurrency: In-flight requests per worker (default: 20)
+        :param rate: Global requests per second, split evenly among workers (optional)
+        :param batch_size: Recipients handed to a worker at a time (default: 200)
+        :param sink: ResultSink receiving every SendRecord in the parent (optional)
+        :param client_options: Extra ``Client`` arguments, e.g. base_url or timeout (optional)
+        :param mp_context: multiprocessing context (default: the platform default)
+        :param rate_file: Share ``rate`` through a SharedTokenBucket on this file instead of
+                          splitting it evenly; also shared with other processes using the file (optional)
+        :param options: Extra ``send_message_async`` parameters; ``lean`` defaults to True
+        """
+        if (text is None) == (template is None):
+            raise ValueError("Exactly one of text or template must be given")
+        self.token = token
+        self.recipients = recipients
+        self.text = text
+        self.template = template
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.rate = rate
+        self.batch_size = batch_size
+        self.sink = sink
+        self.client_options = dict(client_options or {})
+        self.mp_context = mp_context or multiprocessing.get_context()
+        self.rate_file = rate_file
+        options.setdefault("lean", True)
+        self.options = options
+        self.result = BroadcastResult()
+        self._feed_error: Optional[BaseException] = None
+
+    def _settings(self) -> Dict[str, Any]:
+        return {
+            "token": self.token,
+            "text": self.text,
+            "template": self.template,
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "rate_file": self.rate_file,
+            "rates": split_rate(self.rate, self.workers),
+            "result_batch": max(1, self.batch_size // 2),
+            "client_options": self.client_options,
+            "options": self.options,
+        }
+
+    def _feed(self, work_queue: Any, stop: threading.Event, processes: List[Any]) -> None:
+        """Push recipient batches to the workers, then one stop marker per worker."""
+
+        def put(item: Any) -> bool:
+            while any(p.is_alive() for p in processes):
+                try:
+                    work_queue.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    if stop.is_set() and item is not None:
+                        return False
+            return False
+
+        try:
+            rows = (dict(row) if hasattr(row, "keys") else row for row in self.recipients)
+            for batch in batched(rows, self.batch_size):
+                if stop.is_set() or not put(batch):
+                    break
+        except BaseException as e:
+            self._feed_error = e
+            stop.set()
+        finally:
+            for _ in processes:
+                put(None)
+
+    def iter_results(self) -> Iterator[SendRecord]:
+        """
+        Run the broadcast and yield a SendRecord per send as results arrive.
+
+        Stopping the iteration early terminates the workers.
+        """
+        result = self.result = BroadcastResult()
+        ctx = self.mp_context
+        work_queue = ctx.Queue(maxsize=2 * self.workers)
+        result_queue = ctx.Queue()
+        settings = self._settings()
+        processes = [
+            ctx.Process(target=_worker_main, args=(i, settings, work_queue, result_queue),
+                        name=f"eitaayar-broadcast-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        started = time.monotonic()
+        for process in processes:
+            process.start()
+
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(work_queue, stop, processes),
+                                  name="eitaayar-broadcast-feeder", daemon=True)
+        feeder.start()
+        logger.info(f"Broadcast started with {self.workers} workers")
+
+        running = set(range(self.workers))
+        worker_metrics: List[Dict[str, Any]] = []
+        completed = False
+        try:
+            while running:
+                try:
+                    kind, worker_id, payload = result_queue.get(timeout=0.5)
+                except queue.Empty:
+                    for worker_id in list(running):
+                        if not processes[worker_id].is_alive():
+                            running.discard(worker_id)
+                            result.worker_errors[worker_id] = f"exited with code {processes[worker_id].exitcode}"
+                    continue
+
+                if kind == _RECORDS:
+                    for values in payload:
+                        record = SendRecord(*values)
+                        if record.ok:
+                            result.sent += 1
+                        else:
+                            result.failed += 1
+                            error_type = record.error_type or "UNKNOWN"
+                            result.errors[error_type] = result.errors.get(error_type, 0) + 1
+                            if error_type in FATAL_ERRORS and not stop.is_set():
+                                logger.error("Invalid token, stopping broadcast")
+                                result.aborted = True
+                                stop.set()
+                        if self.sink is not None:
+                            self.sink.write(record)
+                        yield record
+                elif kind == _DONE:
+                    running.discard(worker_id)
+                    worker_metrics.append(payload)
+                else:
+                    running.discard(worker_id)
+                    result.worker_errors[worker_id] = payload
+            completed = True
+        finally:
+            stop.set()
+            for process in processes:
+                if not completed:
+                    process.terminate()
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            feeder.join(timeout=5)
+            if self.sink is not None:
+                self.sink.flush()
+            result.elapsed = time.monotonic() - started
+            result.metrics = merge_metrics(worker_metrics, result.elapsed)
+            if result.worker_errors:
+                logger.error(f"Broadcast workers failed: {result.worker_errors}")
+
+        if self._feed_error is not None:
+            raise self._feed_error
+
+    def run(self) -> BroadcastResult:
+        """Run the broadcast to completion and return its summary."""
+        for _ in self.iter_results():
+            pass
+        return self.result
+
+
+__all__ = ['ProcessBroadcaster', 'BroadcastResult', 'split_rate', 'batched', 'merge_metrics']
@@ -0,0 +1,131 @@
+"""
+Bounded-concurrency helpers for bulk sends (asyncio and thread pool).
+"""
+
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger('eitaayar.bulk')
+
+
+async def _aiter(items: Union[Iterable[Any], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+    """Iterate sync and async iterables the same way."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:  # type: ignore[union-attr]
+            yield item
+    else:
+        for item in items:  # type: ignore[union-attr]
+            yield item
+
+
+async def run_bounded(
+    items: Union[Iterable[Any], AsyncIterator[Any]],
+    worker: Callable[[Any], Awaitable[Any]],
+    concurrency: int = 10,
+) -> AsyncIterator[Any]:
+    """
+    Run ``worker`` over ``items`` with at most ``concurrency`` calls in flight.
+
+    Items are pulled from the source only when a slot is free, so generators,
+    file readers and DB cursors are never materialized. Results are yielded in
+    completion order.
+
+    :param items: Sync or async iterable of work items
+    :param worker: Coroutine function called once per item
+    :param concurrency: Maximum number of in-flight calls (default: 10)
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    source = _aiter(items).__aiter__()
+    pending = set()
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = await source.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(worker(item)))
+
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def run_threaded(
+    items: Iterable[Any],
+    worker: Callable[[Any], Any],
+    max_workers: int = 10,
+    max_in_flight: Optional[int] = None,
+    ordered: bool = False,
+    should_stop: Optional[Callable[[Any], bool]] = None,
+) -> Iterator[Any]:
+    """
+    Run ``worker`` over ``items`` on a managed thread pool.
+
+    At most ``max_in_flight`` items are submitted at a time, pulled lazily from
+    the source. When ``should_stop(result)`` returns True, or the consumer stops
+    iterating, queued work is cancelled and no further items are read.
+
+    :param items: Iterable of work items
+    :param worker: Function called once per item in a worker thread
+    :param max_workers: Number of worker threads (default: 10)
+    :param max_in_flight: Maximum submitted but unfinished items (default: 2 * max_workers)
+    :param ordered: Yield results in input order instead of completion order (default: False)
+    :param should_stop: Predicate on a result that aborts the remaining work (optional)
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    limit = max(1, max_in_flight or 2 * max_workers)
+    source = iter(items)
+    pending: "deque[Future]" = deque()
+    exhausted = False
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eitaayar")
+
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                try:
+                    item = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append(executor.submit(worker, item))
+
+            if not pending:
+                return
+
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [f for f in pending if f in finished]
+                for future in done:
+                    pending.remove(future)
+
+            for future in done:
+                result = future.result()
+                yield result
+                if should_stop is not None and should_stop(result):
+                    logger.error("Fatal result received, cancelling remaining bulk work")
+                    return
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+__all__ = ['run_bounded', 'run_threaded']
@@ -0,0 +1,319 @@
+"""
+Resumable, checkpointed bulk campaigns streamed from files or iterators.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Union, Iterable, Iterator, Tuple, Set, TYPE_CHECKING
+
+from .bulk import run_bounded
+from .dispatch import PRIORITY_BULK
+from .sinks import ResultSink, SendRecord
+from .templates import MessageTemplate
+
+if TYPE_CHECKING:
+    from . import Client
+
+logger = logging.getLogger('eitaayar.campaign')
+
+# هر رکورد ورودی: (شماره ردیف، آفست بایتی بعد از ردیف، داده ردیف)
+_Record = Tuple[int, Optional[int], Any]
+
+# خطاهایی که یعنی API پاسخی نداده است؛ ردیف در اجرای بعدی دوباره ارسال می‌شود
+UNACKNOWLEDGED_ERRORS = ("TIMEOUT", "NETWORK_ERROR", "CLIENT_CLOSED")
+
+
+@dataclass
+class CampaignResult:
+    """Summary of a campaign run."""
+    sent: int = 0
+    failed: int = 0
+    unacknowledged: int = 0
+    skipped: int = 0
+    resumed_from_row: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def processed(self) -> int:
+        """Number of rows the API answered in this run (sent or failed)."""
+        return self.sent + self.failed
+
+    def __str__(self) -> str:
+        return (f"Campaign(sent={self.sent}, failed={self.failed}, unacknowledged={self.unacknowledged}, "
+                f"skipped={self.skipped}, resumed_from_row={self.resumed_from_row})")
+
+
+def _read_lines(fh: io.BufferedReader, encoding: str, position: Dict[str, int]) -> Iterator[str]:
+    """Yield decoded lines while tracking the byte offset after each one."""
+    while True:
+        line = fh.readline()
+        if not line:
+            return
+        position["offset"] = fh.tell()
+        yield line.decode(encoding)
+
+
+def _iter_jsonl(path: str, start_row: int, start_offset: Optional[int], encoding: str) -> Iterator[_Record]:
+    position = {"offset": 0}
+    with open(path, "rb") as fh:
+        row_number = 0
+        if start_offset:
+            fh.seek(start_offset)
+            row_number = start_row
+        for line in _read_lines(fh, encoding, position):
+            if not line.strip():
+                continue
+            if row_number >= start_row:
+                yield row_number, position["offset"], json.loads(line)
+            row_number += 1
+
+
+def _iter_csv(path: str, start_row: int, start_offset: Optional[int], encoding: str,
+              reader_options: Dict[str, Any]) -> Iterator[_Record]:
+    position = {"offset": 0}
+    with open(path, "rb") as fh:
+        lines = _read_lines(fh, encoding, position)
+        header = next(csv.reader(lines, **reader_options), None)
+        if header is None:
+            return
+        row_number = 0
+        if start_offset:
+            fh.seek(start_offset)
+            row_number = start_row
+        # csv.reader فقط به اندازه یک ردیف خط مصرف می‌کند، پس آفست دقیق است
+        for values in csv.reader(lines, **reader_options):
+            if not values:
+                continue
+            if row_number >= start_row:
+                yield row_number, position["offset"], dict(zip(header, values))
+            row_number += 1
+
+
+def _iter_source(source: Iterable[Any], start_row: int) -> Iterator[_Record]:
+    for row_number, row in enumerate(source):
+        if row_number >= start_row:
+            yield row_number, None, row
+
+
+class Campaign:
+    """
+    Stream recipients through a client with bounded concurrency and checkpoints.
+
+    A row is acknowledged once the API answered it, successfully or with an
+    API error. Rows that got no answer (transport failure, timeout or a
+    refusal during client shutdown) stay pending and are sent again when the
+    campaign is resumed.
+
+    Progress is saved to ``checkpoint_path`` every ``checkpoint_every``
+    acknowledgements and when ``run()`` ends or raises. Running the same
+    campaign again resumes after the last contiguous acknowledged row and
+    skips rows acknowledged beyond it. After a hard crash (the process is
+    killed) the acknowledgements since the last checkpoint are lost and those
+    rows are sent again; lower ``checkpoint_every`` to narrow that window.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        source: Union[str, Iterable[Any]],
+        text: Optional[str] = None,
+        template: Optional[MessageTemplate] = None,
+        checkpoint_path: Optional[str] = None,
+        concurrency: int = 10,
+        checkpoint_every: int = 1000,
+        chat_id_field: str = "chat_id",
+        source_format: Optional[str] = None,
+        encoding: str = "utf-8",
+        csv_options: Optional[Dict[str, Any]] = None,
+        sink: Optional[ResultSink] = None,
+        **options: Any,
+    ) -> None:
+        """
+        :param client: Client used for sending
+        :param source: Path to a CSV/JSONL file or an iterable of rows/chat ids
+        :param text: Same text for every recipient (optional)
+        :param template: MessageTemplate rendered per row (optional)
+        :param checkpoint_path: File used to persist progress (optional)
+        :param concurrency: Maximum number of in-flight requests (default: 10)
+        :param checkpoint_every: Completed sends between checkpoints (default: 1000)
+        :param chat_id_field: Row key holding the chat id when ``text`` is used (default: chat_id)
+        :param source_format: "csv" or "jsonl"; guessed from the file extension if omitted
+        :param encoding: Source file encoding (default: utf-8)
+        :param csv_options: Extra ``csv.reader`` options such as delimiter (optional)
+        :param sink: ResultSink receiving a SendRecord per send (optional)
+        :param options: Extra ``send_message_async`` parameters; ``priority`` defaults to bulk
+        """
+        if (text is None) == (template is None):
+            raise ValueError("Exactly one of text or template must be given")
+        if isinstance(source, str) and source_format is None:
+            source_format = "csv" if source.lower().endswith(".csv") else "jsonl"
+        if source_format not in (None, "csv", "jsonl"):
+            raise ValueError(f"Unsupported source format: {source_format}")
+
+        self.client = client
+        self.source = source
+        self.text = text
+        self.template = template
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = concurrency
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.chat_id_field = chat_id_field
+        self.source_format = source_format
+        self.encoding = encoding
+        self.csv_options = csv_options or {}
+        self.sink = sink
+        self.options = {"priority": PRIORITY_BULK, **options}
+
+        # وضعیت پیشرفت: ردیف‌های تمام‌شده بالای واترمارک و ردیف‌های در حال ارسال
+        self._watermark_row = 0
+        self._watermark_offset: Optional[int] = None
+        self._done: Set[int] = set()
+        self._offsets: Dict[int, Optional[int]] = {}
+        self._in_flight: Dict[int, Any] = {}
+        self._since_checkpoint = 0
+
+    # -- checkpoint ---------------------------------------------------------
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Load the saved checkpoint, if any."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return None
+
+    def save_checkpoint(self, finished: bool = False) -> None:
+        """Atomically write the current progress to ``checkpoint_path``."""
+        if not self.checkpoint_path:
+            return
+        if self.sink is not None:
+            # نتایج قبل از checkpoint روی دیسک باشند
+            self.sink.flush()
+        state = {
+            "row": self._watermark_row,
+            "offset": self._watermark_offset,
+            "done": sorted(self._done),
+            "in_flight": [str(chat_id) for chat_id in self._in_flight.values()],
+            "finished": finished,
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+
+    def _mark_done(self, row_number: int) -> None:
+        self._in_flight.pop(row_number, None)
+        self._done.add(row_number)
+        # جلو بردن واترمارک تا اولین ردیف ناتمام
+        while self._watermark_row in self._done:
+            self._done.discard(self._watermark_row)
+            self._watermark_offset = self._offsets.pop(self._watermark_row, None)
+            self._watermark_row += 1
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.save_checkpoint()
+
+    # -- sending ------------------------------------------------------------
+
+    def _records(self) -> Iterator[_Record]:
+        start_row, start_offset = self._watermark_row, self._watermark_offset
+        if self.source_format == "csv":
+            return _iter_csv(self.source, start_row, start_offset, self.encoding, self.csv_options)
+        if self.source_format == "jsonl":
+            return _iter_jsonl(self.source, start_row, start_offset, self.encoding)
+        return _iter_source(self.source, start_row)
+
+    def _message(self, row: Any) -> Dict[str, Any]:
+        if self.template is not None:
+            return self.template.render(row)
+        chat_id = row[self.chat_id_field] if isinstance(row, dict) else row
+        return {"chat_id": chat_id, "text": self.text}
+
+    async def run(self) -> CampaignResult:
+        """
+        Run (or resume) the campaign until the source is exhausted.
+
+        API errors are counted as failed and acknowledged; rows without an API
+        answer (``UNACKNOWLEDGED_ERRORS``) are counted as unacknowledged and left
+        for the next run. Both are broken down in ``CampaignResult.errors``. The
+        final checkpoint is marked finished only when nothing is left pending.
+        Once the client starts shutting down no further rows are read.
+
+        :return: CampaignResult with counters for this run
+        """
+        result = CampaignResult()
+        self.client._track_sink(self.sink)
+        checkpoint = self.load_checkpoint()
+        skip: Set[int] = set()
+        if checkpoint:
+            self._watermark_row = checkpoint.get("row", 0)
+            self._watermark_offset = checkpoint.get("offset")
+            skip = set(checkpoint.get("done", []))
+            result.resumed_from_row = self._watermark_row
+            logger.info(f"Resuming campaign from row {self._watermark_row}")
+
+        halted = False
+
+        def _pending() -> Iterator[_Record]:
+            nonlocal halted
+            for record in self._records():
+                if self.client.closing:
+                    # ردیف‌های خوانده‌نشده در اجرای بعدی ارسال می‌شوند
+                    logger.warning("Client is shutting down, stopping the campaign")
+                    halted = True
+                    return
+                row_number = record[0]
+                self._offsets[row_number] = record[1]
+                if row_number in skip:
+                    result.skipped += 1
+                    self._mark_done(row_number)
+                    continue
+                yield record
+
+        async def _send(record: _Record) -> Tuple[int, Any]:
+            row_number, _offset, row = record
+            message = self._message(row)
+            self._in_flight[row_number] = message["chat_id"]
+            started = time.perf_counter()
+            response = await self.client.send_message_async(**{**self.options, **message})
+            if self.sink is not None:
+                self.sink.write(SendRecord.from_response(
+                    message["chat_id"], response, time.perf_counter() - started))
+            return row_number, response
+
+        try:
+            async for row_number, response in run_bounded(_pending(), _send, self.concurrency):
+                if response.ok:
+                    result.sent += 1
+                    self._mark_done(row_number)
+                    continue
+                error_type = response.error_type or "UNKNOWN"
+                result.errors[error_type] = result.errors.get(error_type, 0) + 1
+                if error_type in UNACKNOWLEDGED_ERRORS:
+                    # ردیف در in_flight می‌ماند و واترمارک از آن جلوتر نمی‌رود
+                    result.unacknowledged += 1
+                    continue
+                result.failed += 1
+                self._mark_done(row_number)
+        except BaseException:
+            self.save_checkpoint()
+            raise
+
+        if self.sink is not None:
+            self.sink.flush()
+        self.save_checkpoint(finished=not halted and not self._in_flight)
+        if self._in_flight:
+            logger.warning(f"{len(self._in_flight)} rows got no API answer and will be sent on resume")
+        return result
+
+
+__all__ = ['Campaign', 'CampaignResult', 'UNACKNOWLEDGED_ERRORS']
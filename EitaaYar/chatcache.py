@@ -0,0 +1,162 @@
+"""
+Username to numeric chat id resolution learned from API responses.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Union
+
+logger = logging.getLogger('eitaayar.chatcache')
+
+
+def normalize_username(username: str) -> str:
+    """Cache key of a username: without the leading ``@``, lower case."""
+    return username.strip().lstrip("@").lower()
+
+
+class ChatIdCache:
+    """
+    Username to chat-id cache with LRU eviction and an optional TTL.
+
+    ``Client`` fills it from the ``chat`` object of every successful reply and
+    rewrites later sends to a known ``@username`` to the numeric id. When
+    ``path`` is given, entries are loaded on creation and saved every
+    ``save_every`` changes (and by ``Client.close``), so they survive restarts.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000,
+                 ttl: Optional[float] = 86400.0, save_every: int = 100) -> None:
+        """
+        :param path: JSON file used to persist the cache (optional)
+        :param max_entries: Maximum number of cached usernames (default: 10000)
+        :param ttl: Seconds after which a learned id is looked up again (default: one day)
+        :param save_every: Changes between automatic saves when ``path`` is set (default: 100)
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.save_every = max(1, save_every)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._changes = 0
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        if path:
+            self.load()
+
+    def get(self, username: str) -> Optional[int]:
+        """Return the cached chat id of a username, if still valid."""
+        key = normalize_username(username)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry["updated"] > self.ttl:
+                del self._entries[key]
+                self._changes += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["id"]
+
+    def put(self, username: str, chat_id: int) -> None:
+        """Store a mapping, evicting the least recently used entries."""
+        key = normalize_username(username)
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["id"] == chat_id and time.time() - entry["updated"] < 60:
+                # همان نگاشت تازه یاد گرفته شده؛ فقط ترتیب LRU به‌روز می‌شود
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = {"id": chat_id, "updated": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.learned += 1
+            self._changes += 1
+            due = self.path and self._changes >= self.save_every
+        if due:
+            self.save()
+
+    def invalidate(self, username: str) -> None:
+        """Forget a username (e.g. after a send to its cached id failed)."""
+        with self._lock:
+            if self._entries.pop(normalize_username(username), None) is not None:
+                self._changes += 1
+
+    def learn(self, result: Any) -> None:
+        """
+        Learn from the ``result`` object of a successful API response.
+
+        :param result: Raw result; a message with a ``chat`` having ``id`` and ``username``
+        """
+        if not isinstance(result, dict):
+            return
+        chat = result.get("chat")
+        if isinstance(chat, dict):
+            chat_id = chat.get("id")
+            username = chat.get("username")
+            if username and isinstance(chat_id, int) and not isinstance(chat_id, bool):
+                self.put(username, chat_id)
+
+    def resolve(self, chat_id: Union[int, str]) -> Union[int, str]:
+        """Return the numeric id for a cached ``@username``, otherwise ``chat_id`` unchanged."""
+        if not isinstance(chat_id, str) or chat_id.lstrip("-").isdigit():
+            return chat_id
+        resolved = self.get(chat_id)
+        return chat_id if resolved is None else resolved
+
+    def load(self) -> None:
+        """Load entries from ``path``, ignoring a missing or corrupt file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                entries = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable chat id cache {self.path}: {e}")
+            return
+        with self._lock:
+            # ترتیب فایل همان ترتیب LRU است (قدیمی‌ترین اول)
+            self._entries = OrderedDict(entries)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Atomically write entries to ``path``."""
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+            self._changes = 0
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(snapshot, fh, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Size and hit/miss counters."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "learned": self.learned,
+        }
+
+    def __contains__(self, username: str) -> bool:
+        return normalize_username(username) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = ['ChatIdCache', 'normalize_username']
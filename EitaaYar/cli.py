@@ -0,0 +1,284 @@
+"""
+Command-line bulk sender.
+
+    python -m EitaaYar --token TOKEN --recipients users.csv --template "سلام {name}"
+    eitaayar --recipients ids.txt --document report.pdf --caption "گزارش" --rate 30
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Optional, Dict, Any, Iterator, List, Sequence
+
+from . import Client, MessageTemplate, OutgoingMessage, SendRecord, TokenBucket, rows_from_csv, rows_from_jsonl, open_sink
+from .bulk import run_bounded
+from .documents import FileReferenceCache
+
+RETRYABLE_ERRORS = ("TIMEOUT", "NETWORK_ERROR")
+FATAL_ERRORS = ("INVALID_TOKEN",)
+BAD_ROW = "BAD_ROW"
+
+
+def _coerce_chat_id(value: Any) -> Any:
+    """Turn numeric strings from CSV/TXT files into integers."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.lstrip("-").isdigit():
+            return int(value)
+    return value
+
+
+def _check_row_chat_id(chat_id: Any) -> Any:
+    """Reject a row whose chat id column is missing or blank."""
+    if chat_id is None or (isinstance(chat_id, str) and not chat_id.strip()):
+        raise ValueError("missing chat id")
+    return chat_id
+
+
+def _bad_row(chat_id: Any) -> SendRecord:
+    """Failed record for a row that could not be turned into a send."""
+    return SendRecord(chat_id=chat_id if chat_id is not None else "", ok=False, error_type=BAD_ROW)
+
+
+def _rows_from_txt(path: str, chat_id_field: str, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    with open(path, encoding=encoding) as fh:
+        for line in fh:
+            if line.strip():
+                yield {chat_id_field: line.strip()}
+
+
+def read_recipients(path: str, chat_id_field: str = "chat_id") -> Iterator[Dict[str, Any]]:
+    """
+    Lazily read recipient rows from a CSV, JSONL or plain text file (one id per line).
+
+    :param path: Recipients file
+    :param chat_id_field: Row key holding the chat id (default: chat_id)
+    """
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        rows = rows_from_csv(path)
+    elif lowered.endswith((".jsonl", ".ndjson", ".json")):
+        rows = rows_from_jsonl(path)
+    else:
+        rows = _rows_from_txt(path, chat_id_field)
+    for row in rows:
+        row[chat_id_field] = _coerce_chat_id(row.get(chat_id_field))
+        yield row
+
+
+def count_recipients(path: str) -> int:
+    """Count data lines of a recipients file (used for the ETA estimate)."""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(0, lines - 1) if path.lower().endswith(".csv") else lines
+
+
+class Progress:
+    """Live progress line: throughput, error breakdown and ETA."""
+
+    def __init__(self, total: Optional[int] = None, stream: Any = None, interval: float = 0.5) -> None:
+        self.total = total
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.ok = 0
+        self.failed = 0
+        self.errors: Dict[str, int] = {}
+        self.started = time.monotonic()
+        self._last_render = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.ok + self.failed
+
+    def update(self, record: SendRecord) -> None:
+        if record.ok:
+            self.ok += 1
+        else:
+            self.failed += 1
+            error_type = record.error_type or "UNKNOWN"
+            self.errors[error_type] = self.errors.get(error_type, 0) + 1
+        now = time.monotonic()
+        if now - self._last_render >= self.interval:
+            self._last_render = now
+            self.render()
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.done / elapsed
+        parts = [f"{self.done:,}" + (f"/{self.total:,}" if self.total else ""),
+                 f"{rate:,.1f} msg/s", f"ok {self.ok:,}"]
+        if self.errors:
+            parts.append(" ".join(f"{k} {v:,}" for k, v in sorted(self.errors.items())))
+        if self.total and rate > 0:
+            remaining = max(0, self.total - self.done) / rate
+            parts.append("ETA " + time.strftime("%H:%M:%S", time.gmtime(remaining)))
+        return " | ".join(parts)
+
+    def render(self, final: bool = False) -> None:
+        self.stream.write("\r\033[K" + self.line() + ("\n" if final else ""))
+        self.stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="eitaayar",
+        description="Bulk-send EitaaYar messages or documents from a CSV/JSONL/TXT recipients file.",
+    )
+    parser.add_argument("--token", default=os.environ.get("EITAAYAR_TOKEN"),
+                        help="API token (default: $EITAAYAR_TOKEN)")
+    parser.add_argument("--base-url", default="https://eitaayar.ir/api", help="API base URL")
+    parser.add_argument("--recipients", required=True, help="CSV, JSONL or TXT (one chat id per line)")
+    parser.add_argument("--chat-id-field", default="chat_id", help="Column holding the chat id")
+
+    content = parser.add_mutually_exclusive_group(required=True)
+    content.add_argument("--text", help="Same text for every recipient")
+    content.add_argument("--template", help="Text template with {column} placeholders")
+    content.add_argument("--document", help="File to send to every recipient")
+    parser.add_argument("--title", help="Message title (may contain placeholders with --template)")
+    parser.add_argument("--caption", help="Document caption")
+    parser.add_argument("--silent", action="store_true", help="Send without notification")
+
+    parser.add_argument("--concurrency", type=int, default=20, help="In-flight requests (default: 20)")
+    parser.add_argument("--rate", type=float, help="Maximum requests per second")
+    parser.add_argument("--retries", type=int, default=2, help="Retries for TIMEOUT/NETWORK_ERROR (default: 2)")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout in seconds (default: 30)")
+    parser.add_argument("--output", help="Result sink: .jsonl, .csv or .db")
+    parser.add_argument("--file-cache", help="Persistent file reference cache for --document")
+    parser.add_argument("--no-count", action="store_true", help="Do not pre-count recipients (no ETA)")
+    return parser
+
+
+async def _send_messages(client: Client, args: argparse.Namespace, progress: Progress, sink: Any) -> bool:
+    silent = 1 if args.silent else None
+    template = None
+    prebuilt = None
+    if args.template is not None:
+        template = MessageTemplate(args.template, title=args.title, chat_id_field=args.chat_id_field)
+    else:
+        # متن ثابت یک بار کدگذاری می‌شود و در تلاش‌های مجدد هم همان بایت‌ها فرستاده می‌شود
+        prebuilt = OutgoingMessage(0, args.text, title=args.title, disable_notification=silent)
+    aborted = False
+
+    async def _send(row: Dict[str, Any]) -> SendRecord:
+        chat_id = row.get(args.chat_id_field)
+        try:
+            if prebuilt is None:
+                message = template.render(row)
+                chat_id = _check_row_chat_id(message["chat_id"])
+            else:
+                outgoing = prebuilt.with_chat_id(_check_row_chat_id(chat_id))
+        except (KeyError, TypeError, ValueError):
+            # ردیف ناقص فقط همان ردیف را ناموفق می‌کند، نه کل ارسال را
+            return _bad_row(chat_id)
+        for attempt in range(args.retries + 1):
+            started = time.perf_counter()
+            if prebuilt is None:
+                result = await client.send_message_async(disable_notification=silent, lean=True, **message)
+            else:
+                result = await client.send_async(outgoing, lean=True)
+            if result.ok or result.error_type not in RETRYABLE_ERRORS or attempt == args.retries:
+                break
+            await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+        return SendRecord.from_response(chat_id, result, time.perf_counter() - started)
+
+    async for record in run_bounded(read_recipients(args.recipients, args.chat_id_field), _send, args.concurrency):
+        progress.update(record)
+        if sink is not None:
+            sink.write(record)
+        if record.error_type in FATAL_ERRORS:
+            aborted = True
+            break
+    return aborted
+
+
+async def _send_documents(client: Client, args: argparse.Namespace, progress: Progress, sink: Any) -> bool:
+    cache = FileReferenceCache(args.file_cache)
+    filename = os.path.basename(args.document)
+    pending: List[Any] = []
+
+    def _valid_chat_ids() -> Iterator[Any]:
+        for row in read_recipients(args.recipients, args.chat_id_field):
+            try:
+                yield _check_row_chat_id(row.get(args.chat_id_field))
+            except ValueError:
+                record = _bad_row(row.get(args.chat_id_field))
+                progress.update(record)
+                if sink is not None:
+                    sink.write(record)
+
+    chat_ids: Any = _valid_chat_ids()
+
+    for attempt in range(args.retries + 1):
+        last_attempt = attempt == args.retries
+        pending = []
+        async for chat_id, result in client.send_document_many_async(
+            chat_ids, args.document, caption=args.caption, title=args.title, filename=filename,
+            concurrency=args.concurrency, cache=cache, lean=True,
+            disable_notification=1 if args.silent else None,
+        ):
+            if not result.ok and result.error_type in RETRYABLE_ERRORS and not last_attempt:
+                # خطای گذرا؛ در دور بعد دوباره تلاش می‌شود
+                pending.append(chat_id)
+                continue
+            record = SendRecord.from_response(chat_id, result)
+            progress.update(record)
+            if sink is not None:
+                sink.write(record)
+            if record.error_type in FATAL_ERRORS:
+                return True
+        if not pending:
+            break
+        await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+        chat_ids = pending
+    return False
+
+
+async def run(args: argparse.Namespace) -> int:
+    """Run a bulk send described by parsed command-line arguments."""
+    rate_limiter = TokenBucket(args.rate) if args.rate else None
+    total = None if args.no_count else count_recipients(args.recipients)
+    progress = Progress(total)
+    sink = open_sink(args.output) if args.output else None
+
+    async with Client(args.token, base_url=args.base_url, timeout=args.timeout,
+                      rate_limiter=rate_limiter) as client:
+        try:
+            if args.document:
+                aborted = await _send_documents(client, args, progress, sink)
+            else:
+                aborted = await _send_messages(client, args, progress, sink)
+        finally:
+            progress.render(final=True)
+            if sink is not None:
+                sink.close()
+
+    if aborted:
+        print("Aborted: the API rejected the token (INVALID_TOKEN).", file=sys.stderr)
+        return 1
+    return 0 if progress.failed == 0 else 1
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Console entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.token:
+        parser.error("an API token is required (--token or $EITAAYAR_TOKEN)")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted.", file=sys.stderr)
+        return 130
+
+
+__all__ = ['main', 'run', 'build_parser', 'read_recipients', 'count_recipients', 'Progress']
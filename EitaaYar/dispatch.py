@@ -0,0 +1,293 @@
+"""
+Async request dispatching: priority lanes with weighted fair scheduling and
+per-chat ordered delivery.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Deque, Tuple, Hashable
+
+from .ratelimit import TokenBucket
+
+PRIORITY_URGENT = "urgent"
+PRIORITY_NORMAL = "normal"
+PRIORITY_BULK = "bulk"
+
+DEFAULT_WEIGHTS = {PRIORITY_URGENT: 8, PRIORITY_NORMAL: 4, PRIORITY_BULK: 1}
+
+
+@dataclass
+class LaneStats:
+    """Counters of a single priority lane."""
+    admitted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        """Average queueing time in seconds."""
+        return self.total_wait / self.admitted if self.admitted else 0.0
+
+
+class PriorityDispatcher:
+    """
+    Concurrency gate with one queue per priority lane.
+
+    At most ``max_concurrency`` requests run at once. When slots are scarce,
+    waiting lanes are served by smooth weighted round-robin, and each lane's
+    ``reserved`` slots can never be taken by other lanes, so urgent sends keep
+    low latency while a broadcast saturates the rest.
+
+    With a ``rate_limiter`` a slot is granted together with a token, so the
+    rate budget is also shared out in priority order instead of arrival order.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        weights: Optional[Dict[str, int]] = None,
+        reserved: Optional[Dict[str, int]] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+    ) -> None:
+        """
+        :param max_concurrency: Total number of in-flight requests (default: 20)
+        :param weights: Scheduling weight per lane (default: urgent=8, normal=4, bulk=1)
+        :param reserved: Slots reserved per lane (default: 10% of capacity for urgent)
+        :param rate_limiter: TokenBucket whose tokens are granted with the slots (optional)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        if reserved is None:
+            reserved = {PRIORITY_URGENT: max(1, max_concurrency // 10)} if max_concurrency > 1 else {}
+        unknown = set(reserved) - set(self.weights)
+        if unknown:
+            raise ValueError(f"Reserved capacity for unknown lanes: {sorted(unknown)}")
+        if sum(reserved.values()) >= max_concurrency:
+            raise ValueError("Reserved capacity must leave at least one shared slot")
+
+        self.max_concurrency = max_concurrency
+        self.reserved = dict(reserved)
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {lane: deque() for lane in self.weights}
+        self._in_flight: Dict[str, int] = {lane: 0 for lane in self.weights}
+        self._current: Dict[str, int] = {lane: 0 for lane in self.weights}
+        self._stats: Dict[str, LaneStats] = {lane: LaneStats() for lane in self.weights}
+        self._total_in_flight = 0
+        self.rate_limiter = rate_limiter
+        self._token_timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def resize(self, max_concurrency: int) -> None:
+        """Change the total number of slots; reserved slots are always kept."""
+        self.max_concurrency = max(int(max_concurrency), sum(self.reserved.values()) + 1)
+        self._dispatch()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding a slot."""
+        return self._total_in_flight
+
+    # -- scheduling -----------------------------------------------------------
+
+    def _lane(self, priority: Optional[str]) -> str:
+        lane = priority or PRIORITY_NORMAL
+        if lane not in self.weights:
+            raise ValueError(f"Unknown priority lane: {lane}")
+        return lane
+
+    def _admissible(self, lane: str) -> bool:
+        free = self.max_concurrency - self._total_in_flight
+        if free <= 0:
+            return False
+        # ظرفیت رزرو شده خطوط دیگر که هنوز استفاده نشده
+        held_for_others = sum(
+            max(0, slots - self._in_flight[other])
+            for other, slots in self.reserved.items() if other != lane
+        )
+        return free > held_for_others
+
+    def _grant(self, lane: str, queued_at: float) -> None:
+        self._in_flight[lane] += 1
+        self._total_in_flight += 1
+        waited = time.perf_counter() - queued_at
+        stats = self._stats[lane]
+        stats.admitted += 1
+        stats.total_wait += waited
+        if waited > stats.max_wait:
+            stats.max_wait = waited
+
+    def _dispatch(self) -> None:
+        while True:
+            eligible = []
+            for lane, queue in self._queues.items():
+                while queue and queue[0][0].done():
+                    queue.popleft()  # waiter لغو شده
+                if queue and self._admissible(lane):
+                    eligible.append(lane)
+            if not eligible or not self._take_token():
+                return
+
+            # smooth weighted round-robin
+            total = 0
+            for lane in eligible:
+                self._current[lane] += self.weights[lane]
+                total += self.weights[lane]
+            chosen = max(eligible, key=self._current.__getitem__)
+            self._current[chosen] -= total
+
+            future, queued_at = self._queues[chosen].popleft()
+            self._grant(chosen, queued_at)
+            future.set_result(None)
+
+    def _take_token(self) -> bool:
+        """Take a rate limiter token for the next grant, or wake up when one is due."""
+        if self.rate_limiter is None:
+            return True
+        wait = self.rate_limiter.try_reserve()
+        if wait <= 0:
+            return True
+        loop = asyncio.get_running_loop()
+        if self._token_timer is None or self._timer_loop is not loop:
+            self._timer_loop = loop
+            self._token_timer = loop.call_later(wait, self._token_due)
+        return False
+
+    def _token_due(self) -> None:
+        self._token_timer = None
+        self._dispatch()
+
+    async def acquire(self, priority: Optional[str] = None) -> None:
+        """Wait for a slot (and a rate limiter token, if any) in the given lane."""
+        lane = self._lane(priority)
+        queued_at = time.perf_counter()
+        if not any(self._queues.values()) and self._admissible(lane) and self._take_token():
+            self._grant(lane, queued_at)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].append((future, queued_at))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # اسلات داده شده بود ولی دیگر لازم نیست
+                self.release(lane)
+            raise
+
+    def release(self, priority: Optional[str] = None) -> None:
+        """Return a slot taken by ``acquire``."""
+        lane = self._lane(priority)
+        self._in_flight[lane] -= 1
+        self._total_in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None):
+        """Async context manager holding a slot for the duration of a request."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    # -- metrics --------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-lane queue depth, in-flight count and wait-time statistics."""
+        lanes = {}
+        for lane, stats in self._stats.items():
+            lanes[lane] = {
+                "queue_depth": sum(1 for future, _ in self._queues[lane] if not future.done()),
+                "in_flight": self._in_flight[lane],
+                "reserved": self.reserved.get(lane, 0),
+                "admitted": stats.admitted,
+                "avg_wait": stats.avg_wait,
+                "max_wait": stats.max_wait,
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._total_in_flight,
+            "lanes": lanes,
+        }
+
+
+class OrderedDispatcher:
+    """
+    Per-key FIFO gate: requests sharing a key (e.g. a ``chat_id``) run one at
+    a time in arrival order, while different keys run fully in parallel.
+
+    No task is created per key. Callers wait on a future in the key's queue,
+    and the queue is dropped as soon as the key has no pending requests. Each
+    key accepts at most ``max_pending_per_key`` waiters; beyond that
+    ``acquire`` raises ``asyncio.QueueFull``.
+    """
+
+    def __init__(self, max_pending_per_key: int = 100) -> None:
+        """
+        :param max_pending_per_key: Waiters allowed behind the running request of a key (default: 100)
+        """
+        if max_pending_per_key < 0:
+            raise ValueError("max_pending_per_key must not be negative")
+        self.max_pending_per_key = max_pending_per_key
+        # صف خالی یعنی کلید در حال اجراست و کسی منتظر نیست
+        self._queues: Dict[Hashable, Deque[asyncio.Future]] = {}
+        self.max_depth = 0
+        self.rejected = 0
+
+    async def acquire(self, key: Hashable) -> None:
+        """Wait until all earlier requests for ``key`` have released it."""
+        queue = self._queues.get(key)
+        if queue is None:
+            self._queues[key] = deque()
+            return
+        if len(queue) >= self.max_pending_per_key:
+            self.rejected += 1
+            raise asyncio.QueueFull(f"Too many pending sends for {key!r}")
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        if len(queue) > self.max_depth:
+            self.max_depth = len(queue)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(key)
+            raise
+
+    def release(self, key: Hashable) -> None:
+        """Hand ``key`` to its next waiter, or forget it if nobody waits."""
+        queue = self._queues[key]
+        while queue:
+            future = queue.popleft()
+            if not future.done():  # waiter لغو شده رد می‌شود
+                future.set_result(None)
+                return
+        del self._queues[key]
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        """Async context manager holding ``key`` for the duration of a request."""
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Active keys, waiting requests and rejections."""
+        return {
+            "active_keys": len(self._queues),
+            "waiting": sum(len(queue) for queue in self._queues.values()),
+            "max_depth": self.max_depth,
+            "rejected": self.rejected,
+        }
+
+
+__all__ = [
+    'PriorityDispatcher', 'OrderedDispatcher', 'LaneStats', 'PRIORITY_URGENT', 'PRIORITY_NORMAL', 'PRIORITY_BULK',
+]
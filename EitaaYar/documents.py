@@ -0,0 +1,214 @@
+"""
+Upload-once, send-many helpers for document broadcasts.
+
+A document is hashed once; the hash keys a persistent cache of file references
+returned by the API. When no reference is available, the multipart body is
+encoded once and only the ``chat_id`` part is rebuilt per recipient.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Union
+from urllib.parse import quote
+
+logger = logging.getLogger('eitaayar.documents')
+
+# کلیدهایی که ممکن است شناسه فایل آپلودشده در آن‌ها برگردد
+_REFERENCE_KEYS = ("file_id", "file_unique_id")
+_REFERENCE_CONTAINERS = ("document", "file", "video", "audio", "photo")
+
+
+def read_file_bytes(file: Any) -> bytes:
+    """
+    Read a document given as bytes, a file path or a binary file object.
+
+    :param file: bytes, path string or object with ``read()``
+    """
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return bytes(file)
+    if isinstance(file, str):
+        with open(file, "rb") as fh:
+            return fh.read()
+    if hasattr(file, "read"):
+        data = file.read()
+        return data.encode("utf-8") if isinstance(data, str) else data
+    raise TypeError(f"Unsupported file type: {type(file).__name__}")
+
+
+def content_hash(data: bytes) -> str:
+    """Return the SHA-256 hex digest used as the cache key of a document."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_file_reference(result: Any) -> Optional[str]:
+    """
+    Find a reusable file reference in a raw ``sendDocument`` result.
+
+    :param result: The ``result`` object of the API response
+    :return: The file reference, or None if the API did not return one
+    """
+    if not isinstance(result, dict):
+        return None
+    for key in _REFERENCE_KEYS:
+        if result.get(key):
+            return str(result[key])
+    for container in _REFERENCE_CONTAINERS:
+        value = result.get(container)
+        if isinstance(value, list) and value:
+            value = value[-1]
+        if isinstance(value, dict):
+            for key in _REFERENCE_KEYS:
+                if value.get(key):
+                    return str(value[key])
+    return None
+
+
+def _disposition(name: str, filename: Optional[str] = None) -> str:
+    header = f'Content-Disposition: form-data; name="{quote(name, safe="")}"'
+    if filename is not None:
+        safe = filename.replace("\\", "\\\\").replace('"', "%22")
+        header += f'; filename="{safe}"'
+        if not filename.isascii():
+            header += f"; filename*=utf-8''{quote(filename, safe='')}"
+    return header
+
+
+class PreparedDocument:
+    """
+    Multipart ``sendDocument`` body encoded once and reused for every chat.
+
+    Only the leading ``chat_id`` part differs between recipients; all other
+    fields and the file bytes are encoded a single time.
+    """
+
+    def __init__(
+        self,
+        content: bytes,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        fields: Optional[Dict[str, Any]] = None,
+        file_field: str = "file",
+    ) -> None:
+        """
+        :param content: Raw document bytes
+        :param filename: Name of the file (optional)
+        :param content_type: Content type of the file (default: application/octet-stream)
+        :param fields: Other form fields such as caption or title (optional)
+        :param file_field: Form field name of the file (default: file)
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.size = len(content)
+        self.sha256 = content_hash(content)
+
+        delimiter = f"--{self.boundary}\r\n".encode("ascii")
+        parts = []
+        for key, value in (fields or {}).items():
+            if value is None or key == "chat_id":
+                continue
+            parts.append(delimiter)
+            parts.append(f"{_disposition(key)}\r\n\r\n{value}\r\n".encode("utf-8"))
+        parts.append(delimiter)
+        parts.append(
+            f"{_disposition(file_field, filename or 'file')}\r\n"
+            f"Content-Type: {content_type or 'application/octet-stream'}\r\n\r\n".encode("utf-8")
+        )
+        parts.append(content)
+        parts.append(f"\r\n--{self.boundary}--\r\n".encode("ascii"))
+
+        self._head = delimiter + f"{_disposition('chat_id')}\r\n\r\n".encode("utf-8")
+        self._tail = b"".join(parts)
+
+    def body(self, chat_id: Union[int, str]) -> bytes:
+        """Return the complete multipart body for one recipient."""
+        return b"".join((self._head, str(chat_id).encode("utf-8"), b"\r\n", self._tail))
+
+    def __repr__(self) -> str:
+        return f"PreparedDocument(sha256={self.sha256[:12]}..., size={self.size})"
+
+
+class FileReferenceCache:
+    """
+    Content-hash to file-reference cache with LRU eviction.
+
+    When ``path`` is given, entries are loaded on creation and saved after each
+    change, so references survive across runs.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000,
+                 max_age: Optional[float] = None) -> None:
+        """
+        :param path: JSON file used to persist the cache (optional)
+        :param max_entries: Maximum number of cached references (default: 1000)
+        :param max_age: Seconds after which an entry expires (optional)
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if path:
+            self.load()
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the cached reference for a content hash, if still valid."""
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        if self.max_age is not None and time.time() - entry["created"] > self.max_age:
+            self.invalidate(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return entry["ref"]
+
+    def put(self, digest: str, reference: str, filename: Optional[str] = None) -> None:
+        """Store a reference, evicting the least recently used entries."""
+        self._entries[digest] = {"ref": reference, "filename": filename, "created": time.time()}
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.save()
+
+    def invalidate(self, digest: str) -> None:
+        """Forget a reference (e.g. after the API rejected it)."""
+        if self._entries.pop(digest, None) is not None:
+            self.save()
+
+    def load(self) -> None:
+        """Load entries from ``path``, ignoring a missing or corrupt file."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                entries = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable file reference cache {self.path}: {e}")
+            return
+        # ترتیب فایل همان ترتیب LRU است (قدیمی‌ترین اول)
+        self._entries = OrderedDict(entries)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Atomically write entries to ``path``."""
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self._entries, fh, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = [
+    'PreparedDocument', 'FileReferenceCache', 'read_file_bytes', 'content_hash', 'extract_file_reference',
+]
@@ -0,0 +1,142 @@
+"""
+Multi-endpoint selection and failover for ``Client``.
+"""
+
+import threading
+import time
+from typing import Optional, Dict, Any, List, Iterable, Sequence
+
+from .transports import TransportError, TransportTimeout
+
+
+class Endpoint:
+    """Health and latency statistics of one base URL."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip('/')
+        self.latency: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        """Whether the endpoint is healthy or its cooldown has expired."""
+        return now >= self.down_until
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.available(now),
+            "latency": self.latency,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class EndpointPool:
+    """
+    Pick the fastest healthy base URL and track failures per endpoint.
+
+    Latency is a moving average of successful requests and probes. After
+    ``failure_threshold`` consecutive network errors or timeouts an endpoint is
+    taken out of rotation for ``cooldown`` seconds (doubling on each further
+    failure, up to ``max_cooldown``); the next success brings it back.
+    When every endpoint is down, the one that has been down the longest is tried.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        failure_threshold: int = 2,
+        cooldown: float = 5.0,
+        max_cooldown: float = 300.0,
+        smoothing: float = 0.3,
+        failover_on_timeout: bool = False,
+    ) -> None:
+        """
+        :param urls: Base URLs in order of preference
+        :param failure_threshold: Consecutive failures before an endpoint is marked down (default: 2)
+        :param cooldown: First cooldown of a failed endpoint in seconds (default: 5)
+        :param max_cooldown: Longest cooldown in seconds (default: 300)
+        :param smoothing: Weight of a new latency sample in the moving average (default: 0.3)
+        :param failover_on_timeout: Also retry timed-out requests on another endpoint; the
+                                    timed-out send may still have been delivered, so this can
+                                    send it twice (default: False)
+        """
+        self.endpoints: List[Endpoint] = [Endpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("At least one base URL is required")
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+        self.failover_on_timeout = failover_on_timeout
+        self.failovers = 0
+        self._by_url = {endpoint.url: endpoint for endpoint in self.endpoints}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def select(self, exclude: Sequence[str] = ()) -> str:
+        """
+        Base URL for the next request.
+
+        :param exclude: URLs already tried for this request
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.url not in exclude] or self.endpoints
+            healthy = [e for e in candidates if e.available(now)]
+            if healthy:
+                # نقطه‌ای که هنوز اندازه‌گیری نشده بر اساس ترتیب فهرست انتخاب می‌شود
+                best = min(healthy, key=lambda e: (e.latency is None, e.latency or 0.0))
+                return best.url
+            return min(candidates, key=lambda e: e.down_until).url
+
+    def should_failover(self, error: TransportError) -> bool:
+        """Whether a failed request may be retried on another endpoint."""
+        return self.failover_on_timeout or not isinstance(error, TransportTimeout)
+
+    def report_success(self, url: str, latency: float) -> None:
+        """Record a request that got an answer from ``url``."""
+        with self._lock:
+            endpoint = self._by_url[url]
+            endpoint.successes += 1
+            endpoint.consecutive_failures = 0
+            endpoint.down_until = 0.0
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += (latency - endpoint.latency) * self.smoothing
+
+    def report_failure(self, url: str, error: Any) -> None:
+        """Record a network error or timeout on ``url``."""
+        with self._lock:
+            endpoint = self._by_url[url]
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            endpoint.last_error = str(error)
+            excess = endpoint.consecutive_failures - self.failure_threshold
+            if excess >= 0:
+                endpoint.down_until = time.monotonic() + min(self.max_cooldown, self.cooldown * 2 ** excess)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-endpoint health, latency and counters."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "failovers": self.failovers,
+                "endpoints": [endpoint.to_dict(now) for endpoint in self.endpoints],
+            }
+
+
+__all__ = ['EndpointPool', 'Endpoint']
@@ -0,0 +1,170 @@
+"""
+Adaptive (AIMD) concurrency limiting for async requests.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Callable, Deque, List, Iterable
+
+# خطاهایی که نشانه فشار روی سرور یا شبکه هستند
+DEFAULT_BACKOFF_ERRORS = ("TIMEOUT", "NETWORK_ERROR")
+DEFAULT_BACKOFF_CODES = (408, 429, 503)
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The limit grows by about one slot per round trip while latency stays near
+    the observed baseline and the limit is actually in use. A latency spike
+    (``latency_tolerance`` times the baseline) or a throttling error cuts it by
+    ``backoff``, at most once per round trip.
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff: float = 0.7,
+        latency_tolerance: float = 2.0,
+        backoff_errors: Iterable[str] = DEFAULT_BACKOFF_ERRORS,
+        backoff_codes: Iterable[int] = DEFAULT_BACKOFF_CODES,
+    ) -> None:
+        """
+        :param initial: Starting limit (default: 10)
+        :param min_limit: Lowest allowed limit (default: 1)
+        :param max_limit: Highest allowed limit (default: 200)
+        :param backoff: Factor applied to the limit on congestion (default: 0.7)
+        :param latency_tolerance: Latency/baseline ratio treated as a spike (default: 2.0)
+        :param backoff_errors: Error types that trigger a decrease (default: TIMEOUT, NETWORK_ERROR)
+        :param backoff_codes: Error codes that trigger a decrease (default: 408, 429, 503)
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.backoff_errors = frozenset(backoff_errors)
+        self.backoff_codes = frozenset(backoff_codes)
+
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._listeners: List[Callable[[int], None]] = []
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding a slot."""
+        return self._in_flight
+
+    def subscribe(self, listener: Callable[[int], None]) -> None:
+        """Call ``listener(new_limit)`` whenever the integer limit changes."""
+        self._listeners.append(listener)
+
+    # -- feedback -------------------------------------------------------------
+
+    def observe(self, latency: float, error_type: Optional[str] = None,
+                error_code: Optional[int] = None, in_flight: Optional[int] = None) -> None:
+        """
+        Feed the outcome of one request into the controller.
+
+        :param latency: Request duration in seconds
+        :param error_type: Response error type, if any
+        :param error_code: Response error code, if any
+        :param in_flight: Requests in flight when another gate enforces the limit (optional)
+        """
+        old_limit = self.limit
+        now = time.monotonic()
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            # خط پایه به آرامی بالا می‌رود تا با تغییر شرایط شبکه سازگار شود
+            self._baseline += (latency - self._baseline) * 0.01
+
+        congested = (
+            error_type in self.backoff_errors
+            or error_code in self.backoff_codes
+            or latency > self._baseline * self.latency_tolerance
+        )
+        if congested:
+            if now - self._last_decrease >= (self._latency or 0.0):
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif (self._in_flight if in_flight is None else in_flight) + 1 >= self.limit:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self.increases += 1
+
+        if self.limit != old_limit:
+            for listener in self._listeners:
+                listener(self.limit)
+            self._wake()
+
+    # -- gating ---------------------------------------------------------------
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self._in_flight += 1
+                future.set_result(None)
+
+    async def acquire(self) -> None:
+        """Wait until a request may start under the current limit."""
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Return a slot taken by ``acquire``."""
+        self._in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Async context manager holding a slot for the duration of a request."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current limit, usage and latency statistics."""
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for f in self._waiters if not f.done()),
+            "baseline_latency": self._baseline,
+            "smoothed_latency": self._latency,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+
+__all__ = ['AdaptiveLimiter']
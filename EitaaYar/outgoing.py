@@ -0,0 +1,236 @@
+"""
+Prebuilt outgoing requests.
+
+An ``OutgoingMessage`` or ``OutgoingDocument`` is validated and encoded once;
+its body bytes, headers and URL are then reused by every retry, every
+endpoint failover and, through ``with_chat_id``, by every recipient of a
+bulk send. Only the ``chat_id`` part of the body is rebuilt per clone.
+"""
+
+import json
+from typing import Optional, Dict, Any, Tuple, Union
+
+from .documents import PreparedDocument, read_file_bytes
+from .transports import TransportRequest
+
+_JSON_HEAD = b'{"chat_id":'
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+# فیلدهای عددی که API فقط عدد صحیح می‌پذیرد
+_INT_FIELDS = ("disable_notification", "reply_to_message_id", "date", "pin", "auto_delete_after_views")
+
+
+def _check_chat_id(chat_id: Any) -> Union[int, str]:
+    if isinstance(chat_id, bool) or not isinstance(chat_id, (int, str)):
+        raise TypeError(f"chat_id must be an int or a username string, not {type(chat_id).__name__}")
+    if isinstance(chat_id, str) and not chat_id.strip():
+        raise ValueError("chat_id must not be empty")
+    return chat_id
+
+
+def _clean_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    fields = {k: v for k, v in fields.items() if v is not None}
+    for key in _INT_FIELDS:
+        value = fields.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise TypeError(f"{key} must be an int, not {type(value).__name__}")
+    return fields
+
+
+class _Encoded:
+    """Encoding shared by an outgoing request and all of its clones."""
+
+    __slots__ = ("content_type", "fields", "tail", "bound")
+
+    def __init__(self, content_type: str, fields: Dict[str, Any], tail: Any) -> None:
+        self.content_type = content_type
+        self.fields = fields
+        self.tail = tail
+        # (base_url, token, id(headers)) -> (url, headers)
+        self.bound: Dict[Tuple[str, str, int], Tuple[str, Dict[str, str]]] = {}
+
+
+class OutgoingRequest:
+    """
+    Base class of prebuilt requests accepted by ``Client.send`` / ``Client.send_async``.
+
+    ``data`` holds the request fields (for logging and inspection); the bytes
+    actually sent come from ``body``.
+    """
+
+    method = ""
+    __slots__ = ("chat_id", "data", "_shared", "_body", "_request")
+
+    def __init__(self, chat_id: Union[int, str], shared: _Encoded) -> None:
+        self.chat_id = chat_id
+        self.data = {"chat_id": chat_id, **shared.fields}
+        self._shared = shared
+        self._body: Optional[bytes] = None
+        self._request: Optional[Tuple[Tuple[str, str, int, float], TransportRequest]] = None
+
+    @property
+    def content_type(self) -> str:
+        return self._shared.content_type
+
+    @property
+    def body(self) -> bytes:
+        """Encoded request body (built on first use, then cached)."""
+        if self._body is None:
+            self._body = self._encode(self.chat_id)
+        return self._body
+
+    def _encode(self, chat_id: Union[int, str]) -> bytes:
+        raise NotImplementedError
+
+    def with_chat_id(self, chat_id: Union[int, str]) -> "OutgoingRequest":
+        """Return a copy for another chat sharing this request's encoding."""
+        clone = object.__new__(type(self))
+        OutgoingRequest.__init__(clone, _check_chat_id(chat_id), self._shared)
+        return clone
+
+    def bind(self, base_url: str, token: str, headers: Dict[str, str], timeout: float) -> TransportRequest:
+        """
+        Return the transport request for a base URL, cached for repeated sends.
+
+        :param base_url: API base URL without trailing slash
+        :param token: API token
+        :param headers: Client default headers
+        :param timeout: Request timeout in seconds
+        """
+        key = (base_url, token, id(headers), timeout)
+        cached = self._request
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        bound = self._shared.bound
+        shared_key = key[:3]
+        url_headers = bound.get(shared_key)
+        if url_headers is None:
+            url_headers = (f"{base_url}/{token}/{self.method}", {**headers, "Content-Type": self.content_type})
+            bound[shared_key] = url_headers
+        request = TransportRequest(self.method, url_headers[0], url_headers[1], None, None, None,
+                                   self.body, timeout)
+        self._request = (key, request)
+        return request
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(chat_id={self.chat_id!r})"
+
+
+class OutgoingMessage(OutgoingRequest):
+    """
+    A ``sendMessage`` request encoded once as JSON.
+
+    The body is split around ``chat_id`` so clones made with ``with_chat_id``
+    only encode their own id.
+    """
+
+    method = "sendMessage"
+    __slots__ = ()
+
+    def __init__(
+        self,
+        chat_id: Union[int, str],
+        text: str,
+        title: Optional[str] = None,
+        disable_notification: Optional[int] = None,
+        reply_to_message_id: Optional[int] = None,
+        date: Optional[int] = None,
+        pin: Optional[int] = None,
+        auto_delete_after_views: Optional[int] = None,
+    ) -> None:
+        """
+        :param chat_id: Unique identifier for the target chat or username
+        :param text: Text of the message to be sent
+        :param title: Message title (optional)
+        :param disable_notification: Send message silently (optional)
+        :param reply_to_message_id: ID of the original message (optional)
+        :param date: Date and time to send message (Unix timestamp, optional)
+        :param pin: Pin the message after sending (optional)
+        :param auto_delete_after_views: Auto-delete after views count (optional)
+        """
+        if not isinstance(text, str) or not text:
+            raise ValueError("text must be a non-empty string")
+        fields = _clean_fields({
+            "text": text,
+            "title": title,
+            "disable_notification": disable_notification,
+            "reply_to_message_id": reply_to_message_id,
+            "date": date,
+            "pin": pin,
+            "auto_delete_after_views": auto_delete_after_views,
+        })
+        rest = _encode_json(fields).encode("utf-8")
+        tail = b"," + rest[1:] if len(rest) > 2 else b"}"
+        super().__init__(_check_chat_id(chat_id), _Encoded("application/json", fields, tail))
+
+    def _encode(self, chat_id: Union[int, str]) -> bytes:
+        encoded = str(chat_id) if type(chat_id) is int else _encode_json(chat_id)
+        return b"".join((_JSON_HEAD, encoded.encode("utf-8"), self._shared.tail))
+
+
+class OutgoingDocument(OutgoingRequest):
+    """
+    A ``sendDocument`` request whose multipart body is encoded once.
+
+    The file is read and encoded on creation; clones share the encoded parts
+    (see ``PreparedDocument``).
+    """
+
+    method = "sendDocument"
+    __slots__ = ()
+
+    def __init__(
+        self,
+        chat_id: Union[int, str],
+        file: Any,
+        caption: Optional[str] = None,
+        title: Optional[str] = None,
+        disable_notification: Optional[int] = None,
+        reply_to_message_id: Optional[int] = None,
+        date: Optional[int] = None,
+        pin: Optional[int] = None,
+        auto_delete_after_views: Optional[int] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> None:
+        """
+        :param chat_id: Unique identifier for the target chat or username
+        :param file: File path, bytes, file object or a PreparedDocument (which carries its own fields)
+        :param caption: Document caption (optional)
+        :param title: Document title (optional)
+        :param disable_notification: Send silently (optional)
+        :param reply_to_message_id: ID of the original message (optional)
+        :param date: Date and time to send (Unix timestamp, optional)
+        :param pin: Pin the message after sending (optional)
+        :param auto_delete_after_views: Auto-delete after views count (optional)
+        :param filename: Name of the file, defaults to the path's basename (optional)
+        :param content_type: Content type of the file (optional)
+        """
+        fields = _clean_fields({
+            "caption": caption,
+            "title": title,
+            "disable_notification": disable_notification,
+            "reply_to_message_id": reply_to_message_id,
+            "date": date,
+            "pin": pin,
+            "auto_delete_after_views": auto_delete_after_views,
+        })
+        if isinstance(file, PreparedDocument):
+            if fields:
+                raise ValueError("Fields of a PreparedDocument are fixed when it is built")
+            prepared = file
+        else:
+            if filename is None and isinstance(file, str):
+                filename = file.replace("\\", "/").rsplit("/", 1)[-1]
+            prepared = PreparedDocument(read_file_bytes(file), filename, content_type, fields)
+        super().__init__(_check_chat_id(chat_id), _Encoded(prepared.content_type, fields, prepared))
+
+    @property
+    def document(self) -> PreparedDocument:
+        return self._shared.tail
+
+    def _encode(self, chat_id: Union[int, str]) -> bytes:
+        return self._shared.tail.body(chat_id)
+
+
+__all__ = ['OutgoingRequest', 'OutgoingMessage', 'OutgoingDocument']
@@ -0,0 +1,259 @@
+"""
+On-demand profiling of a live ``Client``.
+
+While a ``ClientProfiler`` is attached, every request's time is split into
+phases per API method:
+
+* ``build`` - building the transport request (URL, headers, body)
+* ``network`` - waiting for the transport, including failed endpoint attempts
+* ``decode`` - JSON decoding of the reply
+* ``parse`` - building the Response (or LeanResult)
+
+Optionally a cProfile CPU profile and a tracemalloc allocation diff cover the
+same window. The window ends after ``requests`` requests, after ``duration``
+seconds (checked when a request completes) or on ``stop()``.
+"""
+
+import asyncio
+import cProfile
+import json
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from . import Client
+
+logger = logging.getLogger('eitaayar.profiling')
+
+PHASES = ("build", "network", "decode", "parse")
+
+
+class PhaseStats:
+    """Count, total and maximum duration of one phase."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class ClientProfiler:
+    """
+    Profile a client for a time window or a number of requests.
+
+    Usually created with ``Client.start_profiling``. cProfile only follows the
+    thread that started the profiler (the event loop thread for async
+    clients); phase timings are collected from every thread.
+
+    cProfile can only be turned off by that same thread, so with ``cpu=True``
+    a window used up by another thread is closed on the starting thread: on
+    its event loop if it was started inside one, otherwise at its next
+    request. ``stop()`` must then also be called from the starting thread.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        cpu: bool = True,
+        memory: bool = False,
+        requests: Optional[int] = None,
+        duration: Optional[float] = None,
+        path: Optional[str] = None,
+        top: int = 30,
+    ) -> None:
+        """
+        :param client: Client to profile
+        :param cpu: Run cProfile during the window (default: True)
+        :param memory: Diff tracemalloc snapshots taken at start and stop (default: False)
+        :param requests: Stop after this many completed requests (optional)
+        :param duration: Stop at the first request completing after this many seconds (optional)
+        :param path: Write the report here as JSON, plus ``.prof`` / ``.tracemalloc`` dumps (optional)
+        :param top: Entries kept in the CPU and memory top lists (default: 30)
+        """
+        self.client = client
+        self.cpu = cpu
+        self.memory = memory
+        self.max_requests = requests
+        self.duration = duration
+        self.path = path
+        self.top = top
+
+        self.requests = 0
+        self.started_at: Optional[float] = None
+        self.report: Optional[Dict[str, Any]] = None
+        self._started = 0.0
+        self._methods: Dict[str, Dict[str, PhaseStats]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_pending = False
+        self._profile: Optional[cProfile.Profile] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._own_tracemalloc = False
+        self._expired = False
+
+    @property
+    def active(self) -> bool:
+        return self.started_at is not None and self.report is None
+
+    def start(self) -> "ClientProfiler":
+        """Attach to the client and start the window."""
+        if self.started_at is not None:
+            raise RuntimeError("A profiler can only be started once")
+        self._thread = threading.get_ident()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._own_tracemalloc = True
+            self._snapshot = tracemalloc.take_snapshot()
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.client.profiler = self
+        logger.info("Profiling started")
+        return self
+
+    # -- called by the client -------------------------------------------------
+
+    def record(self, method: str, phase: str, seconds: float) -> None:
+        """Add the duration of one phase of a request."""
+        if self._expired:
+            if self._stop_pending and threading.get_ident() == self._thread:
+                self.stop()
+            return
+        with self._lock:
+            phases = self._methods.get(method)
+            if phases is None:
+                phases = self._methods[method] = {name: PhaseStats() for name in PHASES + ("total",)}
+            phases[phase].add(seconds)
+
+    def request_done(self, method: str, seconds: float) -> None:
+        """Count a completed request and end the window once it is used up."""
+        if self._expired:
+            if self._stop_pending and threading.get_ident() == self._thread:
+                self.stop()
+            return
+        self.record(method, "total", seconds)
+        with self._lock:
+            self.requests += 1
+            expired = (
+                (self.max_requests is not None and self.requests >= self.max_requests)
+                or (self.duration is not None and time.perf_counter() - self._started >= self.duration)
+            )
+            if expired:
+                self._expired = True
+        if expired:
+            self._finish()
+
+    def _finish(self) -> None:
+        """Stop now, or on the starting thread when cProfile runs there."""
+        if self._profile is None or threading.get_ident() == self._thread:
+            self.stop()
+            return
+        # فقط نخی که cProfile را روشن کرده می‌تواند آن را خاموش کند
+        self._stop_pending = True
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self.stop)
+            except RuntimeError:
+                pass  # حلقه بسته شده؛ درخواست بعدی همان نخ پنجره را می‌بندد
+
+    # -- results --------------------------------------------------------------
+
+    def stop(self) -> Dict[str, Any]:
+        """End the window, detach from the client and return (and optionally write) the report."""
+        if self.report is not None:
+            return self.report
+        if self.started_at is None:
+            raise RuntimeError("Profiler was not started")
+        if self._profile is not None and threading.get_ident() != self._thread:
+            raise RuntimeError("A CPU profiler must be stopped from the thread that started it")
+        self._expired = True
+        if self._profile is not None:
+            self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        if self.client.profiler is self:
+            self.client.profiler = None
+
+        report: Dict[str, Any] = {
+            "started_at": self.started_at,
+            "duration": elapsed,
+            "requests": self.requests,
+            "methods": {
+                method: {phase: stats.to_dict() for phase, stats in phases.items()}
+                for method, phases in self._methods.items()
+            },
+        }
+        if self._profile is not None:
+            report["cpu"] = self._cpu_top()
+        if self._snapshot is not None:
+            snapshot = tracemalloc.take_snapshot()
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+            report["memory"] = self._memory_top(snapshot)
+            if self.path:
+                snapshot.dump(f"{self.path}.tracemalloc")
+        if self.path:
+            self._write(report)
+        self.report = report
+        logger.info(f"Profiling stopped after {self.requests} requests in {elapsed:.2f}s")
+        return report
+
+    def _cpu_top(self) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(self._profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        return [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "tottime": tottime,
+                "cumtime": cumtime,
+            }
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+        ]
+
+    def _memory_top(self, snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        diff = snapshot.filter_traces(ignore).compare_to(self._snapshot.filter_traces(ignore), "lineno")
+        return [
+            {"location": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in diff[:self.top]
+        ]
+
+    def _write(self, report: Dict[str, Any]) -> None:
+        if self._profile is not None:
+            self._profile.dump_stats(f"{self.path}.prof")
+            report["cpu_dump"] = f"{self.path}.prof"
+        if self._snapshot is not None:
+            report["memory_dump"] = f"{self.path}.tracemalloc"
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+
+
+__all__ = ['ClientProfiler', 'PhaseStats', 'PHASES']
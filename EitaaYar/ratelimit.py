@@ -0,0 +1,242 @@
+"""
+Request rate limiting shared by the sync and async request paths.
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class TokenBucket:
+    """
+    Token bucket allowing ``rate`` requests per second with bursts of ``burst``.
+
+    Callers reserve a token up front and sleep for the time until it becomes
+    available, so waiters are served in arrival order without polling. Safe to
+    share between threads and event loops of one process.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        """
+        :param rate: Sustained requests per second
+        :param burst: Bucket capacity (default: max(1, rate))
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.total_wait = 0.0
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take ``tokens`` from the bucket, possibly going into debt.
+
+        :return: Seconds the caller must wait before proceeding
+        """
+        return self._take(tokens, True)
+
+    def try_reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take ``tokens`` only if the bucket holds them right now.
+
+        Lets a scheduler decide who gets the next token instead of queueing
+        callers in arrival order.
+
+        :return: 0.0 if the tokens were taken, otherwise seconds until they are available
+        """
+        return self._take(tokens, False)
+
+    def _take(self, tokens: float, debt: bool) -> float:
+        with self._lock:
+            now = time.monotonic()
+            available = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens, wait = self._spend(available, tokens, debt)
+            return wait
+
+    def _spend(self, available: float, tokens: float, debt: bool) -> Tuple[float, float]:
+        """Apply a reservation to ``available``; return the new level and the wait (called under the lock)."""
+        if not debt and available < tokens:
+            # چیزی برداشته نمی‌شود؛ فقط زمان رسیدن توکن گزارش می‌شود
+            return available, (tokens - available) / self.rate
+        available -= tokens
+        wait = -available / self.rate if available < 0 else 0.0
+        self.acquired += 1
+        self.total_wait += wait
+        return available, wait
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait (asynchronously) until the request may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: float = 1.0) -> None:
+        """Wait (blocking) until the request may be sent."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Configured rate and accumulated waiting time."""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "total_wait": self.total_wait,
+        }
+
+
+# magic, tokens available, last update (time.monotonic), requests admitted host-wide
+_STATE = struct.Struct("<8sddq")
+_MAGIC = b"EYBUCKT1"
+
+# باکت‌های مشترک این فرایند؛ پس از fork در فرزند بازنشانی می‌شوند
+_SHARED_BUCKETS: "weakref.WeakSet[SharedTokenBucket]" = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    for bucket in list(_SHARED_BUCKETS):
+        bucket._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process on the host that opens the same ``path``.
+
+    The bucket state lives in a small memory-mapped file and is updated under
+    an exclusive file lock, so each reservation costs one lock round trip and
+    no extra process or service is needed. Reservations are taken in arrival
+    order across all processes, so busy workers get a share of the budget
+    proportional to their demand and idle ones take nothing. Every process
+    must use the same ``rate`` and ``burst``.
+
+    Works across ``fork`` (the child drops the inherited descriptor, mapping
+    and thread lock and reopens the file on first use) and can be pickled for
+    spawned workers.
+    """
+
+    def __init__(self, path: str, rate: float, burst: Optional[int] = None) -> None:
+        """
+        :param path: State file shared by the cooperating processes (created if missing)
+        :param rate: Sustained requests per second for the whole host
+        :param burst: Bucket capacity (default: max(1, rate))
+        """
+        super().__init__(rate, burst)
+        self.path = path
+        self._fd = -1
+        self._map: Optional[mmap.mmap] = None
+        self._pid = 0
+        self._open()
+        _SHARED_BUCKETS.add(self)
+
+    def _open(self) -> None:
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+        with self._file_lock():
+            if os.fstat(self._fd).st_size < _STATE.size:
+                os.ftruncate(self._fd, _STATE.size)
+            self._map = mmap.mmap(self._fd, _STATE.size)
+            if _STATE.unpack_from(self._map)[0] != _MAGIC:
+                _STATE.pack_into(self._map, 0, _MAGIC, self.burst, time.monotonic(), 0)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def _release(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _after_fork(self) -> None:
+        """Forget the parent's lock and file handles in a forked child."""
+        # قفل ممکن است هنگام fork در دست نخ دیگری از والد بوده باشد
+        self._lock = threading.Lock()
+        if self._fd >= 0:
+            self._release()
+            self._pid = 0
+
+    def _ensure_open(self) -> None:
+        if self._pid != os.getpid():
+            # پس از fork قفل فایل با والد مشترک است؛ فایل دوباره باز می‌شود
+            self._release()
+            self._open()
+
+    def _take(self, tokens: float, debt: bool) -> float:
+        with self._lock:
+            self._ensure_open()
+            with self._file_lock():
+                _, available, updated, admitted = _STATE.unpack_from(self._map)
+                now = time.monotonic()
+                # زمان monotonic پس از راه‌اندازی مجدد سیستم از نو شروع می‌شود
+                elapsed = now - updated if now >= updated else 0.0
+                taken = self.acquired
+                available, wait = self._spend(min(self.burst, available + elapsed * self.rate), tokens, debt)
+                admitted += self.acquired - taken
+                _STATE.pack_into(self._map, 0, _MAGIC, available, now, admitted)
+            return wait
+
+    def host_acquired(self) -> int:
+        """Requests admitted by all processes sharing the bucket."""
+        with self._lock:
+            self._ensure_open()
+            with self._file_lock():
+                return _STATE.unpack_from(self._map)[3]
+
+    def close(self) -> None:
+        """Unmap and close the state file (the shared state is kept; a later reservation reopens it)."""
+        with self._lock:
+            self._release()
+            self._pid = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = super().metrics()
+        metrics["path"] = self.path
+        metrics["host_acquired"] = self.host_acquired()
+        return metrics
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path, "rate": self.rate, "burst": self.burst}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["path"], state["rate"], state["burst"])
+
+
+__all__ = ['TokenBucket', 'SharedTokenBucket']
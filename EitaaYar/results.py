@@ -0,0 +1,64 @@
+"""
+Error classification and the lean result type used by fire-and-forget sends.
+"""
+
+from typing import Optional, Dict, Any, NamedTuple
+
+
+def detect_error_type(ok: bool, error: Any) -> Optional[str]:
+    """تشخیص نوع خطا بر اساس پاسخ API"""
+    if not ok:
+        error_desc = str(error or '').lower()
+
+        if "method not found" in error_desc:
+            return "METHOD_NOT_FOUND"
+        elif "invalid token" in error_desc or "unauthorized" in error_desc:
+            return "INVALID_TOKEN"
+        elif "chat not found" in error_desc or "chat_id" in error_desc:
+            return "CHAT_NOT_FOUND"
+        elif "timeout" in error_desc:
+            return "TIMEOUT"
+        elif "network" in error_desc or "connection" in error_desc:
+            return "NETWORK_ERROR"
+        elif "not implemented" in error_desc:
+            return "METHOD_NOT_IMPLEMENTED"
+        elif "file" in error_desc or "document" in error_desc:
+            return "FILE_ERROR"
+        elif "text" in error_desc or "message" in error_desc:
+            return "MESSAGE_ERROR"
+
+    return None
+
+
+class LeanResult(NamedTuple):
+    """
+    Minimal fixed-layout outcome of a send.
+
+    Returned instead of ``Response`` when ``lean=True``: no ``Message``,
+    ``User``, ``Chat`` or ``datetime`` objects are built.
+    """
+    ok: bool
+    message_id: Optional[int] = None
+    error_code: Optional[int] = None
+    error_type: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "LeanResult":
+        """Pick the few needed fields out of a decoded API response."""
+        ok = bool(payload.get('ok', False))
+        if ok:
+            result = payload.get('result')
+            return cls(True, result.get('message_id') if isinstance(result, dict) else None)
+        return cls(False, None, payload.get('error_code'), detect_error_type(False, payload.get('error')))
+
+    @classmethod
+    def failure(cls, error: str, error_code: Optional[int] = None,
+                error_type: Optional[str] = None) -> "LeanResult":
+        """Build a failed result for a client-side error message (``error_type`` overrides detection)."""
+        return cls(False, None, error_code, error_type or detect_error_type(False, error))
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+__all__ = ['LeanResult', 'detect_error_type']
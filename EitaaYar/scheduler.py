@@ -0,0 +1,377 @@
+"""
+Client-side message scheduling backed by a timer heap.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable, Iterable, TYPE_CHECKING
+
+from .bulk import run_bounded
+from .sinks import SendRecord, ResultSink
+
+if TYPE_CHECKING:
+    from . import Client
+
+logger = logging.getLogger('eitaayar.scheduler')
+
+DEFAULT_RETRY_ERRORS = ("TIMEOUT", "NETWORK_ERROR")
+DEFAULT_RETRY_CODES = (429, 500, 502, 503, 504)
+
+# (زمان اجرا، شماره تلاش، پارامترهای send_message)
+_Job = Tuple[float, int, Dict[str, Any]]
+
+
+def _timestamp(at: Union[datetime, float, int]) -> float:
+    return at.timestamp() if isinstance(at, datetime) else float(at)
+
+
+class MessageScheduler:
+    """
+    Release messages at given wall-clock times through ``send_message_async``.
+
+    Pending sends live in a binary heap keyed by due time, so scheduling is
+    O(log n) and one timer serves the whole queue. Cancelling or rescheduling
+    only updates the job table; the stale heap entry is skipped when it
+    surfaces and the heap is compacted once stale entries dominate. Due jobs
+    are sent in batches, and sends rejected with a retryable error are put
+    back on the heap with exponential backoff.
+
+    With ``journal_path`` every change is appended to a JSON lines journal,
+    which is replayed (and compacted) on start, so pending sends survive a
+    restart. Delivery is at-least-once: a send interrupted by a crash is
+    retried after the restart.
+
+    The scheduler is not thread-safe; call it from the loop running ``run()``.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        journal_path: Optional[str] = None,
+        batch_size: int = 100,
+        concurrency: int = 10,
+        max_retries: int = 3,
+        retry_delay: float = 30.0,
+        retry_errors: Iterable[str] = DEFAULT_RETRY_ERRORS,
+        retry_codes: Iterable[int] = DEFAULT_RETRY_CODES,
+        sink: Optional[ResultSink] = None,
+        on_result: Optional[Callable[[int, Any], None]] = None,
+        **options: Any,
+    ) -> None:
+        """
+        :param client: Client used for sending
+        :param journal_path: JSON lines file persisting pending sends (optional)
+        :param batch_size: Maximum due sends taken from the heap at once (default: 100)
+        :param concurrency: In-flight requests within a batch (default: 10)
+        :param max_retries: Reschedules allowed per send after a rejection (default: 3)
+        :param retry_delay: First retry delay in seconds, doubled per attempt (default: 30)
+        :param retry_errors: Error types that trigger a reschedule (default: TIMEOUT, NETWORK_ERROR)
+        :param retry_codes: Error codes that trigger a reschedule (default: 429 and 5xx)
+        :param sink: ResultSink receiving a SendRecord per final outcome (optional)
+        :param on_result: Callback ``on_result(job_id, result)`` per final outcome (optional)
+        :param options: Extra ``send_message_async`` parameters; ``lean`` defaults to True
+        """
+        self.client = client
+        self.journal_path = journal_path
+        self.batch_size = max(1, batch_size)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.retry_errors = frozenset(retry_errors)
+        self.retry_codes = frozenset(retry_codes)
+        self.sink = sink
+        self.on_result = on_result
+        options.setdefault("lean", True)
+        self.options = options
+
+        self._heap: List[Tuple[float, int]] = []
+        self._jobs: Dict[int, _Job] = {}
+        # ارسال‌های دسته جاری؛ تا ثبت نتیجه در دفترچه باقی می‌مانند
+        self._in_flight: Dict[int, _Job] = {}
+        self._next_id = 1
+        self._stale = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+        self._journal: Any = None
+        self._journal_records = 0
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+        if journal_path is not None:
+            self._load_journal()
+        if hasattr(client, "attach"):
+            client.attach(self)
+
+    # -- heap -----------------------------------------------------------------
+
+    def _push(self, job_id: int, job: _Job) -> None:
+        if job_id in self._jobs:
+            self._stale += 1
+        self._jobs[job_id] = job
+        heapq.heappush(self._heap, (job[0], job_id))
+        if self._wakeup is not None and self._heap[0][1] == job_id:
+            self._wakeup.set()
+
+    def _is_live(self, entry: Tuple[float, int]) -> bool:
+        job = self._jobs.get(entry[1])
+        return job is not None and job[0] == entry[0]
+
+    def _peek(self) -> Optional[float]:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._stale -= 1
+        return self._heap[0][0] if self._heap else None
+
+    def _pop_due(self, now: float) -> List[Tuple[int, int, Dict[str, Any]]]:
+        batch = []
+        while len(batch) < self.batch_size:
+            due = self._peek()
+            if due is None or due > now:
+                break
+            _, job_id = heapq.heappop(self._heap)
+            job = self._in_flight[job_id] = self._jobs.pop(job_id)
+            batch.append((job_id, job[1], job[2]))
+        return batch
+
+    def _compact(self) -> None:
+        """Drop stale heap entries once they outnumber the live ones."""
+        if self._stale > 1024 and self._stale > len(self._jobs):
+            self._heap = [(job[0], job_id) for job_id, job in self._jobs.items()]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    # -- journal --------------------------------------------------------------
+
+    def _load_journal(self) -> None:
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # خط نیمه‌کاره آخر پس از crash
+                    job_id = entry["id"]
+                    self._next_id = max(self._next_id, job_id + 1)
+                    if entry["op"] == "add":
+                        self._jobs[job_id] = (entry["at"], entry["attempt"], entry["message"])
+                    else:
+                        self._jobs.pop(job_id, None)
+            self._heap = [(job[0], job_id) for job_id, job in self._jobs.items()]
+            heapq.heapify(self._heap)
+            logger.info(f"Restored {len(self._jobs)} scheduled sends from {self.journal_path}")
+        self._rewrite_journal()
+
+    def _rewrite_journal(self) -> None:
+        """Compact the journal to the pending and in-flight sends."""
+        if self._journal is not None:
+            self._journal.close()
+        jobs = {**self._in_flight, **self._jobs}
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for job_id, (at, attempt, message) in jobs.items():
+                fh.write(json.dumps({"op": "add", "id": job_id, "at": at, "attempt": attempt,
+                                     "message": message}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_records = len(jobs)
+
+    def _journal_write(self, entry: Dict[str, Any]) -> None:
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal_records += 1
+
+    def _journal_sync(self) -> None:
+        if self._journal is None:
+            return
+        if self._journal_records > 2 * (len(self._jobs) + len(self._in_flight)) + 10000:
+            self._rewrite_journal()
+        else:
+            self._journal.flush()
+
+    # -- public API -----------------------------------------------------------
+
+    def schedule(self, at: Union[datetime, float, int], chat_id: Union[int, str], text: str,
+                 **params: Any) -> int:
+        """
+        Schedule a message.
+
+        :param at: Release time (datetime or Unix timestamp)
+        :param chat_id: Unique identifier for the target chat or username
+        :param text: Text of the message to be sent
+        :param params: Other ``send_message_async`` parameters (title, pin, ...)
+        :return: Job id usable with ``cancel`` and ``reschedule``
+        """
+        message = {"chat_id": chat_id, "text": text}
+        message.update((k, v) for k, v in params.items() if v is not None)
+        job_id = self._next_id
+        self._next_id += 1
+        job = (_timestamp(at), 0, message)
+        self._push(job_id, job)
+        self._journal_write({"op": "add", "id": job_id, "at": job[0], "attempt": 0, "message": message})
+        self._journal_sync()
+        return job_id
+
+    def schedule_in(self, delay: float, chat_id: Union[int, str], text: str, **params: Any) -> int:
+        """Schedule a message ``delay`` seconds from now."""
+        return self.schedule(time.time() + delay, chat_id, text, **params)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a pending send; returns False if it is unknown or already sent."""
+        if self._jobs.pop(job_id, None) is None:
+            return False
+        self._stale += 1
+        self._compact()
+        self._journal_write({"op": "remove", "id": job_id})
+        self._journal_sync()
+        return True
+
+    def reschedule(self, job_id: int, at: Union[datetime, float, int]) -> bool:
+        """Move a pending send to a new release time."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job = (_timestamp(at), job[1], job[2])
+        self._push(job_id, job)
+        self._compact()
+        self._journal_write({"op": "add", "id": job_id, "at": job[0], "attempt": job[1], "message": job[2]})
+        self._journal_sync()
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Number of sends waiting for their release time."""
+        return len(self._jobs)
+
+    @property
+    def next_due(self) -> Optional[float]:
+        """Release time of the earliest pending send."""
+        return self._peek()
+
+    # -- dispatch -------------------------------------------------------------
+
+    def _should_retry(self, result: Any, attempt: int) -> bool:
+        return (
+            not result.ok
+            and attempt < self.max_retries
+            and (result.error_type in self.retry_errors or result.error_code in self.retry_codes)
+        )
+
+    async def _dispatch(self, batch: List[Tuple[int, int, Dict[str, Any]]]) -> None:
+        async def _send(item: Tuple[int, int, Dict[str, Any]]) -> Tuple[Any, ...]:
+            started = time.perf_counter()
+            result = await self.client.send_message_async(**{**self.options, **item[2]})
+            return item + (result, time.perf_counter() - started)
+
+        try:
+            async for job_id, attempt, message, result, latency in run_bounded(batch, _send, self.concurrency):
+                del self._in_flight[job_id]
+                if self._should_retry(result, attempt):
+                    self.retried += 1
+                    job = (time.time() + self.retry_delay * 2 ** attempt, attempt + 1, message)
+                    self._push(job_id, job)
+                    self._journal_write({"op": "add", "id": job_id, "at": job[0], "attempt": job[1],
+                                         "message": message})
+                    continue
+
+                if result.ok:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+                    logger.warning(f"Scheduled send {job_id} failed: {result.error_type}")
+                self._journal_write({"op": "remove", "id": job_id})
+                if self.sink is not None:
+                    self.sink.write(SendRecord.from_response(message["chat_id"], result, latency))
+                if self.on_result is not None:
+                    self.on_result(job_id, result)
+        finally:
+            # ارسال‌های بی‌نتیجه یک دسته قطع‌شده دوباره در صف قرار می‌گیرند
+            for job_id, job in self._in_flight.items():
+                self._push(job_id, job)
+            self._in_flight.clear()
+            self._journal_sync()
+
+    async def run(self, until_empty: bool = False) -> None:
+        """
+        Dispatch sends as they become due until ``stop()`` is called.
+
+        :param until_empty: Return once no sends are pending (default: False)
+        """
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+        try:
+            while not self._stopped:
+                now = time.time()
+                batch = self._pop_due(now)
+                if batch:
+                    await self._dispatch(batch)
+                    continue
+                due = self._peek()
+                if due is None and until_empty:
+                    return
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), None if due is None else due - now)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._wakeup = None
+            if self.sink is not None:
+                self.sink.flush()
+            if self._journal is not None:
+                self._journal.flush()
+
+    def stop(self) -> None:
+        """Make ``run()`` return after the batch in progress."""
+        self._stopped = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Stop dispatching after the batch in progress (waiting up to ``timeout``)
+        and report the sends left pending. Called by ``Client.shutdown``.
+
+        Pending sends are only counted as abandoned without a journal; with one
+        they are sent after the next start.
+        """
+        self.stop()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self._wakeup is not None and (deadline is None or time.monotonic() < deadline):
+            await asyncio.sleep(0.01)
+        if self._journal is not None:
+            self._journal.flush()
+        persisted = self._journal is not None
+        return {
+            "component": type(self).__name__,
+            "pending": len(self._jobs),
+            "persisted": persisted,
+            "abandoned": 0 if persisted else len(self._jobs),
+        }
+
+    def close(self) -> None:
+        """Close the journal file."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pending, sent, failed and retried counts."""
+        return {
+            "pending": len(self._jobs),
+            "heap_size": len(self._heap),
+            "next_due": self._peek(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+
+__all__ = ['MessageScheduler']
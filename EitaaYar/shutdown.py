@@ -0,0 +1,67 @@
+"""
+Graceful shutdown support for ``Client``.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List
+
+
+class RequestGate:
+    """
+    Count requests in flight and refuse new ones once closed.
+
+    Shared by the sync and async paths, so it is guarded by a lock.
+    """
+
+    __slots__ = ("closed", "in_flight", "completed", "interrupted", "rejected", "_lock")
+
+    def __init__(self) -> None:
+        self.closed = False
+        self.in_flight = 0
+        self.completed = 0
+        self.interrupted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> bool:
+        """Admit a request; False once the gate is closed."""
+        with self._lock:
+            if self.closed:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self, completed: bool) -> None:
+        """Release a request; ``completed`` is False if it was cancelled or raised."""
+        with self._lock:
+            self.in_flight -= 1
+            if completed:
+                self.completed += 1
+            else:
+                self.interrupted += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self.closed = True
+
+    def open(self) -> None:
+        """Admit requests again after ``close``."""
+        with self._lock:
+            self.closed = False
+
+
+@dataclass
+class ShutdownReport:
+    """Outcome of ``Client.shutdown``."""
+    completed: int
+    abandoned: int
+    rejected: int
+    timed_out: bool
+    duration: float
+    components: List[Dict[str, Any]] = field(default_factory=list)
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+__all__ = ['ShutdownReport', 'RequestGate']
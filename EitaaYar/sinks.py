@@ -0,0 +1,216 @@
+"""
+Compact result sinks for bulk sends.
+
+Instead of keeping a ``Response`` per send, bulk operations can write a small
+``SendRecord`` to a sink that buffers records and writes them in batches.
+"""
+
+import csv
+import json
+import sqlite3
+from typing import Optional, Any, List, NamedTuple, Union
+
+from .results import LeanResult
+
+
+class SendRecord(NamedTuple):
+    """Compact outcome of a single send."""
+    chat_id: Union[int, str]
+    ok: bool
+    message_id: Optional[int] = None
+    error_type: Optional[str] = None
+    error_code: Optional[int] = None
+    latency: float = 0.0
+
+    @classmethod
+    def from_response(cls, chat_id: Union[int, str], response: Any, latency: float = 0.0) -> "SendRecord":
+        """
+        Build a record from a Response or LeanResult.
+
+        :param chat_id: Target chat of the send
+        :param response: Response returned by the client
+        :param latency: Send duration in seconds
+        """
+        if isinstance(response, LeanResult):
+            message_id = response.message_id
+        else:
+            result = response.result
+            if isinstance(result, dict):
+                message_id = result.get("message_id")
+            else:
+                message_id = getattr(result, "message_id", None)
+        return cls(
+            chat_id=chat_id,
+            ok=bool(response.ok),
+            message_id=message_id,
+            error_type=response.error_type,
+            error_code=response.error_code,
+            latency=round(latency, 6),
+        )
+
+
+class ResultSink:
+    """
+    Base class for buffered result sinks.
+
+    Subclasses implement ``_write_batch``; records are buffered and written
+    every ``batch_size`` records, on ``flush()`` and on ``close()``.
+    """
+
+    def __init__(self, batch_size: int = 500) -> None:
+        """
+        :param batch_size: Number of records buffered before a write (default: 500)
+        """
+        self.batch_size = max(1, batch_size)
+        self.written = 0
+        self._buffer: List[SendRecord] = []
+        self._closed = False
+
+    def write(self, record: SendRecord) -> None:
+        """Buffer a record, writing the batch when it is full."""
+        if self._closed:
+            raise ValueError("I/O operation on closed sink")
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered records."""
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._write_batch(batch)
+            self.written += len(batch)
+
+    def close(self) -> None:
+        """Flush remaining records and release the underlying resource."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._close()
+
+    def _write_batch(self, records: List[SendRecord]) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class MemorySink(ResultSink):
+    """Sink that keeps records in a list (useful for tests and small runs)."""
+
+    def __init__(self, batch_size: int = 1) -> None:
+        super().__init__(batch_size)
+        self.records: List[SendRecord] = []
+
+    def _write_batch(self, records: List[SendRecord]) -> None:
+        self.records.extend(records)
+
+
+class JSONLSink(ResultSink):
+    """Sink writing one JSON object per line."""
+
+    def __init__(self, path: str, batch_size: int = 500, append: bool = True) -> None:
+        """
+        :param path: Output file path
+        :param batch_size: Number of records buffered before a write (default: 500)
+        :param append: Append to an existing file instead of truncating (default: True)
+        """
+        super().__init__(batch_size)
+        self.path = path
+        self._fh = open(path, "a" if append else "w", encoding="utf-8")
+
+    def _write_batch(self, records: List[SendRecord]) -> None:
+        self._fh.write("".join(json.dumps(r._asdict(), ensure_ascii=False) + "\n" for r in records))
+        self._fh.flush()
+
+    def _close(self) -> None:
+        self._fh.close()
+
+
+class CSVSink(ResultSink):
+    """Sink writing records as CSV rows with a header line."""
+
+    def __init__(self, path: str, batch_size: int = 500, append: bool = True) -> None:
+        """
+        :param path: Output file path
+        :param batch_size: Number of records buffered before a write (default: 500)
+        :param append: Append to an existing file instead of truncating (default: True)
+        """
+        super().__init__(batch_size)
+        self.path = path
+        self._fh = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fh)
+        if self._fh.tell() == 0:
+            self._writer.writerow(SendRecord._fields)
+
+    def _write_batch(self, records: List[SendRecord]) -> None:
+        self._writer.writerows(records)
+        self._fh.flush()
+
+    def _close(self) -> None:
+        self._fh.close()
+
+
+class SQLiteSink(ResultSink):
+    """Sink inserting records into an SQLite table, one transaction per batch."""
+
+    def __init__(self, path: str, batch_size: int = 500, table: str = "send_results") -> None:
+        """
+        :param path: SQLite database path
+        :param batch_size: Number of records buffered before a write (default: 500)
+        :param table: Table name (default: send_results)
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        super().__init__(batch_size)
+        self.path = path
+        self.table = table
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "chat_id TEXT, ok INTEGER, message_id INTEGER, "
+            "error_type TEXT, error_code INTEGER, latency REAL)"
+        )
+        self._conn.commit()
+
+    def _write_batch(self, records: List[SendRecord]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO {self.table} VALUES (?, ?, ?, ?, ?, ?)",
+                [(str(r.chat_id), int(r.ok), r.message_id, r.error_type, r.error_code, r.latency)
+                 for r in records],
+            )
+
+    def _close(self) -> None:
+        self._conn.close()
+
+
+def open_sink(path: str, batch_size: int = 500) -> ResultSink:
+    """
+    Open a sink chosen by file extension (.jsonl, .csv, .db/.sqlite/.sqlite3).
+
+    :param path: Output file path
+    :param batch_size: Number of records buffered before a write (default: 500)
+    """
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return CSVSink(path, batch_size)
+    if lowered.endswith((".db", ".sqlite", ".sqlite3")):
+        return SQLiteSink(path, batch_size)
+    if lowered.endswith((".jsonl", ".json", ".ndjson")):
+        return JSONLSink(path, batch_size)
+    raise ValueError(f"Cannot infer sink type from path: {path}")
+
+
+__all__ = [
+    'SendRecord', 'ResultSink', 'MemorySink', 'JSONLSink', 'CSVSink', 'SQLiteSink', 'open_sink',
+]
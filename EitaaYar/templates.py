@@ -0,0 +1,122 @@
+"""
+Precompiled message templates for personalized bulk sends.
+"""
+
+import csv
+import json
+from string import Formatter
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+# هر قطعه: (متن ثابت، نام فیلد، format_spec، conversion)
+_Chunk = Tuple[str, Optional[str], str, Optional[str]]
+
+
+def _compile(source: str) -> List[_Chunk]:
+    """Split a ``str.format`` style template into literal/field chunks."""
+    chunks: List[_Chunk] = []
+    for literal, field, spec, conversion in Formatter().parse(source):
+        if field == "":
+            raise ValueError("Positional fields are not supported in templates")
+        chunks.append((literal, field, spec or "", conversion))
+    return chunks
+
+
+def _render(chunks: List[_Chunk], row: Any) -> str:
+    """Render compiled chunks against a single row of variables."""
+    parts = []
+    for literal, field, spec, conversion in chunks:
+        if literal:
+            parts.append(literal)
+        if field is None:
+            continue
+        value = row[field]
+        if conversion == "r":
+            value = repr(value)
+        elif conversion == "s":
+            value = str(value)
+        elif conversion == "a":
+            value = ascii(value)
+        parts.append(format(value, spec) if spec else str(value))
+    return "".join(parts)
+
+
+class MessageTemplate:
+    """
+    Message template parsed once and rendered per recipient.
+
+    Placeholders use ``str.format`` syntax (``"سلام {name}"``) and are looked up
+    by key on each row, so ``dict``, ``csv.DictReader`` rows and ``sqlite3.Row``
+    all work as variable sources.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        title: Optional[str] = None,
+        chat_id_field: str = "chat_id",
+    ) -> None:
+        """
+        :param text: Template for the message text
+        :param title: Template for the message title (optional)
+        :param chat_id_field: Row key holding the recipient chat id (default: chat_id)
+        """
+        self.text = text
+        self.title = title
+        self.chat_id_field = chat_id_field
+        self._text_chunks = _compile(text)
+        self._title_chunks = _compile(title) if title is not None else None
+
+    @property
+    def fields(self) -> List[str]:
+        """Names of all placeholders used by the template."""
+        names = [c[1] for c in self._text_chunks if c[1] is not None]
+        if self._title_chunks:
+            names.extend(c[1] for c in self._title_chunks if c[1] is not None)
+        return list(dict.fromkeys(names))
+
+    def render(self, row: Any) -> Dict[str, Any]:
+        """
+        Render the template for one row.
+
+        :param row: Mapping of template variables, including the chat id field
+        :return: Keyword arguments for ``Client.send_message`` (chat_id, text, title)
+        """
+        message = {
+            "chat_id": row[self.chat_id_field],
+            "text": _render(self._text_chunks, row),
+        }
+        if self._title_chunks is not None:
+            message["title"] = _render(self._title_chunks, row)
+        return message
+
+    def __repr__(self) -> str:
+        return f"MessageTemplate(fields={self.fields})"
+
+
+def rows_from_csv(path: str, encoding: str = "utf-8", **reader_options: Any) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield rows of a CSV file with a header line.
+
+    :param path: Path to the CSV file
+    :param encoding: File encoding (default: utf-8)
+    :param reader_options: Extra options for ``csv.DictReader`` (e.g. delimiter)
+    """
+    with open(path, newline="", encoding=encoding) as fh:
+        for row in csv.DictReader(fh, **reader_options):
+            yield row
+
+
+def rows_from_jsonl(path: str, encoding: str = "utf-8") -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield objects of a JSON Lines file, skipping blank lines.
+
+    :param path: Path to the JSONL file
+    :param encoding: File encoding (default: utf-8)
+    """
+    with open(path, encoding=encoding) as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+__all__ = ['MessageTemplate', 'rows_from_csv', 'rows_from_jsonl']
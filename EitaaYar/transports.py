@@ -0,0 +1,377 @@
+"""
+HTTP transports used underneath ``Client``.
+
+A transport moves one encoded API request to the server and returns the raw
+reply. The client keeps everything else (request building, rate limiting,
+JSON decoding and ``Response`` parsing), so swapping the transport swaps only
+the I/O:
+
+* ``HTTPTransport`` - the default; aiohttp for async calls, requests for sync ones
+* ``AiohttpTransport`` / ``RequestsTransport`` - the two halves on their own
+* ``MemoryTransport`` - canned replies with zero I/O, for tests and overhead benchmarks
+* ``RecordingTransport`` / ``ReplayTransport`` - capture real traffic to a file and play it back
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Deque, NamedTuple, Union
+
+import aiohttp
+import requests
+
+logger = logging.getLogger('eitaayar.transport')
+
+
+class TransportRequest(NamedTuple):
+    """One encoded API request."""
+    method: str
+    url: str
+    headers: Dict[str, str]
+    params: Optional[Dict[str, Any]] = None
+    data: Optional[Dict[str, Any]] = None
+    files: Optional[Dict[str, Any]] = None
+    body: Optional[bytes] = None
+    timeout: float = 30
+
+
+class TransportResponse:
+    """
+    Raw reply of a transport.
+
+    Mirrors the parts of ``requests.Response`` the client reads
+    (``status_code``, ``content`` and ``json()``), so ``RequestsTransport`` can
+    return the requests object as-is.
+    """
+
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, status_code: int, content: bytes) -> None:
+        self.status_code = status_code
+        self.content = content
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class TransportError(Exception):
+    """Network-level failure of a request (no API answer was received)."""
+
+    def __init__(self, message: str, code: int = 503) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class TransportTimeout(TransportError):
+    """The request did not complete within its timeout."""
+
+    def __init__(self, message: str = "Request timeout", code: int = 408) -> None:
+        super().__init__(message, code)
+
+
+class Transport:
+    """
+    Base class of client transports.
+
+    ``request`` serves the sync client methods and ``request_async`` the async
+    ones; a transport may implement only one of them.
+    """
+
+    def request(self, request: TransportRequest) -> Any:
+        """Send a request synchronously and return its reply."""
+        raise NotImplementedError(f"{type(self).__name__} does not support synchronous requests")
+
+    async def request_async(self, request: TransportRequest) -> Any:
+        """Send a request asynchronously and return its reply."""
+        raise NotImplementedError(f"{type(self).__name__} does not support asynchronous requests")
+
+    def close(self) -> None:
+        """Release resources used by synchronous requests."""
+
+    async def close_async(self) -> None:
+        """Release all resources."""
+        self.close()
+
+
+class AiohttpTransport(Transport):
+    """Async transport on a lazily created ``aiohttp.ClientSession``."""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        :param headers: Default headers of the session (optional)
+        """
+        self.headers = headers
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None:
+            self.session = aiohttp.ClientSession(headers=self.headers)
+            logger.debug("aiohttp session created")
+        return self.session
+
+    @staticmethod
+    def form_data(request: TransportRequest) -> aiohttp.FormData:
+        """Build the multipart form of a request with ``files``."""
+        form_data = aiohttp.FormData()
+        for key, value in (request.data or {}).items():
+            form_data.add_field(key, str(value))
+        for key, file_info in request.files.items():
+            if isinstance(file_info, tuple):
+                form_data.add_field(
+                    key,
+                    file_info[1],
+                    filename=file_info[0],
+                    content_type=file_info[2] if len(file_info) > 2 else None
+                )
+            else:
+                form_data.add_field(key, file_info)
+        return form_data
+
+    async def request_async(self, request: TransportRequest) -> TransportResponse:
+        session = self._get_session()
+        options: Dict[str, Any] = {"timeout": request.timeout, "headers": request.headers}
+        if request.body is not None:
+            options.update(data=request.body, params=request.params)
+        elif request.files:
+            options["data"] = self.form_data(request)
+        else:
+            options.update(json=request.data, params=request.params)
+
+        try:
+            async with session.post(request.url, **options) as response:
+                # بدنه کامل خوانده می‌شود تا اتصال keep-alive قابل استفاده مجدد بماند
+                return TransportResponse(response.status, await response.read())
+        except aiohttp.ClientError as e:
+            raise TransportError(f"Network error: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise TransportTimeout() from e
+
+    async def close_async(self) -> None:
+        if self.session is not None:
+            try:
+                await self.session.close()
+                logger.debug("aiohttp session closed")
+            finally:
+                self.session = None
+
+
+class RequestsTransport(Transport):
+    """
+    Sync transport on ``requests``.
+
+    Uses ``requests.post`` until ``open_session`` creates a pooled keep-alive
+    session (done by the threaded bulk methods).
+    """
+
+    def __init__(self) -> None:
+        self.session: Optional[requests.Session] = None
+
+    def open_session(self, pool_size: int = 10) -> requests.Session:
+        """Create (once) a pooled keep-alive session."""
+        if self.session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.session = session
+            logger.debug(f"requests session created (pool size {pool_size})")
+        return self.session
+
+    def request(self, request: TransportRequest) -> requests.Response:
+        post = self.session.post if self.session is not None else requests.post
+        try:
+            if request.body is not None:
+                return post(request.url, data=request.body, params=request.params,
+                            headers=request.headers, timeout=request.timeout)
+            if request.files:
+                return post(request.url, data=request.data, files=request.files,
+                            timeout=request.timeout, headers=request.headers)
+            return post(request.url, json=request.data, params=request.params,
+                        headers=request.headers, timeout=request.timeout)
+        except requests.exceptions.Timeout as e:
+            raise TransportTimeout() from e
+        except requests.exceptions.RequestException as e:
+            raise TransportError(f"Network error: {e}") from e
+
+    def close(self) -> None:
+        if self.session is not None:
+            try:
+                self.session.close()
+                logger.debug("requests session closed")
+            finally:
+                self.session = None
+
+
+class HTTPTransport(Transport):
+    """Default transport: aiohttp for async requests, requests for sync ones."""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        :param headers: Default headers of the aiohttp session (optional)
+        """
+        self.async_transport = AiohttpTransport(headers)
+        self.sync_transport = RequestsTransport()
+
+    def request(self, request: TransportRequest) -> Any:
+        return self.sync_transport.request(request)
+
+    async def request_async(self, request: TransportRequest) -> Any:
+        return await self.async_transport.request_async(request)
+
+    def close(self) -> None:
+        self.sync_transport.close()
+
+    async def close_async(self) -> None:
+        self.sync_transport.close()
+        await self.async_transport.close_async()
+
+
+def _encode_reply(reply: Union[Dict[str, Any], bytes, str], status_code: int = 200) -> TransportResponse:
+    if isinstance(reply, dict):
+        reply = json.dumps(reply, ensure_ascii=False)
+    if isinstance(reply, str):
+        reply = reply.encode("utf-8")
+    return TransportResponse(status_code, reply)
+
+
+class MemoryTransport(Transport):
+    """
+    Zero-I/O transport answering from canned replies.
+
+    Replies are registered per API method and served in order; the last one
+    keeps being returned once the others are used up. Methods without replies
+    get ``default`` (a "method not found" error unless given). Replies are
+    encoded once, so a benchmark measures only the client's own work.
+    """
+
+    def __init__(
+        self,
+        replies: Optional[Dict[str, Any]] = None,
+        default: Optional[Union[Dict[str, Any], bytes, str]] = None,
+        keep_requests: int = 100,
+    ) -> None:
+        """
+        :param replies: API method -> reply payload (dict, JSON bytes/str) or list of payloads (optional)
+        :param default: Reply for methods without registered replies (optional)
+        :param keep_requests: Number of recent requests kept in ``requests`` (default: 100)
+        """
+        self._replies: Dict[str, Deque[TransportResponse]] = {}
+        self.default = _encode_reply(
+            default if default is not None else {"ok": False, "error": "Method not found", "error_code": 404}
+        )
+        self.requests: Deque[TransportRequest] = deque(maxlen=keep_requests)
+        self.count = 0
+        self._lock = threading.Lock()
+        for method, reply in (replies or {}).items():
+            for item in (reply if isinstance(reply, list) else [reply]):
+                self.add(method, item)
+
+    def add(self, method: str, reply: Union[Dict[str, Any], bytes, str], status_code: int = 200) -> None:
+        """Queue a reply for an API method."""
+        self._replies.setdefault(method, deque()).append(_encode_reply(reply, status_code))
+
+    def _reply(self, request: TransportRequest) -> TransportResponse:
+        with self._lock:
+            self.count += 1
+            self.requests.append(request)
+            queue = self._replies.get(request.method)
+            if not queue:
+                return self.default
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def request(self, request: TransportRequest) -> TransportResponse:
+        return self._reply(request)
+
+    async def request_async(self, request: TransportRequest) -> TransportResponse:
+        return self._reply(request)
+
+
+class RecordingTransport(Transport):
+    """
+    Pass requests to another transport and append every exchange to a JSON
+    lines file that ``ReplayTransport`` can serve later.
+
+    The URL (which contains the token) and file contents are never written.
+    """
+
+    def __init__(self, path: str, transport: Optional[Transport] = None, record_requests: bool = True) -> None:
+        """
+        :param path: JSON lines file the exchanges are appended to
+        :param transport: Transport doing the real I/O (default: HTTPTransport)
+        :param record_requests: Also store request params and fields (default: True)
+        """
+        self.path = path
+        self.transport = transport if transport is not None else HTTPTransport()
+        self.record_requests = record_requests
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def _record(self, request: TransportRequest, reply: Any) -> None:
+        entry: Dict[str, Any] = {
+            "method": request.method,
+            "status": reply.status_code,
+            "reply": reply.content.decode("utf-8", "replace"),
+        }
+        if self.record_requests:
+            entry["request"] = {
+                "params": request.params,
+                "data": request.data,
+                "files": sorted(request.files) if request.files else None,
+                "body_size": len(request.body) if request.body is not None else None,
+            }
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file.closed:
+                # کلاینت پس از بستن دوباره استفاده شده؛ فایل از نو باز می‌شود
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def request(self, request: TransportRequest) -> Any:
+        reply = self.transport.request(request)
+        self._record(request, reply)
+        return reply
+
+    async def request_async(self, request: TransportRequest) -> Any:
+        reply = await self.transport.request_async(request)
+        self._record(request, reply)
+        return reply
+
+    def _close_file(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def close(self) -> None:
+        self.transport.close()
+        self._close_file()
+
+    async def close_async(self) -> None:
+        await self.transport.close_async()
+        self._close_file()
+
+
+class ReplayTransport(MemoryTransport):
+    """Serve the replies captured by ``RecordingTransport``, per API method in recorded order."""
+
+    def __init__(self, path: str, default: Optional[Union[Dict[str, Any], bytes, str]] = None,
+                 keep_requests: int = 100) -> None:
+        """
+        :param path: File written by RecordingTransport
+        :param default: Reply for methods that were not recorded (optional)
+        :param keep_requests: Number of recent requests kept in ``requests`` (default: 100)
+        """
+        super().__init__(default=default, keep_requests=keep_requests)
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.add(entry["method"], entry["reply"], entry["status"])
+
+
+__all__ = [
+    'Transport', 'TransportRequest', 'TransportResponse', 'TransportError', 'TransportTimeout',
+    'HTTPTransport', 'AiohttpTransport', 'RequestsTransport', 'MemoryTransport',
+    'RecordingTransport', 'ReplayTransport',
+]
@@ -0,0 +1,62 @@
+"""
+Pure client overhead per call, measured on MemoryTransport (no I/O).
+
+    python benchmarks/bench_client_overhead.py [ITERATIONS]
+
+The prebuilt case includes encoding its JSON body; the other cases leave
+JSON encoding to the real transport, which MemoryTransport skips.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# اجرای مستقیم از مخزن بدون نصب | Run from a checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EitaaYar import Client, MemoryTransport, OutgoingMessage
+
+REPLY = {
+    "ok": True,
+    "result": {
+        "message_id": 321,
+        "from": {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"},
+        "chat": {"id": 5, "type": "private", "username": "ali"},
+        "date": 1700000000,
+        "text": "سلام! این یک پیام آزمایشی است.",
+    },
+}
+
+
+def bench_sync(client, n, lean):
+    started = time.perf_counter()
+    for i in range(n):
+        client.send_message(i, "سلام! این یک پیام آزمایشی است.", lean=lean)
+    return (time.perf_counter() - started) / n * 1e9
+
+
+def bench_async(client, n, lean):
+    async def run():
+        started = time.perf_counter()
+        for i in range(n):
+            await client.send_message_async(i, "سلام! این یک پیام آزمایشی است.", lean=lean)
+        return (time.perf_counter() - started) / n * 1e9
+    return asyncio.run(run())
+
+
+def bench_prebuilt(client, n, lean):
+    message = OutgoingMessage(0, "سلام! این یک پیام آزمایشی است.")
+    started = time.perf_counter()
+    for i in range(n):
+        client.send(message.with_chat_id(i), lean=lean)
+    return (time.perf_counter() - started) / n * 1e9
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    client = Client("bench", transport=MemoryTransport({"sendMessage": REPLY}, keep_requests=1))
+    for name, bench in (("sync", bench_sync), ("async", bench_async), ("prebuilt", bench_prebuilt)):
+        for lean in (False, True):
+            label = f"{name} {'lean' if lean else 'full'}"
+            print(f"{label:<14} {bench(client, n, lean):10.0f} ns/op")
@@ -0,0 +1,58 @@
+"""
+CPU and allocation comparison of full Response parsing vs LeanResult.
+
+    python benchmarks/bench_lean_results.py [ITERATIONS]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# اجرای مستقیم از مخزن بدون نصب | Run from a checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EitaaYar import Response, LeanResult
+
+RAW = json.dumps({
+    "ok": True,
+    "result": {
+        "message_id": 321,
+        "from": {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"},
+        "chat": {"id": 5, "type": "private", "username": "ali"},
+        "date": 1700000000,
+        "text": "سلام! این یک پیام آزمایشی است.",
+    },
+}).encode()
+
+
+def full(raw):
+    return Response(json.loads(raw), False)
+
+
+def lean(raw):
+    return LeanResult.from_payload(json.loads(raw))
+
+
+def measure(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(RAW)
+    ns_per_op = (time.perf_counter() - started) / iterations * 1e9
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [func(RAW) for _ in range(1000)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    bytes_per_op = sum(s.size_diff for s in stats) / len(kept)
+    return ns_per_op, bytes_per_op
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, func in (("Response", full), ("LeanResult", lean)):
+        ns, size = measure(func, n)
+        print(f"{name:<12} {ns:10.0f} ns/op  {size:8.0f} bytes retained/op")
@@ -0,0 +1,56 @@
+"""
+Throughput of ProcessBroadcaster by worker count with a CPU-bound fake API.
+
+Each fake request JSON-encodes the payload and parses a full response, so a
+single process saturates one core the way real campaigns do.
+
+    python benchmarks/bench_process_broadcast.py [RECIPIENTS]
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+
+# اجرای مستقیم از مخزن بدون نصب | Run from a checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EitaaYar import Client, MessageTemplate, ProcessBroadcaster, LeanResult
+
+RAW = json.dumps({
+    "ok": True,
+    "result": {
+        "message_id": 321,
+        "from": {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"},
+        "chat": {"id": 5, "type": "private", "username": "ali"},
+        "date": 1700000000,
+        "text": "سلام! این یک پیام آزمایشی است.",
+    },
+}).encode()
+
+
+async def cpu_bound_request(client, method, params=None, data=None, files=None, **kwargs):
+    for _ in range(20):
+        json.dumps(data, ensure_ascii=False).encode()
+        payload = json.loads(RAW)
+    return LeanResult.from_payload(payload)
+
+
+def run(recipients, workers):
+    Client._aiohttp_request = cpu_bound_request
+    rows = ({"chat_id": i, "name": f"user{i}"} for i in range(recipients))
+    broadcaster = ProcessBroadcaster(
+        "bench", rows, template=MessageTemplate("سلام {name}! کد تخفیف شما: {chat_id:08d}"),
+        workers=workers, concurrency=50, batch_size=500,
+        mp_context=multiprocessing.get_context("fork"),
+    )
+    return broadcaster.run()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    baseline = None
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        result = run(n, workers)
+        baseline = baseline or result.throughput
+        print(f"workers={workers:<3} {result.throughput:10,.0f} msg/s  x{result.throughput / baseline:.2f}")
@@ -0,0 +1,59 @@
+"""
+Memory benchmark for templated bulk sends.
+
+Streams N generated recipient rows through ``MessageTemplate`` and
+``Client.send_message_many_async`` against an instant fake API and reports
+traced memory every 10% of the run. Memory should stay flat regardless of N.
+
+    python benchmarks/bench_template_broadcast.py [N] [CONCURRENCY]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+# اجرای مستقیم از مخزن بدون نصب | Run from a checkout without installing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EitaaYar import Client, Response, MessageTemplate
+
+
+class _FakeApiClient(Client):
+    """Client whose HTTP layer answers instantly without network I/O."""
+
+    async def _aiohttp_request(self, method, params=None, data=None, files=None, **kwargs):
+        return Response({"ok": True, "result": {"message_id": 1, "text": data["text"]}}, False)
+
+
+def _rows(count):
+    for i in range(count):
+        yield {"chat_id": 1000000 + i, "name": f"user{i}", "code": i % 9973}
+
+
+async def main(count: int, concurrency: int) -> None:
+    client = _FakeApiClient("bench_token")
+    template = MessageTemplate("سلام {name}! کد تخفیف شما: {code:05d}", title="{name}")
+    step = max(count // 10, 1)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    sent = 0
+    async for _chat_id, _response in client.send_message_many_async(
+        _rows(count), template=template, concurrency=concurrency
+    ):
+        sent += 1
+        if sent % step == 0:
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"{sent:>10,} sent  current={current / 1024:8.1f} KiB  peak={peak / 1024:8.1f} KiB")
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    print(f"{sent:,} messages in {elapsed:.1f}s ({sent / elapsed:,.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    c = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(main(n, c))
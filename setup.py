@@ -37,6 +37,11 @@ setup(
         "aiohttp>=3.8.0",
         "requests>=2.28.0",
     ],
+    entry_points={
+        "console_scripts": [
+            "eitaayar=EitaaYar.cli:main",
+        ],
+    },
     keywords="eitaayar, eitaa, api, client, bot, messaging, iran",
     project_urls={
         "Homepage": "https://github.com/Ali-Nabi-Pour/Eitaayar",
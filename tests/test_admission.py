@@ -0,0 +1,110 @@
+"""
+Unit tests for admission control in front of the EitaaYar async send path
+"""
+
+import asyncio
+import unittest
+from eitaayar import AdmissionQueue, LeanResult, MemorySink
+
+
+class FakeClient:
+    """Client stand-in whose sends wait for a gate"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.sent = []
+
+    async def send_message_async(self, chat_id, text, priority=None, **kwargs):
+        await self.gate.wait()
+        self.sent.append((priority, chat_id))
+        return LeanResult(True, chat_id, None, None)
+
+
+class TestAdmissionQueue(unittest.TestCase):
+    """Test backpressure and shedding policies"""
+
+    def test_block_applies_backpressure(self):
+        """Test that put waits while the queue is full"""
+        async def scenario():
+            client = FakeClient()
+            sink = MemorySink()
+            queue = AdmissionQueue(client, maxsize=2, workers=1, sink=sink)
+            for i in range(3):  # یکی در حال ارسال، دو تا در صف
+                self.assertTrue(await queue.put(i, "hi"))
+            blocked = asyncio.ensure_future(queue.put(3, "hi"))
+            await asyncio.sleep(0.01)
+            self.assertFalse(blocked.done())
+
+            client.gate.set()
+            self.assertTrue(await blocked)
+            await queue.join()
+            await queue.close()
+            return client.sent, sink.records, queue.metrics()
+
+        sent, records, metrics = asyncio.run(scenario())
+        self.assertEqual([chat_id for _, chat_id in sent], [0, 1, 2, 3])
+        self.assertEqual(len(records), 4)
+        self.assertEqual(metrics["sent"], 4)
+        self.assertEqual(metrics["shed"], 0)
+
+    def test_reject_newest(self):
+        """Test that new sends are rejected when the queue is full"""
+        async def scenario():
+            client = FakeClient()
+            shed = []
+            queue = AdmissionQueue(client, maxsize=1, workers=1, policy="reject_newest",
+                                   on_shed=lambda item, reason: shed.append((item.message["chat_id"], reason)))
+            results = [await queue.put(0, "hi")]
+            await asyncio.sleep(0)  # کارگر اولی را برمی‌دارد
+            results += [await queue.put(i, "hi") for i in range(1, 4)]
+            client.gate.set()
+            await queue.close()
+            return results, shed, queue.metrics()
+
+        results, shed, metrics = asyncio.run(scenario())
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(shed, [(2, "rejected"), (3, "rejected")])
+        self.assertEqual(metrics["rejected"], 2)
+        self.assertEqual(metrics["sent"], 2)
+
+    def test_drop_oldest_by_priority(self):
+        """Test that bulk sends are dropped to admit more important ones"""
+        async def scenario():
+            client = FakeClient()
+            queue = AdmissionQueue(client, maxsize=2, workers=1, policy="drop_oldest")
+            await queue.put(0, "running", priority="bulk")
+            await asyncio.sleep(0)
+            await queue.put(1, "old bulk", priority="bulk")
+            await queue.put(2, "normal")
+            self.assertTrue(await queue.put(3, "urgent", priority="urgent"))
+            self.assertFalse(await queue.put(4, "bulk", priority="bulk"))
+            client.gate.set()
+            await queue.close()
+            return client.sent, queue.metrics()
+
+        sent, metrics = asyncio.run(scenario())
+        self.assertEqual(sent, [("bulk", 0), ("urgent", 3), ("normal", 2)])
+        self.assertEqual(metrics["dropped"], 1)
+        self.assertEqual(metrics["rejected"], 1)
+
+    def test_deadline_expiry(self):
+        """Test that sends waiting past their deadline are not sent"""
+        async def scenario():
+            client = FakeClient()
+            queue = AdmissionQueue(client, maxsize=10, workers=1, max_wait=0.01)
+            await queue.put(0, "first")
+            await asyncio.sleep(0)
+            await queue.put(1, "stale")
+            await queue.put(2, "fresh", deadline=60)
+            await asyncio.sleep(0.03)
+            client.gate.set()
+            await queue.close()
+            return client.sent, queue.metrics()
+
+        sent, metrics = asyncio.run(scenario())
+        self.assertEqual([chat_id for _, chat_id in sent], [0, 2])
+        self.assertEqual(metrics["expired"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
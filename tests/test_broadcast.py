@@ -0,0 +1,92 @@
+"""
+Unit tests for the multi-process broadcaster in EitaaYar
+"""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from eitaayar import Client, LeanResult, MessageTemplate, MemorySink, ProcessBroadcaster, SharedTokenBucket
+from eitaayar.broadcast import split_rate, batched, merge_metrics
+
+
+async def _fake_request(client, method, params=None, data=None, files=None, **kwargs):
+    if data["chat_id"] == 13:
+        return LeanResult(False, None, 400, "CHAT_NOT_FOUND")
+    return LeanResult(True, data["chat_id"], None, None)
+
+
+async def _fake_send(client, method, params=None, data=None, *args):
+    return await _fake_request(client, method, params, data)
+
+
+class TestHelpers(unittest.TestCase):
+    """Test the pure sharding and merging helpers"""
+
+    def test_split_rate(self):
+        """Test that the global rate is divided among workers"""
+        self.assertEqual(split_rate(30, 3), [10.0, 10.0, 10.0])
+        self.assertEqual(split_rate(None, 2), [None, None])
+        with self.assertRaises(ValueError):
+            split_rate(10, 0)
+
+    def test_batched(self):
+        """Test batching of a lazy iterable"""
+        self.assertEqual(list(batched(iter(range(5)), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched([], 3)), [])
+
+    def test_merge_metrics(self):
+        """Test that worker metrics are summed"""
+        merged = merge_metrics([
+            {"worker": 1, "sent": 5, "failed": 1, "errors": {"TIMEOUT": 1}, "elapsed": 2.0},
+            {"worker": 0, "sent": 3, "failed": 2, "errors": {"TIMEOUT": 1, "FORBIDDEN": 1}, "elapsed": 1.0},
+        ])
+        self.assertEqual(merged["sent"], 8)
+        self.assertEqual(merged["failed"], 3)
+        self.assertEqual(merged["errors"], {"TIMEOUT": 2, "FORBIDDEN": 1})
+        self.assertEqual(merged["elapsed"], 2.0)
+        self.assertEqual(merged["throughput"], 5.5)
+        self.assertEqual([m["worker"] for m in merged["per_worker"]], [0, 1])
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires fork")
+class TestProcessBroadcaster(unittest.TestCase):
+    """Test a broadcast over real worker processes"""
+
+    def test_template_broadcast(self):
+        """Test that every recipient is sent once and results reach the parent"""
+        rows = ({"chat_id": i, "name": f"user{i}"} for i in range(50))
+        sink = MemorySink()
+        broadcaster = ProcessBroadcaster(
+            "test_token", rows, template=MessageTemplate("Hi {name}"), workers=3,
+            batch_size=7, rate=10000, sink=sink, mp_context=multiprocessing.get_context("fork"),
+        )
+        with patch.object(Client, "_aiohttp_request", new=_fake_request):
+            result = broadcaster.run()
+
+        self.assertEqual(sorted(r.chat_id for r in sink.records), list(range(50)))
+        self.assertEqual(result.sent, 49)
+        self.assertEqual(result.errors, {"CHAT_NOT_FOUND": 1})
+        self.assertEqual(result.worker_errors, {})
+        self.assertEqual(result.metrics["workers"], 3)
+        self.assertEqual(result.metrics["sent"], 49)
+        self.assertEqual({m["rate"] for m in result.metrics["per_worker"]}, {10000 / 3})
+
+    def test_shared_rate_file(self):
+        """Test that workers draw from one host-wide budget when a rate file is given"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rate")
+            broadcaster = ProcessBroadcaster(
+                "test_token", range(20), text="hi", workers=2, batch_size=5, rate=10000,
+                rate_file=path, mp_context=multiprocessing.get_context("fork"),
+            )
+            with patch.object(Client, "_aiohttp_send", new=_fake_send):
+                result = broadcaster.run()
+
+            self.assertEqual(result.sent, 19)
+            self.assertEqual(SharedTokenBucket(path, 10000).host_acquired(), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
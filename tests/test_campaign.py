@@ -0,0 +1,120 @@
+"""
+Unit tests for resumable campaigns in EitaaYar client
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from eitaayar import Client, Response, Campaign, MessageTemplate, MemoryTransport, TransportError
+
+OK = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi"}}
+
+
+class TestCampaign(unittest.TestCase):
+    """Test streaming campaigns with checkpoints"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, "campaign.ckpt")
+        self.client = Client("test_token", enable_logging=False)
+        self.sent = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        return path
+
+    def _run(self, campaign, fail_on=None):
+        async def fake_request(method, params=None, data=None, files=None, **kwargs):
+            if data["chat_id"] == fail_on:
+                raise RuntimeError("process crashed")
+            self.sent.append(data["chat_id"])
+            return Response({"ok": True, "result": {"message_id": 1}}, enable_logging=False)
+
+        with patch.object(self.client, "_aiohttp_request", side_effect=fake_request):
+            return asyncio.run(campaign.run())
+
+    def test_jsonl_resume_after_crash(self):
+        """Test that a resumed JSONL campaign does not re-send acknowledged chats"""
+        path = self._write("r.jsonl", "".join(json.dumps({"chat_id": i}) + "\n" for i in range(10)))
+
+        first = Campaign(self.client, path, text="hi", checkpoint_path=self.checkpoint,
+                         concurrency=1, checkpoint_every=1)
+        with self.assertRaises(RuntimeError):
+            self._run(first, fail_on=6)
+        self.assertEqual(self.sent, [0, 1, 2, 3, 4, 5])
+
+        second = Campaign(self.client, path, text="hi", checkpoint_path=self.checkpoint, concurrency=3)
+        result = self._run(second)
+
+        self.assertEqual(result.resumed_from_row, 6)
+        self.assertEqual(result.sent, 4)
+        self.assertEqual(sorted(self.sent), list(range(10)))
+
+    def test_transport_failures_are_resent_on_resume(self):
+        """Test that rows without an API answer stay pending and are sent by the resume"""
+        path = self._write("r.jsonl", "".join(json.dumps({"chat_id": i}) + "\n" for i in range(20)))
+
+        class FlakyTransport(MemoryTransport):
+            """Transport losing every odd chat id"""
+
+            def _reply(self, request):
+                if request.data["chat_id"] % 2:
+                    raise TransportError("Network error: connection reset")
+                return super()._reply(request)
+
+        flaky = Client("test_token", transport=FlakyTransport({"sendMessage": OK}))
+        first = asyncio.run(Campaign(flaky, path, text="hi", checkpoint_path=self.checkpoint, concurrency=4).run())
+
+        self.assertEqual((first.sent, first.failed, first.unacknowledged), (10, 0, 10))
+        self.assertEqual(first.errors, {"NETWORK_ERROR": 10})
+        with open(self.checkpoint, encoding="utf-8") as fh:
+            state = json.load(fh)
+        self.assertFalse(state["finished"])
+        self.assertEqual(state["row"], 1)
+
+        transport = MemoryTransport({"sendMessage": OK})
+        healthy = Client("test_token", transport=transport)
+        second = asyncio.run(Campaign(healthy, path, text="hi", checkpoint_path=self.checkpoint).run())
+
+        self.assertEqual(sorted(r.data["chat_id"] for r in transport.requests), list(range(1, 20, 2)))
+        self.assertEqual((second.sent, second.skipped, second.resumed_from_row), (10, 9, 1))
+        with open(self.checkpoint, encoding="utf-8") as fh:
+            self.assertTrue(json.load(fh)["finished"])
+
+    def test_csv_template_campaign(self):
+        """Test a templated CSV campaign and its final checkpoint"""
+        path = self._write("r.csv", 'chat_id,name\n1,"multi\nline"\n2,b\n3,c\n')
+        template = MessageTemplate("Hi {name}")
+
+        result = self._run(Campaign(self.client, path, template=template, checkpoint_path=self.checkpoint))
+
+        self.assertEqual(result.sent, 3)
+        with open(self.checkpoint, encoding="utf-8") as fh:
+            state = json.load(fh)
+        self.assertTrue(state["finished"])
+        self.assertEqual(state["row"], 3)
+        self.assertEqual(state["offset"], os.path.getsize(path))
+
+    def test_iterator_resume_skips_done_rows(self):
+        """Test resuming an iterator source with rows acknowledged out of order"""
+        with open(self.checkpoint, "w", encoding="utf-8") as fh:
+            json.dump({"row": 2, "offset": None, "done": [3], "in_flight": ["12"]}, fh)
+
+        campaign = Campaign(self.client, iter(range(10, 15)), text="hi", checkpoint_path=self.checkpoint)
+        result = self._run(campaign)
+
+        self.assertEqual(sorted(self.sent), [12, 14])
+        self.assertEqual(result.skipped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
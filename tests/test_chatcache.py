@@ -0,0 +1,129 @@
+"""
+Unit tests for the username to chat id cache in EitaaYar
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from eitaayar import Client, ChatIdCache, MemoryTransport, OutgoingMessage
+
+LEARNED = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi",
+                                  "chat": {"id": -1001234, "type": "channel", "username": "MyChannel"}}}
+NOT_FOUND = {"ok": False, "error": "Bad Request: chat not found", "error_code": 400}
+
+
+class TestChatIdCache(unittest.TestCase):
+
+    def test_lru_and_ttl(self):
+        """Test that the least recently used and expired entries are dropped"""
+        cache = ChatIdCache(max_entries=2, ttl=None)
+        cache.put("@a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("A"), 1)
+        cache.put("c", 3)
+
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.resolve("@a"), 1)
+        self.assertEqual(cache.resolve("@b"), "@b")
+        self.assertEqual(cache.resolve("-100"), "-100")
+
+        expiring = ChatIdCache(ttl=0.01)
+        expiring.put("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(expiring.get("a"))
+        self.assertEqual(len(expiring), 0)
+
+    def test_persistence(self):
+        """Test that entries and their LRU order survive a reload"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "chats.json")
+            cache = ChatIdCache(path, save_every=2)
+            cache.put("a", 1)
+            self.assertFalse(os.path.exists(path))
+            cache.put("b", 2)
+
+            reloaded = ChatIdCache(path, max_entries=1)
+            self.assertEqual((reloaded.get("b"), reloaded.get("a")), (2, None))
+
+            with open(path, "w") as fh:
+                fh.write("{broken")
+            self.assertEqual(len(ChatIdCache(path)), 0)
+
+
+class TestClientResolution(unittest.TestCase):
+
+    def test_learns_and_rewrites_sends(self):
+        """Test that a reply teaches the cache and later sends use the numeric id"""
+        transport = MemoryTransport({"sendMessage": LEARNED})
+        client = Client("test_token", transport=transport, chat_id_cache=ChatIdCache())
+
+        first = client.send_message("@mychannel", "hi")
+        second = asyncio.run(client.send_message_async("@MyChannel", "hi", lean=True))
+        client.send(OutgoingMessage("@mychannel", "hi"))
+
+        self.assertTrue(first.ok and second.ok)
+        sent = list(transport.requests)
+        self.assertEqual(sent[0].data["chat_id"], "@mychannel")
+        self.assertEqual(sent[1].data["chat_id"], -1001234)
+        self.assertEqual(json.loads(sent[2].body)["chat_id"], -1001234)
+        self.assertEqual(client.get_dispatch_metrics()["chat_ids"],
+                         {"entries": 1, "hits": 2, "misses": 1, "learned": 1})
+
+    def test_rejected_id_is_forgotten(self):
+        """Test that a chat-not-found reply for a rewritten send invalidates the entry"""
+        cache = ChatIdCache()
+        cache.put("mychannel", 42)
+        transport = MemoryTransport({"sendMessage": [NOT_FOUND, LEARNED]})
+        client = Client("test_token", transport=transport, chat_id_cache=cache)
+
+        failed = client.send_message("@mychannel", "hi")
+        retried = client.send_message("@mychannel", "hi")
+
+        self.assertEqual(failed.error_type, "CHAT_NOT_FOUND")
+        self.assertEqual(transport.requests[0].data["chat_id"], 42)
+        self.assertEqual(transport.requests[1].data["chat_id"], "@mychannel")
+        self.assertTrue(retried.ok)
+        self.assertEqual(cache.get("mychannel"), -1001234)
+
+    def test_document_sends_invalidate(self):
+        """Test that sync and async document sends, with or without fallback, drop a rejected id"""
+        cases = [
+            ({"sendDocument": NOT_FOUND}, False),
+            ({"sendDocument": NOT_FOUND}, True),
+            ({"sendMessage": NOT_FOUND}, False),  # sendDocument missing, sent as a message
+            ({"sendMessage": NOT_FOUND}, True),
+        ]
+        for replies, use_async in cases:
+            with self.subTest(replies=list(replies), use_async=use_async):
+                cache = ChatIdCache()
+                cache.put("mychannel", 42)
+                transport = MemoryTransport(replies)
+                client = Client("test_token", transport=transport, chat_id_cache=cache)
+
+                if use_async:
+                    result = asyncio.run(client.send_document_async("@mychannel", b"data", filename="a.txt"))
+                else:
+                    result = client.send_document("@mychannel", b"data", filename="a.txt")
+
+                self.assertEqual(result.error_type, "CHAT_NOT_FOUND")
+                self.assertEqual(transport.requests[-1].data["chat_id"], 42)
+                self.assertNotIn("mychannel", cache)
+
+    def test_saved_on_close(self):
+        """Test that closing the client persists the cache"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "chats.json")
+            client = Client("test_token", transport=MemoryTransport({"sendMessage": LEARNED}),
+                            chat_id_cache=ChatIdCache(path))
+            client.send_message("@mychannel", "hi")
+            client.close_sync()
+
+            self.assertEqual(ChatIdCache(path).get("@mychannel"), -1001234)
+
+
+if __name__ == '__main__':
+    unittest.main()
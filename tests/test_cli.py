@@ -0,0 +1,106 @@
+"""
+Unit tests for the EitaaYar command-line bulk sender
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from eitaayar import Client, LeanResult
+from eitaayar import cli
+
+
+class TestCli(unittest.TestCase):
+    """Test the eitaayar console entry point"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sent = []
+        self.attempts = {}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        return path
+
+    def _main(self, *argv):
+        async def fake_request(client, method, params=None, data=None, files=None, **kwargs):
+            chat_id = data["chat_id"]
+            self.attempts[chat_id] = self.attempts.get(chat_id, 0) + 1
+            if chat_id == 3 and self.attempts[chat_id] == 1:
+                return LeanResult(False, None, None, "TIMEOUT")
+            if chat_id == 4:
+                return LeanResult(False, None, 400, "CHAT_NOT_FOUND")
+            self.sent.append(data)
+            return LeanResult(True, chat_id, None, None)
+
+        with patch.object(Client, "_aiohttp_request", new=fake_request), \
+                patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            code = cli.main(["--token", "t", *argv])
+        return code, stderr.getvalue()
+
+    def test_template_from_csv(self):
+        """Test templated sends from a CSV file with retries and an output sink"""
+        recipients = self._path("users.csv", "chat_id,name\n1,Ali\n2,Sara\n3,Reza\n")
+        output = os.path.join(self.tmp.name, "out.jsonl")
+        code, stderr = self._main("--recipients", recipients, "--template", "Hi {name}",
+                                  "--output", output, "--retries", "1")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(d["text"] for d in self.sent), ["Hi Ali", "Hi Reza", "Hi Sara"])
+        self.assertEqual(self.attempts[3], 2)
+        with open(output, encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual(len(records), 3)
+        self.assertIn("3/3", stderr)
+
+    def test_failures_set_exit_code(self):
+        """Test that permanent failures are reported in the progress line and exit code"""
+        recipients = self._path("ids.txt", "1\n4\n")
+        code, stderr = self._main("--recipients", recipients, "--text", "hello", "--no-count")
+
+        self.assertEqual(code, 1)
+        self.assertIn("CHAT_NOT_FOUND 1", stderr)
+
+    def test_bad_rows_do_not_abort(self):
+        """Test that rows with a missing column or blank chat id fail alone"""
+        recipients = self._path("users.jsonl", "\n".join(json.dumps(row) for row in [
+            {"chat_id": 1, "name": "Ali"}, {"chat_id": 2}, {"chat_id": " ", "name": "Sara"}, {"chat_id": 5, "name": "Reza"},
+        ]) + "\n")
+        output = os.path.join(self.tmp.name, "out.jsonl")
+        code, stderr = self._main("--recipients", recipients, "--template", "Hi {name}", "--output", output)
+
+        self.assertEqual(code, 1)
+        self.assertEqual(sorted(d["text"] for d in self.sent), ["Hi Ali", "Hi Reza"])
+        self.assertIn("BAD_ROW 2", stderr)
+        with open(output, encoding="utf-8") as fh:
+            self.assertEqual(len(fh.readlines()), 4)
+
+        self.sent = []
+        code, stderr = self._main("--recipients", self._path("ids.csv", "chat_id\n1\n\n,x\n5\n"), "--text", "hi")
+        self.assertEqual((code, len(self.sent)), (1, 2))
+        self.assertIn("BAD_ROW 1", stderr)
+
+    def test_missing_token(self):
+        """Test that a missing token is a usage error"""
+        recipients = self._path("ids.txt", "1\n")
+        with patch.dict(os.environ, {}, clear=True), patch("sys.stderr", new_callable=io.StringIO):
+            with self.assertRaises(SystemExit) as ctx:
+                cli.main(["--recipients", recipients, "--text", "hello"])
+        self.assertEqual(ctx.exception.code, 2)
+
+    def test_count_recipients(self):
+        """Test recipient counting for CSV and text files"""
+        self.assertEqual(cli.count_recipients(self._path("a.csv", "chat_id\n1\n2")), 2)
+        self.assertEqual(cli.count_recipients(self._path("a.txt", "1\n2\n3\n")), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Unit tests for priority dispatching in EitaaYar client
+"""
+
+import asyncio
+import gc
+import unittest
+import warnings
+from unittest.mock import patch
+import random
+from eitaayar import Client, Response, PriorityDispatcher, OrderedDispatcher, MemoryTransport, TokenBucket
+
+OK = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi"}}
+
+
+class TestPriorityDispatcher(unittest.TestCase):
+    """Test priority lanes and weighted fair scheduling"""
+
+    def test_urgent_uses_reserved_capacity_under_bulk_load(self):
+        """Test that urgent requests get a slot while bulk saturates the rest"""
+        async def scenario():
+            dispatcher = PriorityDispatcher(max_concurrency=4, reserved={"urgent": 1})
+            gate = asyncio.Event()
+
+            async def bulk_job():
+                async with dispatcher.slot("bulk"):
+                    await gate.wait()
+
+            jobs = [asyncio.ensure_future(bulk_job()) for _ in range(20)]
+            await asyncio.sleep(0)
+
+            await asyncio.wait_for(dispatcher.acquire("urgent"), timeout=1)
+            metrics = dispatcher.metrics()
+            dispatcher.release("urgent")
+
+            gate.set()
+            await asyncio.gather(*jobs)
+            return metrics, dispatcher.metrics()
+
+        during, after = asyncio.run(scenario())
+
+        self.assertEqual(during["lanes"]["bulk"]["in_flight"], 3)
+        self.assertEqual(during["lanes"]["bulk"]["queue_depth"], 17)
+        self.assertEqual(during["lanes"]["urgent"]["in_flight"], 1)
+        self.assertEqual(after["in_flight"], 0)
+        self.assertEqual(after["lanes"]["bulk"]["admitted"], 20)
+
+    def test_weighted_fair_order(self):
+        """Test that waiting lanes are served in proportion to their weights"""
+        async def scenario():
+            dispatcher = PriorityDispatcher(max_concurrency=1, reserved={},
+                                            weights={"normal": 3, "bulk": 1})
+            order = []
+            await dispatcher.acquire("normal")
+
+            async def job(lane):
+                async with dispatcher.slot(lane):
+                    order.append(lane)
+
+            jobs = [asyncio.ensure_future(job(lane)) for lane in ["bulk"] * 8 + ["normal"] * 8]
+            await asyncio.sleep(0)
+            dispatcher.release("normal")
+            await asyncio.gather(*jobs)
+            return order
+
+        order = asyncio.run(scenario())
+
+        self.assertEqual(order[:8].count("normal"), 6)
+        self.assertEqual(sorted(order), sorted(["bulk"] * 8 + ["normal"] * 8))
+
+    def test_invalid_configuration(self):
+        """Test validation of lanes and reservations"""
+        with self.assertRaises(ValueError):
+            PriorityDispatcher(max_concurrency=2, reserved={"urgent": 2})
+        with self.assertRaises(ValueError):
+            PriorityDispatcher(reserved={"vip": 1})
+
+    def test_client_routes_through_dispatcher(self):
+        """Test that client async sends take a slot in the requested lane"""
+        dispatcher = PriorityDispatcher(max_concurrency=2)
+        client = Client("test_token", enable_logging=False, dispatcher=dispatcher)
+
+        async def fake_send(*args):
+            return Response({"ok": True, "result": {"message_id": 1}}, enable_logging=False)
+
+        with patch.object(client, "_aiohttp_send", side_effect=fake_send):
+            response = asyncio.run(client.send_message_async(1, "otp 1234", priority="urgent"))
+
+        self.assertTrue(response.ok)
+        self.assertEqual(client.get_dispatch_metrics()["lanes"]["urgent"]["admitted"], 1)
+
+
+    def test_rate_tokens_follow_priority(self):
+        """Test that an urgent send gets the next rate token ahead of queued bulk sends"""
+        async def scenario():
+            transport = MemoryTransport({"sendMessage": OK})
+            client = Client("test_token", transport=transport, dispatcher=PriorityDispatcher(max_concurrency=20),
+                            rate_limiter=TokenBucket(100, burst=1))
+            bulk = [asyncio.ensure_future(client.send_message_async(i, "hi", priority="bulk")) for i in range(30)]
+            await asyncio.sleep(0.03)
+            queued_at = len(transport.requests)
+            await client.send_message_async("urgent", "otp", priority="urgent")
+            position = [r.data["chat_id"] for r in transport.requests].index("urgent")
+            await asyncio.gather(*bulk)
+            return queued_at, position, len(transport.requests)
+
+        queued_at, position, total = asyncio.run(scenario())
+
+        self.assertLessEqual(position - queued_at, 2)
+        self.assertEqual(total, 31)
+
+
+class TestOrderedDispatcher(unittest.TestCase):
+    """Test per-chat FIFO ordering with parallelism across chats"""
+
+    def test_fifo_per_chat_parallel_across_chats(self):
+        """Test that sends to one chat complete in order while chats overlap"""
+        client = Client("test_token", enable_logging=False, ordered=OrderedDispatcher())
+        delivered = {1: [], 2: []}
+        running = set()
+        overlap = []
+
+        async def fake_request(method, params=None, data=None, **kwargs):
+            chat_id = data["chat_id"]
+            running.add(chat_id)
+            overlap.append(len(running))
+            await asyncio.sleep(random.uniform(0, 0.005))
+            running.discard(chat_id)
+            delivered[chat_id].append(data["text"])
+            return Response({"ok": True, "result": {"message_id": 1}}, enable_logging=False)
+
+        async def scenario():
+            sends = [client.send_message_async(chat_id, f"part {i}") for i in range(10) for chat_id in (1, 2)]
+            await asyncio.gather(*sends)
+
+        with patch.object(client, "_aiohttp_request", side_effect=fake_request):
+            asyncio.run(scenario())
+
+        self.assertEqual(delivered[1], [f"part {i}" for i in range(10)])
+        self.assertEqual(delivered[2], [f"part {i}" for i in range(10)])
+        self.assertEqual(max(overlap), 2)
+        self.assertEqual(client.get_dispatch_metrics()["ordered"]["active_keys"], 0)
+
+    def test_bounded_queue_and_cancellation(self):
+        """Test that a full key queue rejects and cancelled waiters are skipped"""
+        async def scenario():
+            ordered = OrderedDispatcher(max_pending_per_key=2)
+            order = []
+            await ordered.acquire("a")
+
+            async def waiter(name):
+                async with ordered.slot("a"):
+                    order.append(name)
+
+            first = asyncio.ensure_future(waiter("first"))
+            second = asyncio.ensure_future(waiter("second"))
+            await asyncio.sleep(0)
+            with self.assertRaises(asyncio.QueueFull):
+                await ordered.acquire("a")
+            first.cancel()
+            ordered.release("a")
+            await asyncio.gather(first, second, return_exceptions=True)
+            return order, ordered.metrics()
+
+        order, metrics = asyncio.run(scenario())
+        self.assertEqual(order, ["second"])
+        self.assertEqual(metrics["rejected"], 1)
+        self.assertEqual(metrics["active_keys"], 0)
+
+
+    def test_cancelled_while_waiting_for_chat(self):
+        """Test that a send cancelled while queued behind its chat closes its coroutine"""
+        async def scenario():
+            client = Client("test_token", transport=MemoryTransport({"sendMessage": OK}), ordered=OrderedDispatcher())
+            await client.ordered.acquire(1)
+            send = asyncio.ensure_future(client.send_message_async(1, "hi"))
+            await asyncio.sleep(0)
+            send.cancel()
+            await asyncio.gather(send, return_exceptions=True)
+            client.ordered.release(1)
+            return client
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            client = asyncio.run(scenario())
+            gc.collect()
+
+        self.assertEqual([str(w.message) for w in caught if "never awaited" in str(w.message)], [])
+        self.assertEqual(client.in_flight, 0)
+        self.assertEqual(client.get_dispatch_metrics()["ordered"]["active_keys"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
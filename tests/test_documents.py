@@ -0,0 +1,119 @@
+"""
+Unit tests for upload-once document distribution in EitaaYar client
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from email.parser import BytesParser
+from email.policy import HTTP
+from unittest.mock import patch
+from eitaayar import Client, Response, PreparedDocument, FileReferenceCache
+
+
+class TestPreparedDocument(unittest.TestCase):
+    """Test prebuilt multipart bodies"""
+
+    def test_body_is_valid_multipart(self):
+        """Test that the prebuilt body parses as multipart form data"""
+        prepared = PreparedDocument(b"%PDF-1.4 data", "گزارش.pdf", "application/pdf",
+                                    {"caption": "سلام", "title": None})
+        body = prepared.body(12345)
+
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {prepared.content_type}\r\n\r\n".encode() + body
+        )
+        parts = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+
+        self.assertEqual(list(parts), ["chat_id", "caption", "file"])
+        self.assertEqual(parts["chat_id"].get_content().strip(), "12345")
+        self.assertEqual(parts["file"].get_payload(decode=True), b"%PDF-1.4 data")
+        self.assertEqual(parts["file"].get_filename(), "گزارش.pdf")
+
+    def test_only_chat_id_differs(self):
+        """Test that bodies for different chats share the encoded tail"""
+        prepared = PreparedDocument(b"x" * 100, "a.bin")
+        first, second = prepared.body(1), prepared.body(22)
+
+        self.assertEqual(len(second) - len(first), 1)
+        self.assertEqual(first[-120:], second[-120:])
+
+
+class TestFileReferenceCache(unittest.TestCase):
+    """Test the persistent content-hash cache"""
+
+    def test_lru_eviction_and_persistence(self):
+        """Test that least recently used entries are evicted and state persists"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "refs.json")
+            cache = FileReferenceCache(path, max_entries=2)
+            cache.put("a", "ref-a")
+            cache.put("b", "ref-b")
+            cache.get("a")
+            cache.put("c", "ref-c")
+
+            reloaded = FileReferenceCache(path, max_entries=2)
+
+        self.assertNotIn("b", reloaded)
+        self.assertEqual(reloaded.get("a"), "ref-a")
+        self.assertEqual(reloaded.get("c"), "ref-c")
+
+    def test_max_age(self):
+        """Test that expired entries are dropped"""
+        cache = FileReferenceCache(max_age=0)
+        cache.put("a", "ref-a")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestSendDocumentMany(unittest.TestCase):
+    """Test bulk document sends"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.client = Client("test_token", enable_logging=False)
+        self.calls = []
+
+    def _run(self, result, cache=None):
+        async def fake_request(method, params=None, data=None, files=None, body=None, content_type=None, **kwargs):
+            self.calls.append({"data": data, "body": body})
+            return Response({"ok": True, "result": dict(result)}, enable_logging=False)
+
+        async def collect():
+            return [r async for r in self.client.send_document_many_async(
+                [1, 2, 3], b"file bytes", filename="f.txt", caption="c", cache=cache, concurrency=2)]
+
+        with patch.object(self.client, "_aiohttp_request", side_effect=fake_request):
+            return asyncio.run(collect())
+
+    def test_reference_reused_after_first_upload(self):
+        """Test that later recipients get the returned file reference"""
+        cache = FileReferenceCache()
+        results = self._run({"message_id": 1, "document": {"file_id": "FILE-1"}}, cache)
+
+        self.assertEqual(len(results), 3)
+        self.assertIsNotNone(self.calls[0]["body"])
+        self.assertEqual([c["data"]["file_id"] for c in self.calls[1:]], ["FILE-1", "FILE-1"])
+        self.assertEqual(len(cache), 1)
+
+    def test_prebuilt_body_without_reference(self):
+        """Test that every recipient gets the prebuilt body when no reference exists"""
+        self._run({"message_id": 1})
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertTrue(all(c["body"] is not None for c in self.calls))
+
+    def test_cached_reference_skips_upload(self):
+        """Test that a cached reference avoids any upload"""
+        cache = FileReferenceCache()
+        cache.put(PreparedDocument(b"file bytes").sha256, "CACHED")
+        self._run({"message_id": 1}, cache)
+
+        self.assertTrue(all(c["body"] is None for c in self.calls))
+        self.assertTrue(all(c["data"]["file_id"] == "CACHED" for c in self.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for multi-endpoint selection and failover in EitaaYar client
+"""
+
+import asyncio
+import unittest
+from eitaayar import Client, EndpointPool, MemoryTransport, Transport, TransportError, TransportTimeout
+
+OK = {"ok": True, "result": {"message_id": 1}}
+
+
+class _RoutingTransport(Transport):
+    """Transport failing for some hosts and answering for the others"""
+
+    def __init__(self, down=(), slow=()):
+        self.down = set(down)
+        self.slow = set(slow)
+        self.hits = []
+        self.memory = MemoryTransport({"sendMessage": OK, "getMe": OK})
+
+    def _host(self, request):
+        return request.url.split("/")[2]
+
+    def request(self, request):
+        host = self._host(request)
+        self.hits.append(host)
+        if host in self.down:
+            raise TransportError("Network error: connection refused")
+        return self.memory.request(request)
+
+    async def request_async(self, request):
+        host = self._host(request)
+        self.hits.append(host)
+        if host in self.slow:
+            await asyncio.sleep(0.02)
+        if host in self.down:
+            raise TransportTimeout()
+        return self.memory.request(request)
+
+
+class TestEndpointPool(unittest.TestCase):
+    """Test endpoint health tracking"""
+
+    def test_selects_fastest_healthy(self):
+        """Test latency-based selection and cooldown after failures"""
+        pool = EndpointPool(["http://a/api/", "http://b/api"], failure_threshold=1, cooldown=60)
+        self.assertEqual(pool.select(), "http://a/api")
+
+        pool.report_success("http://a/api", 0.2)
+        pool.report_success("http://b/api", 0.05)
+        self.assertEqual(pool.select(), "http://b/api")
+        self.assertEqual(pool.select(exclude=["http://b/api"]), "http://a/api")
+
+        pool.report_failure("http://b/api", TransportTimeout())
+        self.assertEqual(pool.select(), "http://a/api")
+        pool.report_failure("http://a/api", TransportTimeout())
+        # همه از دسترس خارج‌اند؛ قدیمی‌ترین مورد امتحان می‌شود
+        self.assertEqual(pool.select(), "http://b/api")
+
+        pool.report_success("http://b/api", 0.05)
+        metrics = pool.metrics()["endpoints"]
+        self.assertTrue(metrics[1]["healthy"])
+        self.assertFalse(metrics[0]["healthy"])
+        self.assertEqual(metrics[0]["last_error"], "Request timeout")
+
+
+class TestClientFailover(unittest.TestCase):
+    """Test request routing and failover in Client"""
+
+    def test_sync_failover(self):
+        """Test that a network error is retried on the next endpoint"""
+        transport = _RoutingTransport(down={"a"})
+        client = Client("t", base_url=["http://a/api", "http://b/api"], transport=transport)
+
+        response = client.send_message(1, "hi")
+
+        self.assertTrue(response.ok)
+        self.assertEqual(transport.hits, ["a", "b"])
+        self.assertEqual(client.get_dispatch_metrics()["endpoints"]["failovers"], 1)
+
+    def test_timeout_not_retried_by_default(self):
+        """Test that a timed-out send is not repeated on another endpoint unless enabled"""
+        transport = _RoutingTransport(down={"a"})
+        client = Client("t", base_url=["http://a/api", "http://b/api"], transport=transport)
+
+        response = asyncio.run(client.send_message_async(1, "hi"))
+
+        self.assertEqual(response.error_type, "TIMEOUT")
+        self.assertEqual(transport.hits, ["a"])
+
+    def test_empty_url_list(self):
+        """Test that an empty base URL list is rejected with a clear error"""
+        for base_url in ([], ""):
+            with self.assertRaisesRegex(ValueError, "At least one base URL"):
+                Client("t", base_url=base_url)
+
+    def test_all_endpoints_down(self):
+        """Test that the last error is returned when every endpoint fails"""
+        transport = _RoutingTransport(down={"a", "b"})
+        pool = EndpointPool(["http://a/api", "http://b/api"], failover_on_timeout=True)
+        client = Client("t", base_url=pool, transport=transport)
+
+        response = asyncio.run(client.send_message_async(1, "hi"))
+
+        self.assertEqual(response.error_type, "TIMEOUT")
+        self.assertEqual(transport.hits, ["a", "b"])
+
+    def test_probe_prefers_faster_endpoint(self):
+        """Test that background probes steer requests to the fastest endpoint"""
+        transport = _RoutingTransport(slow={"a"})
+        client = Client("t", base_url=["http://a/api", "http://b/api"], transport=transport)
+
+        async def scenario():
+            task = client.start_endpoint_probing(interval=60)
+            await asyncio.sleep(0.05)
+            response = await client.send_message_async(1, "hi")
+            await client.close()
+            return task, response
+
+        task, response = asyncio.run(scenario())
+        self.assertTrue(response.ok)
+        self.assertTrue(task.cancelled())
+        self.assertEqual(transport.hits[-1], "b")
+
+    def test_single_url_unchanged(self):
+        """Test that a single base URL keeps the plain request path"""
+        client = Client("t", base_url="http://a/api/", transport=MemoryTransport({"sendMessage": OK}))
+        self.assertIsNone(client.endpoints)
+        self.assertEqual(client.base_url, "http://a/api")
+        self.assertTrue(client.send_message(1, "hi").ok)
+        self.assertEqual(asyncio.run(client.probe_endpoints_async()), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
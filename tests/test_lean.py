@@ -0,0 +1,83 @@
+"""
+Unit tests for lean (fire-and-forget) results in EitaaYar client
+"""
+
+import asyncio
+import json
+import unittest
+from unittest.mock import Mock, patch
+from eitaayar import Client, LeanResult, SendRecord, MemoryTransport
+
+
+MESSAGE_PAYLOAD = {
+    "ok": True,
+    "result": {
+        "message_id": 321,
+        "from": {"id": 1, "is_bot": True, "first_name": "bot"},
+        "chat": {"id": 5, "type": "private", "username": "ali"},
+        "date": 1700000000,
+        "text": "hi",
+    },
+}
+
+
+class TestLeanResult(unittest.TestCase):
+    """Test LeanResult construction"""
+
+    def test_from_success_payload(self):
+        """Test that only the message id is kept from a success payload"""
+        self.assertEqual(LeanResult.from_payload(MESSAGE_PAYLOAD), LeanResult(True, 321, None, None))
+
+    def test_from_error_payload(self):
+        """Test error classification without building a Response"""
+        result = LeanResult.from_payload({"ok": False, "error": "invalid token", "error_code": 401})
+
+        self.assertFalse(result)
+        self.assertEqual(result.error_type, "INVALID_TOKEN")
+        self.assertEqual(result.error_code, 401)
+
+    def test_send_record_from_lean_result(self):
+        """Test that sinks accept lean results"""
+        record = SendRecord.from_response(5, LeanResult(True, 9), latency=0.5)
+        self.assertEqual(record.message_id, 9)
+
+
+class TestLeanSend(unittest.TestCase):
+    """Test lean mode on the client send paths"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.client = Client("test_token", enable_logging=False)
+
+    @patch('eitaayar.requests.post')
+    def test_sync_send_message_lean(self, mock_post):
+        """Test that the sync path decodes the raw body into a LeanResult"""
+        mock_post.return_value = Mock(content=json.dumps(MESSAGE_PAYLOAD).encode(), status_code=200)
+
+        result = self.client.send_message(5, "hi", lean=True)
+
+        self.assertIsInstance(result, LeanResult)
+        self.assertEqual(result.message_id, 321)
+        mock_post.return_value.json.assert_not_called()
+
+    @patch('eitaayar.requests.post')
+    def test_sync_network_error_lean(self, mock_post):
+        """Test lean results for client-side failures"""
+        import requests
+        mock_post.side_effect = requests.exceptions.ConnectionError("connection refused")
+
+        result = self.client.send_message(5, "hi", lean=True)
+
+        self.assertEqual(result, LeanResult(False, None, 503, "NETWORK_ERROR"))
+
+    def test_async_read_lean(self):
+        """Test that the async path skips Response construction"""
+        client = Client("test_token", enable_logging=False,
+                        transport=MemoryTransport({"sendMessage": MESSAGE_PAYLOAD}))
+        result = asyncio.run(client.send_message_async(5, "hi", lean=True))
+
+        self.assertEqual(result, LeanResult(True, 321, None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
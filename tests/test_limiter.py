@@ -0,0 +1,98 @@
+"""
+Unit tests for adaptive concurrency limiting in EitaaYar client
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+from eitaayar import Client, Response, AdaptiveLimiter, PriorityDispatcher
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    """Test the AIMD controller"""
+
+    def test_additive_increase_when_saturated(self):
+        """Test that the limit grows while latency is flat and slots are used"""
+        limiter = AdaptiveLimiter(initial=4, max_limit=10)
+        for _ in range(40):
+            limiter.observe(0.05, in_flight=limiter.limit)
+
+        self.assertGreater(limiter.limit, 4)
+        self.assertLessEqual(limiter.limit, 10)
+
+    def test_no_increase_when_underused(self):
+        """Test that an idle limit does not grow"""
+        limiter = AdaptiveLimiter(initial=10)
+        for _ in range(40):
+            limiter.observe(0.05, in_flight=1)
+
+        self.assertEqual(limiter.limit, 10)
+
+    def test_multiplicative_decrease_on_throttling(self):
+        """Test that timeouts cut the limit once per round trip"""
+        limiter = AdaptiveLimiter(initial=20, backoff=0.5)
+        limiter.observe(0.05)
+        limiter.observe(0.05, error_type="TIMEOUT")
+        limiter.observe(0.05, error_type="TIMEOUT")
+
+        self.assertEqual(limiter.limit, 10)
+        self.assertEqual(limiter.decreases, 1)
+
+    def test_decrease_on_latency_spike(self):
+        """Test that a latency spike relative to the baseline cuts the limit"""
+        limiter = AdaptiveLimiter(initial=20, backoff=0.5, latency_tolerance=2.0)
+        limiter.observe(0.01)
+        limiter.observe(0.5)
+
+        self.assertEqual(limiter.limit, 10)
+
+    def test_gate_enforces_limit(self):
+        """Test that acquire waits once the limit is reached"""
+        async def scenario():
+            limiter = AdaptiveLimiter(initial=2, min_limit=1)
+            await limiter.acquire()
+            await limiter.acquire()
+            third = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            blocked = not third.done()
+            limiter.release()
+            await asyncio.wait_for(third, timeout=1)
+            return blocked, limiter.in_flight
+
+        blocked, in_flight = asyncio.run(scenario())
+
+        self.assertTrue(blocked)
+        self.assertEqual(in_flight, 2)
+
+
+class TestClientWithLimiter(unittest.TestCase):
+    """Test limiter integration in the async request path"""
+
+    def test_timeouts_reduce_concurrency(self):
+        """Test that timeout responses lower the client's limit"""
+        limiter = AdaptiveLimiter(initial=16, backoff=0.5)
+        client = Client("test_token", enable_logging=False, limiter=limiter)
+
+        async def fake_send(*args):
+            return Response({"ok": False, "error": "Request timeout", "error_code": 408}, enable_logging=False)
+
+        with patch.object(client, "_aiohttp_send", side_effect=fake_send):
+            response = asyncio.run(client.send_message_async(1, "hi"))
+
+        self.assertEqual(response.error_type, "TIMEOUT")
+        self.assertEqual(limiter.limit, 8)
+        self.assertEqual(client.get_dispatch_metrics()["adaptive"]["decreases"], 1)
+
+    def test_dispatcher_follows_limiter(self):
+        """Test that the dispatcher capacity tracks the adaptive limit"""
+        limiter = AdaptiveLimiter(initial=16, backoff=0.5)
+        dispatcher = PriorityDispatcher(max_concurrency=50, reserved={"urgent": 2})
+        Client("test_token", enable_logging=False, dispatcher=dispatcher, limiter=limiter)
+
+        self.assertEqual(dispatcher.max_concurrency, 16)
+        limiter.observe(0.1, error_type="NETWORK_ERROR")
+        self.assertEqual(dispatcher.max_concurrency, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Unit tests for prebuilt outgoing requests in EitaaYar
+"""
+
+import asyncio
+import json
+import unittest
+
+from eitaayar import Client, OutgoingMessage, OutgoingDocument, PreparedDocument, MemoryTransport, EndpointPool
+from eitaayar.transports import TransportError
+
+OK = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi"}}
+
+
+class TestOutgoingMessage(unittest.TestCase):
+
+    def test_body_is_json_and_clones_share_encoding(self):
+        """Test that clones only re-encode the chat id"""
+        message = OutgoingMessage(1, "سلام", title="t", pin=1)
+        clone = message.with_chat_id("@channel")
+
+        self.assertEqual(json.loads(message.body), {"chat_id": 1, "text": "سلام", "title": "t", "pin": 1})
+        self.assertEqual(json.loads(clone.body)["chat_id"], "@channel")
+        self.assertIs(message._shared, clone._shared)
+        self.assertIs(message.body, message.body)
+        self.assertEqual(clone.data, {"chat_id": "@channel", "text": "سلام", "title": "t", "pin": 1})
+
+    def test_validation(self):
+        """Test that invalid messages are rejected when built"""
+        with self.assertRaises(ValueError):
+            OutgoingMessage(1, "")
+        with self.assertRaises(TypeError):
+            OutgoingMessage(None, "hi")
+        with self.assertRaises(TypeError):
+            OutgoingMessage(1, "hi", pin="yes")
+        with self.assertRaises(ValueError):
+            OutgoingMessage(1, "hi").with_chat_id(" ")
+
+    def test_bind_is_cached(self):
+        """Test that the URL, headers and request are built once per endpoint"""
+        message = OutgoingMessage(1, "hi")
+        headers = {"User-Agent": "x"}
+        first = message.bind("https://a", "tok", headers, 30)
+
+        self.assertIs(message.bind("https://a", "tok", headers, 30), first)
+        self.assertEqual(first.url, "https://a/tok/sendMessage")
+        self.assertEqual(first.headers["Content-Type"], "application/json")
+        self.assertIs(message.with_chat_id(2).bind("https://a", "tok", headers, 30).headers, first.headers)
+
+
+class TestClientSend(unittest.TestCase):
+
+    def test_send_sync_and_async(self):
+        """Test that the client sends the prebuilt body as-is"""
+        transport = MemoryTransport({"sendMessage": OK})
+        client = Client("test_token", transport=transport)
+        message = OutgoingMessage(5, "hi")
+
+        self.assertTrue(client.send(message).ok)
+        result = asyncio.run(client.send_async(message.with_chat_id(6), lean=True))
+
+        self.assertTrue(result.ok)
+        self.assertEqual([json.loads(r.body)["chat_id"] for r in transport.requests], [5, 6])
+        self.assertIs(transport.requests[0].body, message.body)
+
+    def test_document(self):
+        """Test that documents are sent as prebuilt multipart bodies"""
+        transport = MemoryTransport({"sendDocument": OK})
+        client = Client("test_token", transport=transport)
+        document = OutgoingDocument(1, b"data", caption="c", filename="a.txt")
+
+        self.assertTrue(client.send(document.with_chat_id(9)).ok)
+        request = transport.requests[0]
+        self.assertTrue(request.headers["Content-Type"].startswith("multipart/form-data"))
+        self.assertIn(b'name="chat_id"\r\n\r\n9\r\n', request.body)
+        self.assertIn(b"data", request.body)
+        with self.assertRaises(ValueError):
+            OutgoingDocument(1, PreparedDocument(b"x"), caption="c")
+
+    def test_failover_rebinds_per_endpoint(self):
+        """Test that a prebuilt request follows endpoint failover"""
+
+        class _Flaky(MemoryTransport):
+            def request(self, request):
+                if request.url.startswith("https://a"):
+                    raise TransportError("down")
+                return super().request(request)
+
+        transport = _Flaky({"sendMessage": OK})
+        client = Client("test_token", base_url=EndpointPool(["https://a", "https://b"]), transport=transport)
+
+        self.assertTrue(client.send(OutgoingMessage(1, "hi")).ok)
+        self.assertEqual(transport.requests[0].url, "https://b/test_token/sendMessage")
+
+    def test_bulk_reuses_one_encoding(self):
+        """Test that text bulk sends clone one prebuilt message"""
+        transport = MemoryTransport({"sendMessage": OK})
+        client = Client("test_token", transport=transport)
+
+        results = list(client.send_message_many([1, 2, "", 3], text="hi", max_workers=2, ordered=True, lean=True))
+
+        self.assertEqual([r.ok for _, r in results], [True, True, False, True])
+        self.assertEqual(results[2][1].error_code, 400)
+        self.assertEqual(len({id(r.headers) for r in transport.requests}), 1)
+
+        async def scenario():
+            message = OutgoingMessage(0, "hello", disable_notification=1)
+            return [r async for r in client.send_message_many_async([7, 8], message=message)]
+
+        self.assertEqual(sorted(chat_id for chat_id, _ in asyncio.run(scenario())), [7, 8])
+        self.assertEqual(json.loads(transport.requests[-1].body)["disable_notification"], 1)
+        with self.assertRaises(ValueError):
+            list(client.send_message_many([1], text="hi", message=OutgoingMessage(0, "hi")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+CPU and allocation regression tests for the client hot path
+
+Each case is measured in ns/op (best of several runs) and in bytes and
+blocks allocated per op (tracemalloc), then compared with the committed
+baseline in perf_baseline.json. A case fails when it exceeds its baseline
+times the tolerance.
+
+    python tests/test_perf.py --update     # re-record the baseline after an intended change
+
+Environment:
+    EITAAYAR_PERF=0                  skip these tests
+    EITAAYAR_PERF_TIME_TOLERANCE=N   override the CPU tolerance (slow or shared machines)
+"""
+
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import unittest
+
+from eitaayar import Client, Response, MemoryTransport, PreparedDocument, OutgoingMessage
+from eitaayar.transports import AiohttpTransport
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baseline.json")
+
+TEXT = "سلام! این یک پیام آزمایشی است."
+MESSAGE = {
+    "message_id": 321,
+    "from": {"id": 1, "is_bot": True, "first_name": "bot", "username": "bot"},
+    "chat": {"id": 5, "type": "private", "username": "ali"},
+    "date": 1700000000,
+    "text": TEXT,
+}
+PAYLOAD = {"ok": True, "result": MESSAGE}
+MESSAGE_DATA = {"chat_id": 5, "text": TEXT, "title": "t", "disable_notification": 1}
+
+
+def _cases():
+    """Hot-path operations by name; each callable performs one op and returns its result."""
+    client = Client("perf", transport=MemoryTransport({"sendMessage": PAYLOAD}, keep_requests=1))
+    response = Response(PAYLOAD, False)
+    document = client._build_request("sendDocument", data={"chat_id": 5, "caption": "c"},
+                                     files={"file": ("a.txt", b"x" * 1024, "text/plain")})
+    prepared = PreparedDocument(b"x" * 1024, "a.txt", "text/plain", {"caption": "c"})
+    message = OutgoingMessage(0, TEXT, title="t")
+    return {
+        "response_init": lambda: Response(PAYLOAD, False),
+        "parse_message": lambda: response._parse_message(MESSAGE),
+        "build_request": lambda: client._build_request("sendMessage", data=MESSAGE_DATA),
+        "send_message": lambda: client.send_message(5, TEXT, title="t", lean=True),
+        "multipart_form": lambda: AiohttpTransport.form_data(document)(),
+        "prepared_document_body": lambda: prepared.body(5),
+        "outgoing_message_clone": lambda: message.with_chat_id(5).body,
+    }
+
+
+def time_per_op(func, number=2000, repeat=5):
+    """Best ns/op over ``repeat`` runs of ``number`` calls."""
+    for _ in range(100):
+        func()
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return best / number * 1e9
+
+
+def allocations_per_op(func, number=200):
+    """Bytes and blocks still allocated per op while ``number`` results are kept alive."""
+    func()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        kept = [func() for _ in range(number)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    del kept
+    return sum(s.size_diff for s in stats) / number, sum(s.count_diff for s in stats) / number
+
+
+def measure():
+    results = {}
+    for name, func in _cases().items():
+        ns = time_per_op(func)
+        size, blocks = allocations_per_op(func)
+        results[name] = {"ns_per_op": round(ns), "bytes_per_op": round(size), "blocks_per_op": round(blocks, 1)}
+    return results
+
+
+def _python_version():
+    return ".".join(platform.python_version_tuple()[:2])
+
+
+def load_baseline():
+    with open(BASELINE_PATH, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def update_baseline():
+    try:
+        tolerance = load_baseline()["tolerance"]
+    except (OSError, ValueError, KeyError):
+        tolerance = {"time": 3.0, "memory": 1.25, "memory_slack": 64}
+    baseline = {"python": _python_version(), "tolerance": tolerance, "cases": measure()}
+    with open(BASELINE_PATH, "w", encoding="utf-8") as fh:
+        json.dump(baseline, fh, indent=2)
+        fh.write("\n")
+    return baseline
+
+
+@unittest.skipIf(os.environ.get("EITAAYAR_PERF") == "0", "EITAAYAR_PERF=0")
+class TestHotPathBudgets(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.baseline = load_baseline()
+        cls.cases = _cases()
+
+    def test_baseline_covers_all_cases(self):
+        """Test that every hot-path case has a committed baseline"""
+        self.assertEqual(sorted(self.baseline["cases"]), sorted(self.cases))
+
+    def test_cpu_budgets(self):
+        """Test that no hot path got slower than its baseline allows"""
+        if sys.gettrace() is not None:
+            self.skipTest("timings are meaningless under a tracer or coverage")
+        tolerance = float(os.environ.get("EITAAYAR_PERF_TIME_TOLERANCE", self.baseline["tolerance"]["time"]))
+        for name, func in self.cases.items():
+            with self.subTest(case=name):
+                expected = self.baseline["cases"][name]["ns_per_op"]
+                measured = time_per_op(func)
+                if measured > expected * tolerance:
+                    # یک بار دیگر اندازه می‌گیریم تا نویز لحظه‌ای سیستم باعث شکست نشود
+                    measured = min(measured, time_per_op(func))
+                self.assertLessEqual(
+                    measured, expected * tolerance,
+                    f"{name}: {measured:.0f} ns/op exceeds budget {expected * tolerance:.0f} (baseline {expected})"
+                )
+
+    def test_allocation_budgets(self):
+        """Test that no hot path allocates more than its baseline allows"""
+        if self.baseline["python"] != _python_version():
+            self.skipTest(f"baseline recorded on Python {self.baseline['python']}")
+        tolerance = self.baseline["tolerance"]
+        for name, func in self.cases.items():
+            with self.subTest(case=name):
+                expected = self.baseline["cases"][name]
+                size, blocks = allocations_per_op(func)
+                size_budget = expected["bytes_per_op"] * tolerance["memory"] + tolerance["memory_slack"]
+                blocks_budget = expected["blocks_per_op"] * tolerance["memory"] + 1
+                self.assertLessEqual(size, size_budget,
+                                     f"{name}: {size:.0f} bytes/op exceeds budget {size_budget:.0f}")
+                self.assertLessEqual(blocks, blocks_budget,
+                                     f"{name}: {blocks:.1f} blocks/op exceeds budget {blocks_budget:.1f}")
+
+
+if __name__ == '__main__':
+    if "--update" in sys.argv:
+        for case, numbers in update_baseline()["cases"].items():
+            print(f"{case:<24} {numbers['ns_per_op']:>8} ns/op {numbers['bytes_per_op']:>7} B/op "
+                  f"{numbers['blocks_per_op']:>6} blocks/op")
+    else:
+        unittest.main()
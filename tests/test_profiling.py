@@ -0,0 +1,124 @@
+"""
+Unit tests for on-demand client profiling in EitaaYar
+"""
+
+import asyncio
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import tracemalloc
+import unittest
+
+from eitaayar import Client, MemoryTransport
+
+OK = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi"}}
+
+
+class TestClientProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.client = Client("test_token", transport=MemoryTransport({"sendMessage": OK}))
+
+    def test_stops_after_n_requests(self):
+        """Test that the window ends by itself after the given number of requests"""
+        profiler = self.client.start_profiling(cpu=False, requests=3)
+        for i in range(5):
+            self.client.send_message(i, "hi")
+
+        self.assertIsNone(self.client.profiler)
+        self.assertFalse(profiler.active)
+        phases = profiler.report["methods"]["sendMessage"]
+        self.assertEqual(profiler.report["requests"], 3)
+        for phase in ("build", "network", "decode", "parse", "total"):
+            self.assertEqual(phases[phase]["count"], 3, phase)
+        self.assertGreaterEqual(phases["total"]["total"], phases["network"]["total"])
+
+    def test_async_and_failed_requests(self):
+        """Test that async and failed requests are attributed per method"""
+        async def scenario():
+            self.client.start_profiling(cpu=False)
+            await self.client.send_message_async(1, "hi", lean=True)
+            await self.client.get_me_async()
+            return self.client.stop_profiling()
+
+        report = asyncio.run(scenario())
+
+        self.assertEqual(set(report["methods"]), {"sendMessage", "getMe"})
+        self.assertEqual(report["methods"]["getMe"]["parse"]["count"], 1)
+        self.assertIsNone(self.client.stop_profiling())
+
+    def test_cpu_and_memory_dumps(self):
+        """Test that the report and the cProfile/tracemalloc dumps are written"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            self.client.start_profiling(memory=True, path=path, top=5)
+            with self.assertRaises(RuntimeError):
+                self.client.start_profiling()
+            for i in range(20):
+                self.client.send_message(i, "hi")
+            report = self.client.stop_profiling()
+
+            with open(path, encoding="utf-8") as fh:
+                self.assertEqual(json.load(fh)["requests"], 20)
+            self.assertLessEqual(len(report["cpu"]), 5)
+            self.assertTrue(any("send_message" in row["function"] for row in report["cpu"]))
+            self.assertIn("memory", report)
+            self.assertGreater(pstats.Stats(report["cpu_dump"]).total_calls, 0)
+            self.assertTrue(os.path.exists(report["memory_dump"]))
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def _send_in_thread(self, count):
+        thread = threading.Thread(target=lambda: [self.client.send_message(i, "hi") for i in range(count)])
+        thread.start()
+        thread.join()
+
+    def test_window_used_up_by_another_thread(self):
+        """Test that a window expiring on another thread still ends"""
+        profiler = self.client.start_profiling(cpu=False, requests=2)
+        self._send_in_thread(3)
+
+        self.assertEqual(profiler.report["requests"], 2)
+        self.assertIsNone(self.client.profiler)
+
+    def test_cpu_window_closed_on_starting_thread(self):
+        """Test that cProfile is turned off by the starting thread when another thread expires the window"""
+        profiler = self.client.start_profiling(requests=2)
+        self._send_in_thread(2)
+
+        self.assertIsNone(profiler.report)
+        errors = []
+
+        def foreign_stop():
+            try:
+                profiler.stop()
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=foreign_stop)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.client.send_message(9, "hi")
+        self.assertEqual(profiler.report["requests"], 2)
+        self.assertIsNone(sys.getprofile())
+
+    def test_cpu_window_closed_on_event_loop(self):
+        """Test that an async profiler used up by executor threads stops on its loop"""
+        async def scenario():
+            profiler = self.client.start_profiling(requests=2)
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(None, self.client.send_message, i, "hi") for i in range(2)))
+            await asyncio.sleep(0)
+            return profiler, sys.getprofile()
+
+        profiler, hook = asyncio.run(scenario())
+
+        self.assertEqual(profiler.report["requests"], 2)
+        self.assertIsNone(hook)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Unit tests for the rate limiters in EitaaYar
+"""
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+import unittest
+
+from eitaayar import Client, MemoryTransport, SharedTokenBucket, TokenBucket
+
+OK = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi"}}
+
+
+def _reserve_many(bucket, count, results):
+    results.put([bucket.reserve() for _ in range(count)])
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test the token bucket rate limiter"""
+
+    def test_reserve_spaces_requests(self):
+        """Test that requests beyond the burst wait 1/rate seconds each"""
+        bucket = TokenBucket(rate=10, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, places=2)
+        self.assertAlmostEqual(waits[3], 0.2, places=2)
+
+    def test_acquire_sync(self):
+        """Test blocking acquisition"""
+        bucket = TokenBucket(rate=100, burst=1)
+        started = time.monotonic()
+        for _ in range(3):
+            bucket.acquire_sync()
+        self.assertGreaterEqual(time.monotonic() - started, 0.015)
+        self.assertEqual(bucket.metrics()["acquired"], 3)
+
+
+class TestSharedTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "bucket")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_instances_share_one_budget(self):
+        """Test that two buckets on the same file draw from one budget"""
+        first = SharedTokenBucket(self.path, rate=10, burst=2)
+        second = SharedTokenBucket(self.path, rate=10, burst=2)
+
+        waits = [first.reserve(), second.reserve(), first.reserve(), second.reserve()]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1, places=2)
+        self.assertAlmostEqual(waits[3], 0.2, places=2)
+        self.assertEqual(first.host_acquired(), 4)
+        self.assertEqual(second.metrics()["acquired"], 2)
+        first.close()
+        second.close()
+
+    def test_try_reserve_never_goes_into_debt(self):
+        """Test that try_reserve only takes a token that is already there"""
+        first = SharedTokenBucket(self.path, rate=10, burst=1)
+        second = SharedTokenBucket(self.path, rate=10, burst=1)
+
+        self.assertEqual(first.try_reserve(), 0.0)
+        self.assertAlmostEqual(second.try_reserve(), 0.1, places=2)
+        self.assertAlmostEqual(second.try_reserve(), 0.1, places=2)
+        self.assertAlmostEqual(second.reserve(), 0.1, places=2)
+        self.assertEqual((first.host_acquired(), second.metrics()["acquired"]), (2, 1))
+        first.close()
+        second.close()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_processes_share_one_budget(self):
+        """Test that forked processes (sharing the parent's bucket) coordinate"""
+        bucket = SharedTokenBucket(self.path, rate=100, burst=1)
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [context.Process(target=_reserve_many, args=(bucket, 5, results)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        waits = sorted(w for _ in processes for w in results.get(timeout=10))
+        for process in processes:
+            process.join(10)
+
+        self.assertEqual(bucket.host_acquired(), 15)
+        # پانزده درخواست با نرخ ۱۰۰ در ثانیه حدود ۰٫۱۴ ثانیه طول می‌کشد
+        self.assertGreater(waits[-1], 0.08)
+        self.assertLessEqual(waits[-1], 0.15)
+
+    @unittest.skipUnless(hasattr(os, "register_at_fork"), "needs os.register_at_fork")
+    def test_fork_drops_inherited_handles_and_lock(self):
+        """Test that a child forked while the lock is held closes the parent's fd and can reserve"""
+        bucket = SharedTokenBucket(self.path, rate=1000, burst=5)
+        inherited = bucket._fd
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+
+        def child():
+            try:
+                # شماره fd ممکن است دوباره برای فایل دیگری استفاده شده باشد
+                leaked = os.path.samestat(os.fstat(inherited), os.stat(self.path))
+            except OSError:
+                leaked = False
+            results.put((leaked, bucket._map is None, bucket.reserve()))
+
+        with bucket._lock:
+            process = context.Process(target=child)
+            process.start()
+        try:
+            leaked, unmapped, wait = results.get(timeout=10)
+        finally:
+            process.join(10)
+            if process.is_alive():
+                process.terminate()
+
+        self.assertFalse(leaked)
+        self.assertTrue(unmapped)
+        self.assertEqual(wait, 0.0)
+        self.assertEqual(bucket.host_acquired(), 1)
+        bucket.close()
+
+    def test_pickle_and_client_integration(self):
+        """Test that a pickled bucket reopens the file and limits both client paths"""
+        bucket = pickle.loads(pickle.dumps(SharedTokenBucket(self.path, rate=1000, burst=5)))
+        client = Client("test_token", rate_limiter=bucket, transport=MemoryTransport({"sendMessage": OK}))
+
+        client.send_message(1, "hi")
+        asyncio.run(client.send_message_async(2, "hi"))
+
+        self.assertEqual(bucket.metrics()["host_acquired"], 2)
+        self.assertEqual(bucket.path, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
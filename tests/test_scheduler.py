@@ -0,0 +1,134 @@
+"""
+Unit tests for client-side message scheduling in EitaaYar
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from eitaayar import LeanResult, MemorySink, MessageScheduler
+
+
+class FakeClient:
+    """Client stand-in recording send order"""
+
+    def __init__(self, reject_first=()):
+        self.sent = []
+        self.reject_first = set(reject_first)
+
+    async def send_message_async(self, chat_id, text, lean=False, **kwargs):
+        if chat_id in self.reject_first:
+            self.reject_first.discard(chat_id)
+            return LeanResult(False, None, 429, None)
+        self.sent.append((chat_id, text))
+        return LeanResult(True, len(self.sent), None, None)
+
+
+class TestMessageScheduler(unittest.TestCase):
+    """Test timer-heap scheduling, cancellation and retries"""
+
+    def test_due_order_and_cancel(self):
+        """Test that sends are released by due time and cancelled jobs are skipped"""
+        client = FakeClient()
+        scheduler = MessageScheduler(client)
+        now = time.time()
+        scheduler.schedule(now + 0.03, 3, "third")
+        first = scheduler.schedule(now + 0.01, 1, "first")
+        cancelled = scheduler.schedule(now + 0.02, 2, "cancelled")
+        scheduler.schedule_in(-1, 0, "overdue")
+
+        self.assertTrue(scheduler.cancel(cancelled))
+        self.assertFalse(scheduler.cancel(cancelled))
+        self.assertTrue(scheduler.reschedule(first, now + 0.04))
+        self.assertEqual(scheduler.pending, 3)
+
+        asyncio.run(scheduler.run(until_empty=True))
+
+        self.assertEqual(client.sent, [(0, "overdue"), (3, "third"), (1, "first")])
+        self.assertEqual(scheduler.metrics()["sent"], 3)
+        self.assertEqual(scheduler.metrics()["heap_size"], 0)
+
+    def test_wakes_for_earlier_job(self):
+        """Test that a job scheduled while waiting preempts the current timer"""
+        client = FakeClient()
+        scheduler = MessageScheduler(client)
+
+        async def scenario():
+            scheduler.schedule_in(60, 1, "later")
+            task = asyncio.ensure_future(scheduler.run())
+            await asyncio.sleep(0.01)
+            scheduler.schedule_in(0.01, 2, "sooner")
+            await asyncio.sleep(0.05)
+            scheduler.stop()
+            await task
+
+        asyncio.run(scenario())
+        self.assertEqual(client.sent, [(2, "sooner")])
+        self.assertEqual(scheduler.pending, 1)
+
+    def test_rejected_send_is_rescheduled(self):
+        """Test that a throttled send is retried with backoff"""
+        client = FakeClient(reject_first=[7])
+        sink = MemorySink()
+        scheduler = MessageScheduler(client, retry_delay=0.01, sink=sink)
+        scheduler.schedule_in(0, 7, "retry me")
+
+        asyncio.run(scheduler.run(until_empty=True))
+
+        self.assertEqual(client.sent, [(7, "retry me")])
+        self.assertEqual(scheduler.retried, 1)
+        self.assertEqual([r.ok for r in sink.records], [True])
+
+    def test_journal_restores_pending_sends(self):
+        """Test that pending sends survive a restart through the journal"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "schedule.jsonl")
+            scheduler = MessageScheduler(FakeClient(), journal_path=path)
+            keep = scheduler.schedule_in(0, 1, "سلام", title="t")
+            dropped = scheduler.schedule_in(0, 2, "dropped")
+            scheduler.cancel(dropped)
+            scheduler.close()
+
+            client = FakeClient()
+            restored = MessageScheduler(client, journal_path=path)
+            self.assertEqual(restored.pending, 1)
+            self.assertGreater(restored.schedule_in(100, 3, "new"), keep)
+            restored.cancel(restored._next_id - 1)
+            asyncio.run(restored.run(until_empty=True))
+            restored.close()
+
+            self.assertEqual(client.sent, [(1, "سلام")])
+            self.assertEqual(MessageScheduler(FakeClient(), journal_path=path).pending, 0)
+
+    def test_journal_rewrite_keeps_in_flight_sends(self):
+        """Test that compacting the journal mid-batch keeps sends not yet reported"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "schedule.jsonl")
+            snapshot = os.path.join(tmp, "crash.jsonl")
+            client = FakeClient()
+            scheduler = MessageScheduler(client, journal_path=path, concurrency=1)
+            send = client.send_message_async
+
+            async def send_and_compact(chat_id, text, **kwargs):
+                if not client.sent:
+                    scheduler.schedule_in(3600, 9, "later")
+                    scheduler._rewrite_journal()
+                    # وضعیت دفترچه در لحظه crash
+                    with open(path, encoding="utf-8") as src, open(snapshot, "w", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                return await send(chat_id, text, **kwargs)
+
+            client.send_message_async = send_and_compact
+            scheduler.schedule_in(0, 1, "a")
+            scheduler.schedule_in(0, 2, "b")
+            asyncio.run(scheduler._dispatch(scheduler._pop_due(time.time())))
+            scheduler.close()
+
+            restored = MessageScheduler(FakeClient(), journal_path=snapshot)
+            self.assertEqual(sorted(job[2]["chat_id"] for job in restored._jobs.values()), [1, 2, 9])
+            self.assertEqual(MessageScheduler(FakeClient(), journal_path=path).pending, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+"""
+Unit tests for graceful client shutdown in EitaaYar
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from eitaayar import (Client, MemoryTransport, AdmissionQueue, MessageScheduler, Campaign,
+                      MemorySink, RecordingTransport, HTTPTransport)
+
+OK = {"ok": True, "result": {"message_id": 1, "date": 0, "text": "hi"}}
+
+
+class SlowTransport(MemoryTransport):
+    """MemoryTransport answering after a delay"""
+
+    def __init__(self, delay):
+        super().__init__({"sendMessage": OK})
+        self.delay = delay
+
+    async def request_async(self, request):
+        await asyncio.sleep(self.delay)
+        return self._reply(request)
+
+    def request(self, request):
+        time.sleep(self.delay)
+        return self._reply(request)
+
+
+class TestShutdown(unittest.TestCase):
+
+    def test_waits_for_in_flight_and_refuses_new_sends(self):
+        """Test that in-flight sends finish and later sends are refused"""
+        async def scenario():
+            client = Client("test_token", transport=SlowTransport(0.05))
+            sends = [asyncio.ensure_future(client.send_message_async(i, "hi", lean=True)) for i in range(3)]
+            await asyncio.sleep(0)
+            report = await client.shutdown(timeout=2)
+            late = await client.send_message_async(9, "hi")
+            return report, [s.result() for s in sends], late
+
+        report, results, late = asyncio.run(scenario())
+
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual((report.completed, report.abandoned, report.timed_out), (3, 0, False))
+        self.assertEqual(late.error_type, "CLIENT_CLOSED")
+        self.assertEqual(late.error_code, 503)
+
+    def test_reports_abandoned_after_deadline(self):
+        """Test that sends still running at the deadline are reported as abandoned"""
+        async def scenario():
+            client = Client("test_token", transport=SlowTransport(5))
+            send = asyncio.ensure_future(client.send_message_async(1, "hi"))
+            await asyncio.sleep(0)
+            report = await client.shutdown(timeout=0.05)
+            send.cancel()
+            return report
+
+        report = asyncio.run(scenario())
+
+        self.assertEqual((report.completed, report.abandoned, report.timed_out), (0, 1, True))
+
+    def test_drains_attached_components(self):
+        """Test that admission queues drain and scheduler state is reported"""
+        async def scenario():
+            client = Client("test_token", transport=SlowTransport(0.01))
+            queue = AdmissionQueue(client, workers=2, lean=True)
+            scheduler = MessageScheduler(client)
+            scheduler.schedule_in(3600, 1, "later")
+            for i in range(10):
+                await queue.put(i, "hi")
+            report = await client.shutdown(timeout=2)
+            return report, await queue.put(99, "late"), queue.metrics()
+
+        report, admitted, metrics = asyncio.run(scenario())
+
+        components = {c["component"]: c for c in report.components}
+        self.assertEqual(components["AdmissionQueue"], {"component": "AdmissionQueue",
+                                                        "completed": 10, "abandoned": 0})
+        self.assertEqual(components["MessageScheduler"]["pending"], 1)
+        self.assertEqual(report.completed, 10)
+        self.assertEqual(report.abandoned, 1)
+        self.assertFalse(admitted)
+        self.assertEqual(metrics["sent"], 10)
+
+    def test_queue_sheds_what_misses_the_deadline(self):
+        """Test that queued and in-flight sends past the deadline are abandoned"""
+        async def scenario():
+            client = Client("test_token", transport=SlowTransport(5))
+            queue = AdmissionQueue(client, workers=1, lean=True)
+            for i in range(4):
+                await queue.put(i, "hi")
+            await asyncio.sleep(0)
+            return await client.shutdown(timeout=0.05)
+
+        report = asyncio.run(scenario())
+
+        self.assertEqual(report.components[0]["abandoned"], 4)
+        self.assertEqual(report.abandoned, 4)
+
+    def test_sync_shutdown_waits_for_threads(self):
+        """Test that the sync shutdown waits for requests running in other threads"""
+        client = Client("test_token", transport=SlowTransport(0.05))
+        results = []
+        thread = threading.Thread(target=lambda: results.append(client.send_message(1, "hi")))
+        thread.start()
+        time.sleep(0.01)
+
+        with client:
+            pass
+        thread.join()
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(client.send_message(2, "hi").error_type, "CLIENT_CLOSED")
+        self.assertEqual(client.in_flight, 0)
+
+    def test_bulk_sends_stop_reading_on_shutdown(self):
+        """Test that every bulk API stops pulling recipients once shutdown begins"""
+        def run_sync(client, source, method):
+            results = []
+            for result in getattr(client, method)(source, **kwargs[method]):
+                results.append(result)
+                if len(results) == 5:
+                    client.shutdown_sync()
+            return results
+
+        async def run_async(client, source, method):
+            results = []
+            async for result in getattr(client, method)(source, **kwargs[method]):
+                results.append(result)
+                if len(results) == 5:
+                    await client.shutdown()
+            return results
+
+        kwargs = {
+            "send_message_many": {"text": "hi", "max_workers": 2},
+            "send_message_many_async": {"text": "hi", "concurrency": 2},
+            "send_document_many": {"file": b"data", "filename": "a.txt", "max_workers": 2},
+            "send_document_many_async": {"file": b"data", "filename": "a.txt", "concurrency": 2},
+        }
+        for method in kwargs:
+            with self.subTest(method=method):
+                client = Client("test_token", transport=MemoryTransport({"sendMessage": OK, "sendDocument": OK}))
+                read = []
+                source = (read.append(i) or i for i in range(1000))
+                if method.endswith("_async"):
+                    results = asyncio.run(run_async(client, source, method))
+                else:
+                    results = run_sync(client, source, method)
+
+                self.assertLess(len(read), 20)
+                self.assertEqual(len(results), len(read))
+                self.assertTrue(client.closing)
+
+    def test_campaign_stops_on_shutdown(self):
+        """Test that a campaign stops reading rows and leaves its checkpoint unfinished"""
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, "campaign.ckpt")
+
+            async def scenario():
+                client = Client("test_token", transport=SlowTransport(0.01))
+                campaign = Campaign(client, range(1000), text="hi", checkpoint_path=checkpoint, concurrency=2)
+                run = asyncio.ensure_future(campaign.run())
+                await asyncio.sleep(0.05)
+                await client.shutdown(timeout=1)
+                return await run
+
+            result = asyncio.run(scenario())
+
+            self.assertLess(result.sent, 50)
+            self.assertEqual(result.unacknowledged, 0)
+            with open(checkpoint, encoding="utf-8") as fh:
+                state = json.load(fh)
+            self.assertFalse(state["finished"])
+            self.assertEqual(state["row"], result.sent)
+
+    def test_flushes_bulk_sinks(self):
+        """Test that records buffered by an unfinished bulk send are flushed"""
+        client = Client("test_token", transport=MemoryTransport({"sendMessage": OK}))
+        sink = MemorySink(batch_size=100)
+        results = client.send_message_many(range(10), "hi", sink=sink)
+        for _ in range(3):
+            next(results)
+
+        client.shutdown_sync()
+
+        self.assertEqual([r.chat_id for r in sink.records], [0, 1, 2])
+        results.close()
+
+    def test_closes_wrapped_transport(self):
+        """Test that the aiohttp session of a wrapped transport is closed"""
+        with tempfile.TemporaryDirectory() as tmp:
+            inner = HTTPTransport()
+            client = Client("test_token", transport=RecordingTransport(os.path.join(tmp, "r.jsonl"), inner))
+
+            async def open_session():
+                return inner.async_transport._get_session()
+
+            session = asyncio.run(open_session())
+            client.shutdown_sync()
+
+            self.assertTrue(session.closed)
+            self.assertIsNone(inner.async_transport.session)
+
+    def test_reusable_after_context(self):
+        """Test that entering the context again reopens a shut down client"""
+        async def scenario(client):
+            async with client:
+                return await client.send_message_async(2, "hi")
+
+        client = Client("test_token", transport=MemoryTransport({"sendMessage": OK}))
+        with client:
+            self.assertTrue(client.send_message(1, "hi").ok)
+        self.assertTrue(client.closing)
+
+        with client:
+            self.assertFalse(client.closing)
+            self.assertTrue(client.send_message(1, "hi").ok)
+        self.assertTrue(asyncio.run(scenario(client)).ok)
+        self.assertEqual(client.send_message(3, "hi").error_type, "CLIENT_CLOSED")
+
+    def test_server_text_is_not_client_closed(self):
+        """Test that only the client's own refusal is tagged CLIENT_CLOSED"""
+        reply = {"ok": False, "error": "Server is shutting down for maintenance", "error_code": 503}
+        client = Client("test_token", transport=MemoryTransport({"sendMessage": reply}))
+
+        self.assertIsNone(client.send_message(1, "hi").error_type)
+        self.assertIsNone(client.send_message(1, "hi", lean=True).error_type)
+        client.shutdown_sync()
+        self.assertEqual(client.send_message(1, "hi", lean=True).error_type, "CLIENT_CLOSED")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Unit tests for result sinks in EitaaYar client
+"""
+
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from eitaayar import Client, Response, SendRecord, MemorySink, open_sink
+
+
+class TestSendRecord(unittest.TestCase):
+    """Test compact record construction"""
+
+    def test_from_success_response(self):
+        """Test record fields for a successful message response"""
+        response = Response({"ok": True, "result": {"message_id": 77, "chat": {"id": 5}}}, enable_logging=False)
+        record = SendRecord.from_response(5, response, latency=0.0123456789)
+
+        self.assertEqual(record, SendRecord(5, True, 77, None, None, 0.012346))
+
+    def test_from_error_response(self):
+        """Test record fields for an error response"""
+        response = Response({"ok": False, "error": "chat not found", "error_code": 400}, enable_logging=False)
+        record = SendRecord.from_response("@x", response)
+
+        self.assertFalse(record.ok)
+        self.assertEqual(record.error_type, "CHAT_NOT_FOUND")
+        self.assertEqual(record.error_code, 400)
+
+
+class TestSinks(unittest.TestCase):
+    """Test buffered file sinks"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.records = [SendRecord(i, i % 2 == 0, i, None if i % 2 == 0 else "TIMEOUT", None, 0.1)
+                        for i in range(5)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_batches_are_buffered(self):
+        """Test that records are written only when a batch fills up"""
+        sink = MemorySink(batch_size=3)
+        for record in self.records[:2]:
+            sink.write(record)
+        self.assertEqual(sink.records, [])
+
+        sink.write(self.records[2])
+        self.assertEqual(len(sink.records), 3)
+
+        sink.write(self.records[3])
+        sink.close()
+        self.assertEqual(sink.written, 4)
+
+    def test_jsonl_sink(self):
+        """Test JSONL output"""
+        with open_sink(self._path("out.jsonl"), batch_size=2) as sink:
+            for record in self.records:
+                sink.write(record)
+
+        with open(self._path("out.jsonl"), encoding="utf-8") as fh:
+            rows = [json.loads(line) for line in fh]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1]["error_type"], "TIMEOUT")
+
+    def test_csv_sink(self):
+        """Test CSV output with a single header across reopen"""
+        for _ in range(2):
+            with open_sink(self._path("out.csv")) as sink:
+                sink.write(self.records[0])
+
+        with open(self._path("out.csv"), newline="", encoding="utf-8") as fh:
+            rows = list(csv.reader(fh))
+        self.assertEqual(rows[0], list(SendRecord._fields))
+        self.assertEqual(len(rows), 3)
+
+    def test_sqlite_sink(self):
+        """Test SQLite output"""
+        with open_sink(self._path("out.db"), batch_size=2) as sink:
+            for record in self.records:
+                sink.write(record)
+
+        conn = sqlite3.connect(self._path("out.db"))
+        try:
+            count, ok = conn.execute("SELECT COUNT(*), SUM(ok) FROM send_results").fetchone()
+        finally:
+            conn.close()
+        self.assertEqual((count, ok), (5, 3))
+
+    def test_unknown_extension(self):
+        """Test that unknown extensions are rejected"""
+        with self.assertRaises(ValueError):
+            open_sink(self._path("out.txt"))
+
+
+class TestBulkSendWithSink(unittest.TestCase):
+    """Test bulk sends writing to a sink"""
+
+    def test_send_message_many_async_yields_records(self):
+        """Test that bulk sends yield compact records and fill the sink"""
+        client = Client("test_token", enable_logging=False)
+        sink = MemorySink(batch_size=10)
+
+        async def fake_request(method, params=None, data=None, files=None, **kwargs):
+            return Response({"ok": True, "result": {"message_id": data["chat_id"] * 10}}, enable_logging=False)
+
+        async def collect():
+            return [r async for r in client.send_message_many_async(range(3), text="hi", sink=sink)]
+
+        with patch.object(client, "_aiohttp_request", side_effect=fake_request):
+            results = asyncio.run(collect())
+
+        self.assertTrue(all(isinstance(r, SendRecord) for r in results))
+        self.assertEqual(sorted(r.message_id for r in sink.records), [0, 10, 20])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit tests for message templates and bulk sending in EitaaYar client
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from eitaayar import Client, Response, MessageTemplate, rows_from_csv, run_bounded
+
+
+class TestMessageTemplate(unittest.TestCase):
+    """Test template compilation and rendering"""
+
+    def test_render_text_and_title(self):
+        """Test rendering text and title for a row"""
+        template = MessageTemplate("سلام {name}، موجودی: {balance:,}", title="{name}")
+        message = template.render({"chat_id": 42, "name": "Ali", "balance": 1500000})
+
+        self.assertEqual(message["chat_id"], 42)
+        self.assertEqual(message["text"], "سلام Ali، موجودی: 1,500,000")
+        self.assertEqual(message["title"], "Ali")
+        self.assertEqual(template.fields, ["name", "balance"])
+
+    def test_positional_fields_rejected(self):
+        """Test that positional placeholders are rejected at parse time"""
+        with self.assertRaises(ValueError):
+            MessageTemplate("Hello {}")
+
+    def test_rows_from_csv(self):
+        """Test lazy CSV row reading"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as fh:
+            fh.write("chat_id,name\n1,a\n2,b\n")
+        try:
+            rows = list(rows_from_csv(fh.name))
+        finally:
+            os.unlink(fh.name)
+
+        self.assertEqual(rows, [{"chat_id": "1", "name": "a"}, {"chat_id": "2", "name": "b"}])
+
+
+class TestBulkSend(unittest.TestCase):
+    """Test bounded bulk sending"""
+
+    def test_run_bounded_limits_concurrency(self):
+        """Test that no more than `concurrency` workers run at once"""
+        state = {"current": 0, "peak": 0}
+
+        async def worker(item):
+            state["current"] += 1
+            state["peak"] = max(state["peak"], state["current"])
+            await asyncio.sleep(0)
+            state["current"] -= 1
+            return item * 2
+
+        async def collect():
+            return [r async for r in run_bounded(iter(range(50)), worker, concurrency=5)]
+
+        results = asyncio.run(collect())
+
+        self.assertEqual(sorted(results), [i * 2 for i in range(50)])
+        self.assertLessEqual(state["peak"], 5)
+
+    def test_send_message_many_async_with_template(self):
+        """Test that template rows are rendered and sent"""
+        client = Client("test_token", enable_logging=False)
+        template = MessageTemplate("Hi {name}")
+        sent = []
+
+        async def fake_request(method, params=None, data=None, files=None, **kwargs):
+            sent.append(data)
+            return Response({"ok": True, "result": {"message_id": len(sent)}}, enable_logging=False)
+
+        rows = ({"chat_id": i, "name": f"user{i}"} for i in range(3))
+
+        async def collect():
+            return [r async for r in client.send_message_many_async(rows, template=template, concurrency=2)]
+
+        with patch.object(client, "_aiohttp_request", side_effect=fake_request):
+            results = asyncio.run(collect())
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(response.ok for _, response in results))
+        self.assertIn({"chat_id": 1, "text": "Hi user1"}, sent)
+
+    def test_send_message_many_async_requires_one_source(self):
+        """Test that text and template are mutually exclusive"""
+        client = Client("test_token", enable_logging=False)
+
+        async def consume():
+            async for _ in client.send_message_many_async([1], text="a", template=MessageTemplate("b")):
+                pass
+
+        with self.assertRaises(ValueError):
+            asyncio.run(consume())
+
+
+if __name__ == "__main__":
+    unittest.main()
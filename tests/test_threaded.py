@@ -0,0 +1,110 @@
+"""
+Unit tests for thread-pool bulk sending in EitaaYar client
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+from eitaayar import Client, Response, MemorySink
+
+
+def _ok(message_id):
+    return Response({"ok": True, "result": {"message_id": message_id}}, enable_logging=False)
+
+
+class TestSendMessageMany(unittest.TestCase):
+    """Test send_message_many over a thread pool"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.client = Client("test_token", enable_logging=False)
+        self.threads = set()
+
+    def tearDown(self):
+        self.client.close_sync()
+
+    def _fake_request(self, method, params=None, data=None, files=None, **kwargs):
+        self.threads.add(threading.get_ident())
+        # پاسخ‌های زودتر برای شناسه‌های بزرگ‌تر تا ترتیب تکمیل به هم بخورد
+        time.sleep(0.001 * (10 - data["chat_id"] % 10))
+        return _ok(data["chat_id"])
+
+    def test_ordered_results(self):
+        """Test that ordered mode yields results in input order"""
+        with patch.object(self.client, "_requests_request", side_effect=self._fake_request):
+            results = list(self.client.send_message_many(range(20), text="hi", max_workers=4, ordered=True))
+
+        self.assertEqual([chat_id for chat_id, _ in results], list(range(20)))
+        self.assertGreater(len(self.threads), 1)
+        self.assertIsNotNone(self.client._sync_session)
+
+    def test_bounded_in_flight(self):
+        """Test that the source is consumed lazily"""
+        pulled = []
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        with patch.object(self.client, "_requests_request", side_effect=self._fake_request):
+            results = self.client.send_message_many(source(), text="hi", max_workers=2, max_in_flight=3)
+            next(results)
+            self.assertLessEqual(len(pulled), 4)
+            results.close()
+
+    def test_fatal_error_cancels_remaining(self):
+        """Test that INVALID_TOKEN stops the remaining work"""
+        calls = []
+
+        def fake_request(method, params=None, data=None, files=None, **kwargs):
+            calls.append(data["chat_id"])
+            return Response({"ok": False, "error": "invalid token", "error_code": 401}, enable_logging=False)
+
+        sink = MemorySink()
+        with patch.object(self.client, "_requests_request", side_effect=fake_request):
+            results = list(self.client.send_message_many(range(1000), text="hi", max_workers=2, sink=sink))
+
+        self.assertEqual(results[0].error_type, "INVALID_TOKEN")
+        self.assertLess(len(calls), 20)
+        self.assertEqual(len(sink.records), len(results))
+
+    def test_sync_requests_use_shared_session(self):
+        """Test that sync requests go through the pooled session once created"""
+        session = Mock()
+        session.post.return_value = Mock(status_code=200, json=Mock(return_value={"ok": True, "result": {"message_id": 1}}))
+        self.client._sync_session = session
+
+        response = self.client.send_message(1, "hi")
+
+        self.assertTrue(response.ok)
+        session.post.assert_called_once()
+
+
+class TestSendDocumentMany(unittest.TestCase):
+    """Test send_document_many over a thread pool"""
+
+    def test_reference_reused(self):
+        """Test that the document is uploaded once and then sent by reference"""
+        client = Client("test_token", enable_logging=False)
+        uploads = []
+
+        def fake_request(method, params=None, data=None, files=None, body=None, content_type=None, **kwargs):
+            if body is not None:
+                uploads.append(body)
+                return Response({"ok": True, "result": {"message_id": 1, "document": {"file_id": "F"}}},
+                                enable_logging=False)
+            self.assertEqual(data["file_id"], "F")
+            return _ok(2)
+
+        with patch.object(client, "_requests_request", side_effect=fake_request):
+            results = list(client.send_document_many(range(10), b"pdf", filename="a.pdf", max_workers=3))
+
+        client.close_sync()
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(uploads), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
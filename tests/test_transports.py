@@ -0,0 +1,110 @@
+"""
+Unit tests for the pluggable transports of EitaaYar client
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from eitaayar import Client, MemoryTransport, RecordingTransport, ReplayTransport, TransportError, Transport
+
+MESSAGE = {"ok": True, "result": {"message_id": 7, "chat": {"id": 5, "type": "private"}, "date": 1700000000,
+                                  "text": "hi"}}
+
+
+class _FailingTransport(Transport):
+    def request(self, request):
+        raise TransportError("Network error: connection reset")
+
+
+class TestMemoryTransport(unittest.TestCase):
+    """Test zero-I/O canned replies"""
+
+    def test_sync_and_async_share_transport(self):
+        """Test that both client paths go through the same transport"""
+        transport = MemoryTransport({"sendMessage": MESSAGE, "getMe": {"ok": True, "result": True}})
+        client = Client("secret_token", enable_logging=False, transport=transport)
+
+        response = client.send_message(5, "hi", title="t")
+        async_response = asyncio.run(client.send_message_async(5, "hi"))
+
+        self.assertEqual(response.result.message_id, 7)
+        self.assertEqual(async_response.result.message_id, 7)
+        self.assertTrue(client.get_me().ok)
+        self.assertEqual(transport.count, 3)
+        request = transport.requests[0]
+        self.assertEqual(request.method, "sendMessage")
+        self.assertEqual(request.data, {"chat_id": 5, "text": "hi", "title": "t"})
+        self.assertEqual(request.headers["Content-Type"], "application/json")
+
+    def test_reply_sequence_and_default(self):
+        """Test that replies are served in order and the last one repeats"""
+        transport = MemoryTransport({"sendMessage": [{"ok": False, "error": "timeout"}, MESSAGE]})
+        client = Client("t", enable_logging=False, transport=transport)
+
+        self.assertEqual(client.send_message(1, "a").error_type, "TIMEOUT")
+        self.assertTrue(client.send_message(1, "b").ok)
+        self.assertTrue(client.send_message(1, "c").ok)
+        self.assertEqual(client.get_me().error_type, "METHOD_NOT_FOUND")
+
+    def test_transport_error_becomes_response(self):
+        """Test that transport failures are reported as error responses"""
+        client = Client("t", enable_logging=False, transport=_FailingTransport())
+
+        response = client.get_me()
+        self.assertFalse(response.ok)
+        self.assertEqual(response.error_code, 503)
+        self.assertEqual(response.error_type, "NETWORK_ERROR")
+        self.assertEqual(asyncio.run(client.get_me_async()).error_code, 500)
+
+    def test_non_object_reply_becomes_error(self):
+        """Test that a JSON reply which is not an object fails the send instead of raising"""
+        for body in (b"null", b"[]"):
+            client = Client("t", enable_logging=False, transport=MemoryTransport({"sendMessage": body}))
+            for lean in (False, True):
+                with self.subTest(body=body, lean=lean):
+                    results = [client.send_message(1, "a", lean=lean),
+                               asyncio.run(client.send_message_async(1, "a", lean=lean))]
+                    for result in results:
+                        self.assertFalse(result.ok)
+                        self.assertEqual(result.error_code, 500)
+
+
+class TestRecordReplay(unittest.TestCase):
+    """Test capturing traffic and playing it back"""
+
+    def test_round_trip(self):
+        """Test that recorded replies are replayed in order without the token"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traffic.jsonl")
+            live = MemoryTransport({"sendMessage": [{"ok": False, "error": "chat not found"}, MESSAGE]})
+            recorder = Client("secret_token", enable_logging=False, transport=RecordingTransport(path, live))
+            recorder.send_message(1, "a")
+            asyncio.run(recorder.send_message_async(2, "b"))
+            asyncio.run(recorder.close())
+
+            with open(path, encoding="utf-8") as fh:
+                self.assertNotIn("secret_token", fh.read())
+
+            replay = Client("t", enable_logging=False, transport=ReplayTransport(path))
+            self.assertEqual(replay.send_message(1, "a").error_type, "CHAT_NOT_FOUND")
+            self.assertEqual(replay.send_message(2, "b").result.message_id, 7)
+
+    def test_sync_close_releases_file(self):
+        """Test that the sync close closes the recording and a later send reopens it"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traffic.jsonl")
+            transport = RecordingTransport(path, MemoryTransport({"sendMessage": MESSAGE}))
+            client = Client("t", enable_logging=False, transport=transport)
+            client.send_message(1, "a")
+            client.close_sync()
+
+            self.assertTrue(transport._file.closed)
+            client.send_message(2, "b")
+            client.close_sync()
+            with open(path, encoding="utf-8") as fh:
+                self.assertEqual(len(fh.readlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()